@@ -0,0 +1,157 @@
+import importlib
+import json
+from collections import namedtuple
+
+
+# kind selects the adapter; options maps a mode to default benchmark kwargs;
+# cost is a rough duration estimate (seconds for a default run) used for scheduling
+Job = namedtuple("Job", ["kind", "category", "algorithm", "options", "cost"], defaults=(None, 1.0))
+
+# Default adapter for each plan section
+SECTION_ADAPTERS = {
+    "kems": "kem",
+    "signatures": "sig"
+}
+
+ADAPTERS = {}
+
+
+def register_adapter(kind, label, runners, operations):
+    """Register a benchmark adapter.
+
+    runners maps a mode ("latency", "throughput", "sweep", "memory", "context",
+    "bulk") to a callable taking (category, algorithm, **options) and
+    returning (results, raw_timings).
+    """
+    ADAPTERS[kind] = {"label": label, "runners": runners, "operations": operations}
+
+
+def _load(module, name):
+    # Benchmark modules are imported on first use, so planning and listing
+    # jobs needs neither liboqs nor cryptography
+    return getattr(importlib.import_module(module), name)
+
+def _lazy(module, name):
+    def run(category, algorithm, **options):
+        return _load(module, name)(category, algorithm, **options)
+    return run
+
+def _rsa_oaep(category, algorithm, **options):
+    return _load("classic_kem", "benchmark_rsa_oaep")(**options)
+
+def _rsa_oaep_throughput(category, algorithm, **options):
+    return _load("classic_kem", "benchmark_rsa_oaep_throughput")(**options)
+
+def _classic_sig(category, algorithm, **options):
+    return _load("classic_sig", "benchmark_baseline")(algorithm, **options)
+
+def _classic_sig_throughput(category, algorithm, **options):
+    return _load("classic_sig", "benchmark_baseline_throughput")(algorithm, **options)
+
+def _per_kind(module, name, kind):
+    # Runners shared by all kinds take the kind as their first argument
+    def run(category, algorithm, **options):
+        return _load(module, name)(kind, category, algorithm, **options)
+    return run
+
+# The option that sets how much work each mode repeats, shared by every
+# adapter's runner for that mode; memory runs measure one pass of each operation
+REPEAT_OPTIONS = {
+    "latency": "iterations",
+    "throughput": "batches",
+    "sweep": "iterations",
+    "context": "iterations",
+    "bulk": "messages"
+}
+
+KEM_OPERATIONS = ("keygen", "encap", "decap")
+SIG_OPERATIONS = ("keygen", "sign", "verify")
+
+
+register_adapter("kem", "KEM", {
+    "latency": _lazy("kem_benchmark", "benchmark"),
+    "throughput": _lazy("kem_benchmark", "benchmark_throughput"),
+    "memory": _per_kind("memory_profile", "benchmark_memory", "kem"),
+    "context": _per_kind("context_benchmark", "benchmark_context", "kem")
+}, KEM_OPERATIONS)
+
+register_adapter("sig", "Signature Algorithm", {
+    "latency": _lazy("sig_benchmark", "benchmark"),
+    "throughput": _lazy("sig_benchmark", "benchmark_throughput"),
+    "sweep": _lazy("message_sweep", "benchmark_sweep"),
+    "memory": _per_kind("memory_profile", "benchmark_memory", "sig"),
+    "context": _per_kind("context_benchmark", "benchmark_context", "sig"),
+    "bulk": _per_kind("bulk_verify", "benchmark_bulk", "sig")
+}, SIG_OPERATIONS)
+
+register_adapter("classic_kem", "Classic KEM", {
+    "latency": _rsa_oaep,
+    "throughput": _rsa_oaep_throughput,
+    "memory": _per_kind("memory_profile", "benchmark_memory", "classic_kem"),
+    "context": _per_kind("context_benchmark", "benchmark_context", "classic_kem")
+}, KEM_OPERATIONS)
+
+register_adapter("classic_sig", "Classic Signature", {
+    "latency": _classic_sig,
+    "throughput": _classic_sig_throughput,
+    "sweep": _lazy("message_sweep", "benchmark_sweep"),
+    "memory": _per_kind("memory_profile", "benchmark_memory", "classic_sig"),
+    "context": _per_kind("context_benchmark", "benchmark_context", "classic_sig"),
+    "bulk": _per_kind("bulk_verify", "benchmark_bulk", "classic_sig")
+}, SIG_OPERATIONS)
+
+
+def load_plan(path="algorithms.json"):
+    with open(path, "r") as file:
+        return json.load(file)
+
+def families(plan):
+    """Yield (section, family, spec) with every family normalised to a dict.
+
+    A family may be a plain list of algorithm names (the original format) or
+    a dict with algorithms, category, adapter, cost, costs and options.
+    """
+    for section, section_families in plan.items():
+        for family, spec in section_families.items():
+            if isinstance(spec, list):
+                spec = {"algorithms": spec}
+            spec = dict(spec)
+            spec.setdefault("category", family.upper())
+            spec.setdefault("adapter", SECTION_ADAPTERS.get(section))
+            if spec["adapter"] not in ADAPTERS:
+                raise ValueError(f"Unknown adapter {spec['adapter']!r} for family {family!r}")
+            yield section, family, spec
+
+def build_jobs(plan, enabled):
+    """Turn a plan and the enabled algorithms per family into a list of Jobs.
+
+    enabled maps family name to the algorithms that passed validation.
+    """
+    jobs = []
+    for section, family, spec in families(plan):
+        costs = spec.get("costs", {})
+        for algorithm in enabled.get(family, []):
+            jobs.append(Job(
+                spec["adapter"], spec["category"], algorithm,
+                spec.get("options", {}), costs.get(algorithm, spec.get("cost", 1.0))
+            ))
+    return jobs
+
+def supports(job, mode):
+    return mode in ADAPTERS[job.kind]["runners"]
+
+def schedule(jobs):
+    # Longest processing time first: starting the slowest jobs early keeps a
+    # worker pool busy until the end and makes budgeted runs finish sooner
+    return sorted(jobs, key=lambda job: job.cost, reverse=True)
+
+def describe(job):
+    return f"{ADAPTERS[job.kind]['label']}: {job.algorithm}"
+
+def run(job, options=None, mode="latency"):
+    runner = ADAPTERS[job.kind]["runners"].get(mode)
+    if runner is None:
+        raise ValueError(f"{describe(job)} has no {mode} benchmark")
+    # Plan options are per-family defaults; options from the environment win
+    options = {**(job.options or {}).get(mode, {}), **(options or {})}
+    return runner(job.category, job.algorithm, **options)
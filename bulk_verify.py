@@ -0,0 +1,224 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import oqs
+from cryptography.hazmat.primitives import serialization
+
+import classic_sig
+import key_pool
+import raw_stream
+import scaling_benchmark
+import timing_stats
+
+
+BASELINE = "Ed25519"
+
+
+def _der_public(public_key):
+    return public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+def telemetry_frames(messages, message_length=256, seed=None):
+    # Distinct frames: an 8-byte sequence number followed by a random payload
+    payload = np.random.default_rng(seed).bytes(messages * message_length)
+    return [
+        i.to_bytes(8, "big") + payload[i * message_length:(i + 1) * message_length]
+        for i in range(messages)
+    ]
+
+def make_corpus(kind, algorithm, keys=16, messages=10_000, message_length=256, seed=None):
+    """Sign `messages` distinct frames round-robin under `keys` fresh keys.
+
+    Returns (public_keys, frames, sign_ms): public keys as bytes (DER for
+    the classical baselines), frames as (key_index, message, signature)
+    and the time of every sign call.
+    """
+    payloads = telemetry_frames(messages, message_length, seed)
+    sign_ms = timing_stats.empty(messages)
+    frames = []
+
+    if kind == "sig":
+        signers = [oqs.Signature(algorithm) for _ in range(keys)]
+        try:
+            public_keys = [signer.generate_keypair() for signer in signers]
+            for i, message in enumerate(payloads):
+                start_time = time.perf_counter_ns()
+                signature = signers[i % keys].sign(message)
+                sign_ms[i] = (time.perf_counter_ns() - start_time) / 1_000_000
+                frames.append((i % keys, message, signature))
+        finally:
+            for signer in signers:
+                signer.free()
+        return public_keys, frames, sign_ms
+
+    keygen, sign, _ = classic_sig.BASELINES[algorithm]
+    private_keys = [keygen() for _ in range(keys)]
+    for i, message in enumerate(payloads):
+        start_time = time.perf_counter_ns()
+        signature = sign(private_keys[i % keys], message)
+        sign_ms[i] = (time.perf_counter_ns() - start_time) / 1_000_000
+        frames.append((i % keys, message, signature))
+    return [_der_public(key.public_key()) for key in private_keys], frames, sign_ms
+
+
+class Verifier:
+    """Checks frames against a fixed key set with one reused context.
+
+    For liboqs that is a single oqs.Signature per worker; the classical
+    baselines parse every DER public key once up front instead.
+    """
+
+    def __init__(self, kind, algorithm, public_keys):
+        if kind == "sig":
+            self.context = oqs.Signature(algorithm)
+            self.keys = public_keys
+            self.check = lambda key, message, signature: self.context.verify(message, signature, key)
+        else:
+            self.context = None
+            self.keys = [serialization.load_der_public_key(key) for key in public_keys]
+            self.check = classic_sig.BASELINES[algorithm][2]
+
+    def verify(self, key_index, message, signature):
+        return self.check(self.keys[key_index], message, signature)
+
+    def close(self):
+        if self.context is not None:
+            self.context.free()
+
+
+# One verifier per pool worker, built by the initializer and kept for every chunk
+_verifier = None
+
+def _init_worker(kind, algorithm, public_keys):
+    global _verifier
+    _verifier = Verifier(kind, algorithm, public_keys)
+
+def _verify_chunk(frames):
+    start = time.perf_counter_ns()
+    valid = sum(bool(_verifier.verify(*frame)) for frame in frames)
+    return start, time.perf_counter_ns(), valid, len(frames)
+
+def _ready(_):
+    return _verifier is not None
+
+
+def verify_serial(kind, algorithm, public_keys, frames):
+    # Returns (setup_ms, per-frame verify ms, wall seconds of the loop, valid
+    # count); the wall time is what the pool's wall time is compared against
+    start_time = time.perf_counter_ns()
+    verifier = Verifier(kind, algorithm, public_keys)
+    setup_ms = (time.perf_counter_ns() - start_time) / 1_000_000
+    verify_ms = timing_stats.empty(len(frames))
+    valid = 0
+    try:
+        for frame in frames[:min(len(frames), 16)]:
+            verifier.verify(*frame)  # warm-up
+        started = time.perf_counter_ns()
+        for i, frame in enumerate(frames):
+            start_time = time.perf_counter_ns()
+            ok = verifier.verify(*frame)
+            verify_ms[i] = (time.perf_counter_ns() - start_time) / 1_000_000
+            valid += bool(ok)
+        elapsed_s = (time.perf_counter_ns() - started) / 1_000_000_000
+    finally:
+        verifier.close()
+    return setup_ms, verify_ms, elapsed_s, valid
+
+def verify_pool(kind, algorithm, public_keys, frames, workers, chunk_size=256):
+    """Stream the frames through a worker pool in chunks.
+
+    Returns (wall seconds, per-frame ms of every chunk, valid count). The
+    wall time runs from the first chunk submitted to the last result back,
+    so it includes shipping the frames to the workers.
+    """
+    chunks = [frames[i:i + chunk_size] for i in range(0, len(frames), chunk_size)]
+    with multiprocessing.Pool(workers, _init_worker, (kind, algorithm, public_keys)) as pool:
+        pool.map(_ready, range(workers * 4))
+        started = time.perf_counter_ns()
+        outcomes = list(pool.imap_unordered(_verify_chunk, chunks))
+        elapsed_s = (time.perf_counter_ns() - started) / 1_000_000_000
+    chunk_ms = np.array([(end - start) / 1_000_000 / count for start, end, _, count in outcomes])
+    return elapsed_s, chunk_ms, sum(valid for _, _, valid, _ in outcomes)
+
+def benchmark_bulk(kind, category, algorithm, keys=16, messages=10_000, message_length=256,
+                   workers=None, chunk_size=256, seed=None):
+    """Bulk telemetry verification: a pre-signed corpus verified serially and on a pool."""
+    # Only the CPUs this process may run on, e.g. under BENCH_WORKERS pinning or a hardware profile
+    workers = workers or key_pool.usable_cpus()
+    public_keys, frames, sign_ms = make_corpus(kind, algorithm, keys, messages, message_length, seed)
+    setup_ms, verify_ms, serial_s, serial_valid = verify_serial(kind, algorithm, public_keys, frames)
+    pool_s, pool_chunk_ms, pool_valid = verify_pool(kind, algorithm, public_keys, frames, workers, chunk_size)
+    # Wall clock on both sides, so the speedup is not biased by the serial loop's timer overhead
+    serial_rate = messages / serial_s
+
+    results = {
+        "algorithm": algorithm,
+        "category": category,
+        "mode": "bulk_verify",
+        "iterations": messages,
+        "keys": keys,
+        "message_length": message_length,
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "public_key_size": len(public_keys[0]),
+        "signature_size": len(frames[0][2]),
+        "key_size": len(public_keys[0]),
+        "sign_ms": timing_stats.compute_stats(sign_ms),
+        "verify_serial_ms": timing_stats.compute_stats(verify_ms),
+        "verify_pool_ms": timing_stats.compute_stats(pool_chunk_ms),
+        "throughput": {
+            "signs_per_sec": round(messages / (float(sign_ms.sum()) / 1000), 3),
+            "serial_verifications_per_sec": round(serial_rate, 3),
+            "pool_verifications_per_sec": round(messages / pool_s, 3),
+            "pool_speedup": round(messages / pool_s / serial_rate, 3)
+        },
+        # Verifier construction (context and key parsing), spread over keys and frames
+        "setup": {
+            "verifier_setup_ms": round(setup_ms, 6),
+            "setup_ms_per_key": round(setup_ms / keys, 6),
+            "amortized_setup_ms_per_verify": round(setup_ms / messages, 9)
+        },
+        "correctness_rate": round(min(serial_valid, pool_valid) / messages, 6),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    }
+    raw_timings = {"sign": sign_ms, "verify_serial": verify_ms, "verify_pool": pool_chunk_ms}
+    return results, raw_timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk signature verification throughput over a pre-signed corpus")
+    parser.add_argument("algorithms", nargs="+")
+    parser.add_argument("--keys", type=int, default=16)
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--message-length", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-baseline", action="store_true", help=f"do not add {BASELINE} for comparison")
+    args = parser.parse_args()
+
+    algorithms = list(args.algorithms)
+    if not args.no_baseline and BASELINE not in algorithms:
+        algorithms.append(BASELINE)
+
+    label = os.getenv("SYSTEM_LABEL", "default")
+    for algorithm in algorithms:
+        kind = scaling_benchmark.job_kind(algorithm)
+        if kind not in ("sig", "classic_sig"):
+            raise ValueError(f"{algorithm} is not a signature algorithm")
+        print(f"\nBulk verify: {algorithm}")
+        results, raw_timings = benchmark_bulk(kind, kind, algorithm, args.keys, args.messages,
+                                              args.message_length, args.workers, args.chunk_size, args.seed)
+        print(json.dumps(results, indent=4))
+        path = raw_stream.export_path(label, algorithm, results["timestamp"], "bulk", ".json")
+        with open(path, "w") as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
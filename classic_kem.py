@@ -1,113 +1,172 @@
 import time
 import os
-import statistics as stats
+import timing_stats
+import raw_stream
+import instrumentation
+import key_pool
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import hashes, serialization
 
 
-def compute_stats(data):
-    mean = stats.mean(data)
-    stddev = stats.stdev(data)
-    return {
-        "mean": round(mean, 6),
-        "median": round(stats.median(data), 6),
-        "max": round(max(data), 6),
-        "min": round(min(data), 6),
-        "stddev": round(stddev, 6),
-        "cv": round(stddev / mean, 6) if mean != 0 else 0.0
-    }
+OPERATIONS = ("keygen", "encap", "decap")
+
+def generate_rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+def oaep_padding():
+    return padding.OAEP(
+        mgf=padding.MGF1(algorithm=hashes.SHA256()),
+        algorithm=hashes.SHA256(),
+        label=None
+    )
+
+# Padding objects are immutable, so every call shares one instead of
+# rebuilding it inside the timed region
+OAEP = oaep_padding()
 
 def warmup():
     for _ in range(5):
         private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
         public_key = private_key.public_key()
         secret = os.urandom(32)
-        ciphertext = public_key.encrypt(
-            secret,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
-        )
-        recovered = private_key.decrypt(
-            ciphertext,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
-        )
+        ciphertext = public_key.encrypt(secret, OAEP)
+        recovered = private_key.decrypt(ciphertext, OAEP)
         assert recovered == secret
 
-def benchmark_rsa_oaep(iterations=100):
-    generation_times = []
-    encapsulate_times = []
-    decapsulate_times = []
-    failures = 0
+def benchmark_rsa_oaep(iterations=100, adaptive=False, target_precision=0.01, max_iterations=1_000_000,
+                       time_budget_s=300.0, stream=None, instrument=None, pool_size=64, keygen_workers=1,
+                       stable=False):
+    algorithm = "RSA-OAEP_2048-bit"
+    category = "legacy_kem"
+
+    sampler = timing_stats.AdaptiveSampler(target_precision, max_iterations, time_budget_s) if adaptive else None
+    # instrument names the extra per-operation collectors, e.g. ("thread_time", "perf")
+    probe = instrumentation.probe(instrument)
+    store = raw_stream.open_store(OPERATIONS, iterations, algorithm, category, sampler, stream, probe.metrics)
+    probe.bind(store)
+    timings = store.timings
 
     warmup()
 
-    for _ in range(iterations):
-        # Generate new keypair
-        start_time = time.perf_counter_ns()
-        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
-        public_key = private_key.public_key()
-        generation_times.append((time.perf_counter_ns() - start_time) / 1_000_000)
+    # Collectors only see this process, so instrumented runs keep keygen here
+    keys = key_pool.KeyPool(generate_rsa_key, 1 if probe.metrics or stable else keygen_workers)
+    with keys, store, probe, timing_stats.GCPause(stable) as pause:
+        # Each round fills up to pool_size slots one operation at a time: a pool
+        # of keypairs, then encrypts to every key, then decrypts
+        while store.room():
+            pause.settle()  # collect between rounds, never inside a timed loop
+            i = store.slot
+            n = store.block(pool_size)
 
-        public_key_bytes = public_key.public_bytes(
-            encoding=serialization.Encoding.DER,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        )
-        key_size = len(public_key_bytes)
+            # Generate new keypairs
+            private_keys = keys.fill(timings["keygen"], probe, i, n)
+            public_keys = [private_key.public_key() for private_key in private_keys]
+            secrets = [os.urandom(32) for _ in range(n)]
 
-        secret = os.urandom(32)
+            # Encapsulation (encrypt)
+            ciphertexts = []
+            for j, (public_key, secret) in enumerate(zip(public_keys, secrets), i):
+                mark = probe.start()
+                start_time = time.perf_counter_ns()
+                ciphertext = public_key.encrypt(secret, OAEP)
+                timings["encap"][j] = (time.perf_counter_ns() - start_time) / 1_000_000
+                probe.stop(mark, "encap", j)
+                ciphertexts.append(ciphertext)
 
-        # Encapsulation (encrypt)
-        start_time = time.perf_counter_ns()
-        ciphertext = public_key.encrypt(
-            secret,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
-        )
-        encapsulate_times.append((time.perf_counter_ns() - start_time) / 1_000_000)
-
-        # Decapsulation (decrypt)
-        start_time = time.perf_counter_ns()
-        secret_dec = private_key.decrypt(
-            ciphertext,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
-        )
-        decapsulate_times.append((time.perf_counter_ns() - start_time) / 1_000_000)
-        if secret_dec != secret:
-            failures += 1
+            # Decapsulation (decrypt)
+            for j, (private_key, ciphertext, secret) in enumerate(zip(private_keys, ciphertexts, secrets), i):
+                mark = probe.start()
+                start_time = time.perf_counter_ns()
+                secret_dec = private_key.decrypt(ciphertext, OAEP)
+                timings["decap"][j] = (time.perf_counter_ns() - start_time) / 1_000_000
+                probe.stop(mark, "decap", j)
+                if secret_dec != secret:
+                    store.fail()
 
-    algorithm = "RSA-OAEP_2048-bit"
-    category = "legacy_kem"
+            store.commit(n)
+
+    key_size = len(public_keys[0].public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ))
+    secret_key_size = key_pool.private_key_size(private_keys[0])
+
+    count = store.count
 
     benchmark_results = {
         "algorithm": algorithm,
         "category": category,
-        "iterations": iterations,
+        "iterations": count,
         "key_size": key_size,
-        "keygen_ms": compute_stats(generation_times),
-        "encap_ms": compute_stats(encapsulate_times),
-        "decap_ms": compute_stats(decapsulate_times),
-        "correctness_rate": round((iterations - failures) / iterations, 6),
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        "public_key_size": key_size,
+        "secret_key_size": secret_key_size,
+        "ciphertext_size": len(ciphertexts[0]),
+        "shared_secret_size": len(secrets[0]),
+        "keygen_ms": store.summary("keygen"),
+        "encap_ms": store.summary("encap"),
+        "decap_ms": store.summary("decap"),
+        "correctness_rate": round((count - store.failures) / count, 6),
+        "timestamp": store.timestamp or time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
     }
+    if sampler is not None:
+        benchmark_results["adaptive"] = sampler.report()
+    if probe.metrics:
+        benchmark_results["metrics"] = store.metric_summary()
+    if keys.workers > 1:
+        # keygen_ms was timed in concurrent worker processes, not in this loop
+        benchmark_results["keygen_workers"] = keys.workers
+
+    raw_timings = store.raw_timings()
+
+    return benchmark_results, raw_timings
+
+
+def benchmark_rsa_oaep_throughput(batch_size=100, batches=10, pool_size=16):
+    # Times tight batches of each operation on precomputed keys, secrets and
+    # ciphertexts
+    warmup()
+
+    per_op = {"keygen_batch": timing_stats.time_batches(
+        lambda: generate_rsa_key().public_key(),
+        [()], batch_size, batches
+    )}
 
-    raw_timings = {
-        "keygen": generation_times,
-        "encap": encapsulate_times,
-        "decap": decapsulate_times
+    private_keys = [generate_rsa_key() for _ in range(pool_size)]
+    encrypt_inputs = [(key.public_key(), os.urandom(32)) for key in private_keys]
+    decrypt_inputs = []
+    for key, (public_key, secret) in zip(private_keys, encrypt_inputs):
+        ciphertext = public_key.encrypt(secret, OAEP)
+        assert key.decrypt(ciphertext, OAEP) == secret
+        decrypt_inputs.append((key, ciphertext))
+
+    per_op["encap_batch"] = timing_stats.time_batches(
+        lambda public_key, secret: public_key.encrypt(secret, OAEP), encrypt_inputs, batch_size, batches
+    )
+    per_op["decap_batch"] = timing_stats.time_batches(
+        lambda key, ciphertext: key.decrypt(ciphertext, OAEP), decrypt_inputs, batch_size, batches
+    )
+
+    key_size = len(private_keys[0].public_key().public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ))
+
+    benchmark_results = {
+        "algorithm": "RSA-OAEP_2048-bit",
+        "category": "legacy_kem",
+        "mode": "throughput",
+        "iterations": batch_size * batches,
+        "batch_size": batch_size,
+        "batches": batches,
+        "key_size": key_size,
+        "public_key_size": key_size,
+        "secret_key_size": key_pool.private_key_size(private_keys[0]),
+        "ciphertext_size": len(decrypt_inputs[0][1]),
+        "shared_secret_size": len(encrypt_inputs[0][1]),
+        **{f"{op}_ms": timing_stats.compute_stats(data) for op, data in per_op.items()},
+        "throughput": {op: timing_stats.throughput_stats(data) for op, data in per_op.items()},
+        "correctness_rate": 1.0,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
     }
 
-    return benchmark_results, raw_timings
\ No newline at end of file
+    return benchmark_results, per_op
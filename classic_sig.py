@@ -1,19 +1,12 @@
 import time
-import statistics as stats
+import timing_stats
+import raw_stream
+import instrumentation
+import key_pool
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding, ec, ed25519
 
-def compute_stats(data):
-    mean = stats.mean(data)
-    stddev = stats.stdev(data)
-    return {
-        "mean": round(mean, 6),
-        "median": round(stats.median(data), 6),
-        "max": round(max(data), 6),
-        "min": round(min(data), 6),
-        "stddev": round(stddev, 6),
-        "cv": round(stddev / mean, 6) if mean != 0 else 0.0
-    }
+OPERATIONS = ("keygen", "sign", "verify")
 
 def warmup(message, keygen, sign, verify):
     for _ in range(5):
@@ -22,57 +15,192 @@ def warmup(message, keygen, sign, verify):
         signature = sign(private_key, message)
         assert verify(public_key, message, signature)
 
-def benchmark(category, algorithm, keygen, sign, verify, iterations=100, message_length=1024):
-    generation_times = []
-    sign_times = []
-    verify_times = []
-    failures = 0
+def benchmark(category, algorithm, keygen, sign, verify, iterations=100, message_length=1024,
+              adaptive=False, target_precision=0.01, max_iterations=1_000_000,
+              time_budget_s=300.0, stream=None, instrument=None, pool_size=64, keygen_workers=1,
+              stable=False):
+    sampler = timing_stats.AdaptiveSampler(target_precision, max_iterations, time_budget_s) if adaptive else None
+    # instrument names the extra per-operation collectors, e.g. ("thread_time", "perf")
+    probe = instrumentation.probe(instrument)
+    store = raw_stream.open_store(OPERATIONS, iterations, algorithm, category, sampler, stream, probe.metrics)
+    probe.bind(store)
+    timings = store.timings
     message = b'\xFF' * message_length
 
     warmup(message, keygen, sign, verify)
 
-    for _ in range(iterations):
-        start = time.perf_counter_ns()
-        private_key = keygen()
-        public_key = private_key.public_key()
-        generation_times.append((time.perf_counter_ns() - start) / 1_000_000)
+    # Collectors only see this process, so instrumented runs keep keygen here
+    keys = key_pool.KeyPool(keygen, 1 if probe.metrics or stable else keygen_workers)
+    with keys, store, probe, timing_stats.GCPause(stable) as pause:
+        # Each round fills up to pool_size slots one operation at a time: a pool
+        # of keypairs, then a signature with every key, then verifies
+        while store.room():
+            pause.settle()  # collect between rounds, never inside a timed loop
+            i = store.slot
+            n = store.block(pool_size)
+
+            private_keys = keys.fill(timings["keygen"], probe, i, n)
+            public_keys = [private_key.public_key() for private_key in private_keys]
+
+            signatures = []
+            for j, private_key in enumerate(private_keys, i):
+                mark = probe.start()
+                start = time.perf_counter_ns()
+                signature = sign(private_key, message)
+                timings["sign"][j] = (time.perf_counter_ns() - start) / 1_000_000
+                probe.stop(mark, "sign", j)
+                signatures.append(signature)
+
+            for j, (public_key, signature) in enumerate(zip(public_keys, signatures), i):
+                mark = probe.start()
+                start = time.perf_counter_ns()
+                try:
+                    valid = verify(public_key, message, signature)
+                except Exception:
+                    valid = False
+                timings["verify"][j] = (time.perf_counter_ns() - start) / 1_000_000
+                probe.stop(mark, "verify", j)
+
+                if not valid:
+                    store.fail()
+
+            store.commit(n)
+
+    key_size = len(public_keys[0].public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ))
+    secret_key_size = key_pool.private_key_size(private_keys[0])
+
+    count = store.count
+
+    benchmark_results = {
+        "algorithm": algorithm,
+        "category": category,
+        "iterations": count,
+        "key_size": key_size,
+        "public_key_size": key_size,
+        "secret_key_size": secret_key_size,
+        "signature_size": len(signatures[0]),
+        "keygen_ms": store.summary("keygen"),
+        "sign_ms": store.summary("sign"),
+        "verify_ms": store.summary("verify"),
+        "correctness_rate": round((count - store.failures) / count, 6),
+        "timestamp": store.timestamp or time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    }
+    if sampler is not None:
+        benchmark_results["adaptive"] = sampler.report()
+    if probe.metrics:
+        benchmark_results["metrics"] = store.metric_summary()
+    if keys.workers > 1:
+        # keygen_ms was timed in concurrent worker processes, not in this loop
+        benchmark_results["keygen_workers"] = keys.workers
+
+    raw_timings = store.raw_timings()
+
+    return benchmark_results, raw_timings
+
 
-        public_key_bytes = public_key.public_bytes(
-            encoding=serialization.Encoding.DER,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        )
-        key_size = len(public_key_bytes)
+def benchmark_throughput(category, algorithm, keygen, sign, verify, batch_size=1000, batches=20,
+                         pool_size=64, message_length=1024):
+    # Times tight batches of each operation on precomputed keys and signatures,
+    # so per-call timer overhead is amortized over batch_size operations
+    message = b'\xFF' * message_length
+
+    warmup(message, keygen, sign, verify)
 
-        start = time.perf_counter_ns()
+    per_op = {"keygen_batch": timing_stats.time_batches(
+        lambda: keygen().public_key(), [()], batch_size, batches
+    )}
+
+    private_keys = [keygen() for _ in range(pool_size)]
+    signed = []
+    for private_key in private_keys:
+        public_key = private_key.public_key()
         signature = sign(private_key, message)
-        sign_times.append((time.perf_counter_ns() - start) / 1_000_000)
+        assert verify(public_key, message, signature)
+        signed.append((public_key, message, signature))
 
-        start = time.perf_counter_ns()
-        try:
-            valid = verify(public_key, message, signature)
-        except Exception:
-            valid = False
-        verify_times.append((time.perf_counter_ns() - start) / 1_000_000)
+    per_op["sign_batch"] = timing_stats.time_batches(
+        sign, [(key, message) for key in private_keys], batch_size, batches
+    )
+    per_op["verify_batch"] = timing_stats.time_batches(verify, signed, batch_size, batches)
 
-        if not valid:
-            failures += 1
+    key_size = len(public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ))
 
     benchmark_results = {
         "algorithm": algorithm,
         "category": category,
-        "iterations": iterations,
+        "mode": "throughput",
+        "iterations": batch_size * batches,
+        "batch_size": batch_size,
+        "batches": batches,
         "key_size": key_size,
-        "keygen_ms": compute_stats(generation_times),
-        "sign_ms": compute_stats(sign_times),
-        "verify_ms": compute_stats(verify_times),
-        "correctness_rate": round((iterations - failures) / iterations, 6),
+        "public_key_size": key_size,
+        "secret_key_size": key_pool.private_key_size(private_keys[0]),
+        "signature_size": len(signature),
+        **{f"{op}_ms": timing_stats.compute_stats(data) for op, data in per_op.items()},
+        "throughput": {op: timing_stats.throughput_stats(data) for op, data in per_op.items()},
+        "correctness_rate": 1.0,
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
     }
 
-    raw_timings = {
-        "keygen": generation_times,
-        "sign": sign_times,
-        "verify": verify_times
-    }
+    return benchmark_results, per_op
 
-    return benchmark_results, raw_timings
+
+def _safe_verify(verify_func, *args, **kwargs):
+    try:
+        verify_func(*args, **kwargs)
+        return True
+    except Exception:
+        return False
+
+def pss_padding():
+    return padding.PSS(
+        mgf=padding.MGF1(hashes.SHA256()),
+        salt_length=padding.PSS.MAX_LENGTH
+    )
+
+# Padding, hash and signature-algorithm objects are immutable, so the timed
+# calls share one of each instead of rebuilding them on every call
+PSS = pss_padding()
+SHA256 = hashes.SHA256()
+ECDSA_SHA256 = ec.ECDSA(hashes.SHA256())
+
+def _rsa_keygen():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+def _ecdsa_keygen():
+    return ec.generate_private_key(ec.SECP256R1())
+
+# Classical signature baselines as (keygen, sign, verify), looked up by name so
+# they can be run from worker processes; keygens are module-level functions so
+# a KeyPool can pickle them
+BASELINES = {
+    "RSA-2048": (
+        _rsa_keygen,
+        lambda priv, msg: priv.sign(msg, PSS, SHA256),
+        lambda pub, msg, sig: _safe_verify(pub.verify, sig, msg, PSS, SHA256)
+    ),
+    "ECDSA-P256": (
+        _ecdsa_keygen,
+        lambda priv, msg: priv.sign(msg, ECDSA_SHA256),
+        lambda pub, msg, sig: _safe_verify(pub.verify, sig, msg, ECDSA_SHA256)
+    ),
+    "Ed25519": (
+        ed25519.Ed25519PrivateKey.generate,
+        lambda priv, msg: priv.sign(msg),
+        lambda pub, msg, sig: _safe_verify(pub.verify, sig, msg)
+    )
+}
+
+def benchmark_baseline(algorithm, iterations=100, message_length=1024, **options):
+    keygen, sign, verify = BASELINES[algorithm]
+    return benchmark("legacy_sig", algorithm, keygen, sign, verify, iterations, message_length, **options)
+
+def benchmark_baseline_throughput(algorithm, **options):
+    keygen, sign, verify = BASELINES[algorithm]
+    return benchmark_throughput("legacy_sig", algorithm, keygen, sign, verify, **options)
@@ -0,0 +1,175 @@
+import argparse
+import fnmatch
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+
+# Everything heavier than the standard library is imported inside the
+# subcommand that needs it, so e.g. `compare` never loads liboqs and no
+# subcommand touches the database unless asked to
+
+MODES = ("latency", "throughput", "memory", "context", "bulk")
+
+
+def _enabled(plan_path, verbose=False):
+    import oqs
+    import benchmark_plan
+    import validate
+
+    plan = benchmark_plan.load_plan(plan_path)
+    return plan, validate.algorithms(oqs, plan, verbose)
+
+def select_jobs(plan, enabled, families=None, patterns=None, mode="latency"):
+    """Jobs of the chosen families whose algorithm matches any glob pattern."""
+    import benchmark_plan
+
+    enabled = {
+        family: [name for name in names if not patterns or any(fnmatch.fnmatchcase(name, p) for p in patterns)]
+        for family, names in enabled.items() if not families or family in families
+    }
+    jobs = [job for job in benchmark_plan.build_jobs(plan, enabled) if benchmark_plan.supports(job, mode)]
+    return benchmark_plan.schedule(jobs)
+
+
+def list_jobs(args):
+    import benchmark_plan
+
+    plan, enabled = _enabled(args.plan)
+    for section, family, spec in benchmark_plan.families(plan):
+        if args.family and family not in args.family:
+            continue
+        modes = ", ".join(benchmark_plan.ADAPTERS[spec["adapter"]]["runners"])
+        print(f"{family} ({section}, {spec['adapter']}: {modes})")
+        for name in enabled.get(family, []):
+            if not args.algorithm or any(fnmatch.fnmatchcase(name, p) for p in args.algorithm):
+                print(f"    {name}")
+    return 0
+
+def run_jobs(args):
+    import contextlib
+    import benchmark_plan
+    import live_metrics
+    import parallel_runner
+    import reporting
+    import run_journal
+    import series_analysis
+
+    options = {}
+    if args.iterations is not None:
+        if args.mode not in benchmark_plan.REPEAT_OPTIONS:
+            print(f"--iterations does not apply to {args.mode} mode")
+            return 2
+        options[benchmark_plan.REPEAT_OPTIONS[args.mode]] = args.iterations
+
+    plan, enabled = _enabled(args.plan)
+    jobs = select_jobs(plan, enabled, args.family, args.algorithm, args.mode)
+    if not jobs:
+        print("No enabled algorithm matches the filters")
+        return 1
+
+    journal = run_journal.RunJournal(args.label, {"options": options, "mode": args.mode, "stable": None})
+    jobs, completed = journal.start(jobs, args.resume)
+    writer = None
+    if args.db:
+        import mysql_export
+        writer = mysql_export.BatchWriter()
+    monitor = contextlib.nullcontext()
+    if args.metrics_port is not None or args.metrics_textfile:
+        monitor = live_metrics.MetricsExporter(args.metrics_port, args.metrics_textfile, system_label=args.label)
+
+    failures = 0
+    exported = []
+    try:
+        for job, results, raw_timings, reported in completed:
+            if not reported:
+                exported.append((job, reporting.report_journaled(journal, job, results, raw_timings, args.label, writer, args.columnar)))
+        with monitor:
+            live_metrics.begin_run(jobs)
+            for job, results, raw_timings, error in parallel_runner.run_jobs(jobs, args.workers, False, options, args.mode):
+                live_metrics.finish_job(job, error is not None)
+                if error is not None:
+                    print(f"An error occurred while benchmarking {benchmark_plan.describe(job)}: {error}")
+                    failures += 1
+                    continue
+                if raw_timings:
+                    results["analysis"] = series_analysis.analyze_run(raw_timings)
+                journal.record(job, results, raw_timings)
+                exported.append((job, reporting.report_journaled(journal, job, results, raw_timings, args.label, writer, args.columnar)))
+    finally:
+        if writer is not None:
+            writer.close()
+    failures += len(reporting.failed_exports(exported))
+    return 1 if failures else 0
+
+def export_runs(args):
+    # Loads results written by earlier runs (<algorithm>_<timestamp>_results.json
+    # and the matching _raw.csv) into MySQL, e.g. after a run on a box without a database
+    import json
+    import mysql_export
+    import regression
+
+    source = Path(args.source)
+    label = args.label or source.name
+    count = 0
+    with mysql_export.BatchWriter() as writer:
+        for path in sorted(source.glob("*_results.json")):
+            with open(path, "r") as f:
+                results = json.load(f)
+            raw_file = path.with_name(path.name[:-len("_results.json")] + "_raw.csv")
+            raw_timings = regression.read_raw_csv(raw_file) if raw_file.exists() else {}
+            writer.submit_summary(results, label)
+            writer.submit_raw_data(results, raw_timings, label)
+            count += 1
+    print(f"Exported {count} runs from {source} as {label}")
+    return 1 if writer.errors else 0
+
+def compare_runs(args):
+    import regression
+
+    return regression.main(args.arguments)
+
+
+def main(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Post-quantum cryptography benchmark suite")
+    parser.add_argument("--plan", default=os.getenv("BENCH_PLAN", "algorithms.json"))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def filters(command):
+        command.add_argument("--family", action="append", default=None, help="plan family, e.g. ml-kem")
+        command.add_argument("--algorithm", action="append", default=None, help="algorithm name or glob, e.g. 'ML-KEM-*'")
+
+    listing = commands.add_parser("list", help="list enabled algorithms per family")
+    filters(listing)
+    listing.set_defaults(handler=list_jobs)
+
+    run = commands.add_parser("run", help="benchmark the selected algorithms")
+    filters(run)
+    run.add_argument("--mode", choices=MODES, default="latency")
+    run.add_argument("--iterations", type=int, default=None, help="iterations (batches in throughput mode, messages in bulk mode; not for memory mode)")
+    run.add_argument("--workers", type=int, default=1)
+    run.add_argument("--label", default=os.getenv("SYSTEM_LABEL", "default"))
+    run.add_argument("--db", action="store_true", help="also write the results to MySQL")
+    run.add_argument("--columnar", action="store_true")
+    run.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus metrics on 127.0.0.1:<port>/metrics")
+    run.add_argument("--metrics-textfile", default=None, help="also write them to this .prom file every 15 s")
+    run.add_argument("--resume", action="store_true", help="skip jobs an interrupted run with the same settings completed")
+    run.set_defaults(handler=run_jobs)
+
+    export = commands.add_parser("export", help="load exported runs into MySQL")
+    export.add_argument("source", help="exports/<label> directory")
+    export.add_argument("--label", default=None, help="system label in the database (default: directory name)")
+    export.set_defaults(handler=export_runs)
+
+    compare = commands.add_parser("compare", help="regression check between two sets of runs (see regression.py -h)")
+    compare.add_argument("arguments", nargs=argparse.REMAINDER)
+    compare.set_defaults(handler=compare_runs)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
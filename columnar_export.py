@@ -0,0 +1,155 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+import raw_stream
+
+
+FORMAT = "pqc-benchmark-columnar/1"
+MANIFEST = "manifest.json"
+
+
+def run_dir(label, algorithm, timestamp):
+    path = raw_stream.export_path(label, algorithm, timestamp, "columnar", suffix="")
+    path.mkdir(exist_ok=True)
+    return path
+
+def _read_manifest(path):
+    try:
+        with open(path / MANIFEST, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+def _write_manifest(path, manifest):
+    # Write then rename so readers never see a half-written manifest
+    tmp = path / (MANIFEST + ".tmp")
+    with open(tmp, "w") as file:
+        json.dump(manifest, file, indent=4)
+    os.replace(tmp, path / MANIFEST)
+
+def _new_manifest(algorithm, category, timestamp, label):
+    return {
+        "format": FORMAT,
+        "algorithm": algorithm,
+        "category": category,
+        "timestamp": timestamp,
+        "system_label": label,
+        "operations": {},
+        "results": None
+    }
+
+def export_columnar(results, raw_timings, label="default"):
+    """Write raw timings as one float64 .npy column per operation plus a manifest.
+
+    Streamed runs have already written their columns through NpySink; for
+    those raw_timings is empty and only the summary is added to the manifest.
+    """
+    algorithm = results["algorithm"]
+    path = run_dir(label, algorithm, results["timestamp"])
+    manifest = _read_manifest(path) or _new_manifest(
+        algorithm, results["category"], results["timestamp"], label
+    )
+
+    for operation, timings in raw_timings.items():
+        column = np.ascontiguousarray(timings, dtype=np.float64)
+        np.save(path / f"{operation}.npy", column)
+        manifest["operations"][operation] = {
+            "file": f"{operation}.npy",
+            "dtype": "float64",
+            "count": int(column.size)
+        }
+
+    manifest["results"] = results
+    _write_manifest(path, manifest)
+    return path
+
+
+class NpySink:
+    """raw_stream sink that fills memory-mapped .npy columns chunk by chunk."""
+
+    def __init__(self, operations, iterations, algorithm, category, timestamp, label):
+        self.path = run_dir(label, algorithm, timestamp)
+        self.manifest = _new_manifest(algorithm, category, timestamp, label)
+        self.columns = {
+            op: np.lib.format.open_memmap(self.path / f"{op}.npy", mode="w+",
+                                          dtype=np.float64, shape=(iterations,))
+            for op in operations
+        }
+        self.counts = dict.fromkeys(operations, 0)
+
+    def write(self, operation, first_iteration, chunk, correct):
+        start = first_iteration - 1
+        self.columns[operation][start:start + chunk.size] = chunk
+        self.counts[operation] = start + chunk.size
+
+    def close(self):
+        for op, column in self.columns.items():
+            column.flush()
+            # count marks how much of a preallocated column holds real samples
+            self.manifest["operations"][op] = {
+                "file": f"{op}.npy",
+                "dtype": "float64",
+                "count": self.counts[op]
+            }
+        self.columns = {}
+        _write_manifest(self.path, self.manifest)
+
+
+class Run:
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        self.algorithm = manifest["algorithm"]
+        self.category = manifest["category"]
+        self.timestamp = manifest["timestamp"]
+        self.system_label = manifest["system_label"]
+        self.results = manifest.get("results")
+
+    @property
+    def operations(self):
+        return list(self.manifest["operations"])
+
+    def timings(self, operation):
+        # Memory-mapped, read-only view; nothing is copied until it is used
+        column = self.manifest["operations"][operation]
+        data = np.load(self.path / column["file"], mmap_mode="r")
+        return data[:column["count"]]
+
+
+class Dataset:
+    def __init__(self, runs):
+        self.runs = runs
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __iter__(self):
+        return iter(self.runs)
+
+    def select(self, algorithm=None, category=None, system_label=None):
+        return Dataset([
+            run for run in self.runs
+            if (algorithm is None or run.algorithm == algorithm)
+            and (category is None or run.category == category)
+            and (system_label is None or run.system_label == system_label)
+        ])
+
+    def timings(self, operation):
+        # Concatenate one operation across every run in the dataset
+        columns = [run.timings(operation) for run in self.runs if operation in run.manifest["operations"]]
+        if not columns:
+            return np.empty(0, dtype=np.float64)
+        return np.concatenate(columns)
+
+
+def load_dataset(root="exports"):
+    """Open every columnar run under root (e.g. exports/<label>) as one Dataset."""
+    runs = []
+    for manifest_path in sorted(Path(root).rglob(MANIFEST)):
+        manifest = _read_manifest(manifest_path.parent)
+        if manifest is not None and manifest.get("format") == FORMAT:
+            runs.append(Run(manifest_path.parent, manifest))
+    return Dataset(runs)
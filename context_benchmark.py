@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import time
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import classic_kem
+import classic_sig
+import context_pool
+import key_pool
+import raw_stream
+import scaling_benchmark
+import timing_stats
+
+
+# Signature parameters of the classical baselines: shared instances, and a
+# builder for the per-call variant that constructs them inside every call
+SIG_PARAMS = {
+    "RSA-2048": ((classic_sig.PSS, classic_sig.SHA256), lambda: (classic_sig.pss_padding(), hashes.SHA256())),
+    "ECDSA-P256": ((classic_sig.ECDSA_SHA256,), lambda: (ec.ECDSA(hashes.SHA256()),)),
+    "Ed25519": ((), lambda: ())
+}
+
+
+def time_calls(op, iterations, prepare=None, cleanup=None, warmup=5):
+    """Time each of `iterations` calls of op(arg) in milliseconds.
+
+    arg comes from prepare() and cleanup(result) runs afterwards, both
+    outside the timed region, so e.g. teardown can be timed on its own.
+    """
+    timings = timing_stats.empty(iterations)
+    for i in range(-warmup, iterations):
+        arg = prepare() if prepare is not None else None
+        start_time = time.perf_counter_ns()
+        result = op(arg)
+        elapsed_ms = (time.perf_counter_ns() - start_time) / 1_000_000
+        if cleanup is not None:
+            cleanup(result)
+        if i >= 0:
+            timings[i] = elapsed_ms
+    return timings
+
+def _free(context):
+    context.free()
+
+def _oqs_operations(kind, algorithm, message):
+    # (measurements, cleanups to run afterwards, sizes)
+    context_class = context_pool.CONTEXTS[kind]
+    pool = context_pool.ContextPool()
+    pool.release(kind, algorithm, context_class(algorithm))
+    reused = context_class(algorithm)
+    public_key = reused.generate_keypair()
+    secret_key = reused.export_secret_key()
+
+    def per_call(secret, call):
+        with context_class(algorithm, secret) as context:
+            return call(context)
+
+    measurements = {
+        "construct": (lambda _: context_class(algorithm), None, _free),
+        "teardown": (lambda context: context.free(), lambda: context_class(algorithm), None),
+        "import_secret_key": (lambda _: context_class(algorithm, secret_key), None, _free),
+        "pool_lease": (lambda _: pool.release(kind, algorithm, pool.acquire(kind, algorithm)), None, None)
+    }
+    if kind == "kem":
+        ciphertext, _ = reused.encap_secret(public_key)
+        measurements.update({
+            "encap_reused": (lambda _: reused.encap_secret(public_key), None, None),
+            "encap_per_call": (lambda _: per_call(None, lambda c: c.encap_secret(public_key)), None, None),
+            "decap_reused": (lambda _: reused.decap_secret(ciphertext), None, None),
+            "decap_per_call": (lambda _: per_call(secret_key, lambda c: c.decap_secret(ciphertext)), None, None)
+        })
+    else:
+        signature = reused.sign(message)
+        measurements.update({
+            "sign_reused": (lambda _: reused.sign(message), None, None),
+            "sign_per_call": (lambda _: per_call(secret_key, lambda c: c.sign(message)), None, None),
+            "verify_reused": (lambda _: reused.verify(message, signature, public_key), None, None),
+            "verify_per_call": (lambda _: per_call(None, lambda c: c.verify(message, signature, public_key)), None, None)
+        })
+    sizes = {"public_key_size": len(public_key), "secret_key_size": len(secret_key)}
+    return measurements, [reused.free, pool.clear], sizes
+
+def _classic_operations(kind, algorithm, message):
+    if kind == "classic_kem":
+        private_key = classic_kem.generate_rsa_key()
+        public_key = private_key.public_key()
+        der = key_pool.private_der(private_key)
+        secret = os.urandom(32)
+        ciphertext = public_key.encrypt(secret, classic_kem.OAEP)
+        measurements = {
+            "construct": (lambda _: classic_kem.oaep_padding(), None, None),
+            "import_secret_key": (lambda _: serialization.load_der_private_key(der, password=None), None, None),
+            "encap_reused": (lambda _: public_key.encrypt(secret, classic_kem.OAEP), None, None),
+            "encap_per_call": (lambda _: public_key.encrypt(secret, classic_kem.oaep_padding()), None, None),
+            "decap_reused": (lambda _: private_key.decrypt(ciphertext, classic_kem.OAEP), None, None),
+            "decap_per_call": (lambda _: private_key.decrypt(ciphertext, classic_kem.oaep_padding()), None, None)
+        }
+        return measurements, [], {"secret_key_size": len(der)}
+
+    shared, build = SIG_PARAMS[algorithm]
+    private_key = classic_sig.BASELINES[algorithm][0]()
+    public_key = private_key.public_key()
+    der = key_pool.private_der(private_key)
+    signature = private_key.sign(message, *shared)
+    measurements = {
+        "construct": (lambda _: build(), None, None),
+        "import_secret_key": (lambda _: serialization.load_der_private_key(der, password=None), None, None),
+        "sign_reused": (lambda _: private_key.sign(message, *shared), None, None),
+        "sign_per_call": (lambda _: private_key.sign(message, *build()), None, None),
+        "verify_reused": (lambda _: public_key.verify(signature, message, *shared), None, None),
+        "verify_per_call": (lambda _: public_key.verify(signature, message, *build()), None, None)
+    }
+    return measurements, [], {"secret_key_size": len(der)}
+
+def benchmark_context(kind, category, algorithm, iterations=200, message_length=1024):
+    """Cost of building, tearing down and keying contexts, and of per-call construction.
+
+    Each hot operation runs on a reused context ("<op>_reused") and with a
+    context (or padding object) built and dropped inside every call
+    ("<op>_per_call"); the difference of their medians is the setup cost a
+    per-session design pays on every call.
+    """
+    message = b'\xFF' * message_length
+    if kind in context_pool.CONTEXTS:
+        measurements, cleanups, sizes = _oqs_operations(kind, algorithm, message)
+    else:
+        measurements, cleanups, sizes = _classic_operations(kind, algorithm, message)
+
+    try:
+        raw_timings = {
+            name: time_calls(op, iterations, prepare, cleanup)
+            for name, (op, prepare, cleanup) in measurements.items()
+        }
+    finally:
+        for cleanup in cleanups:
+            cleanup()
+
+    results = {
+        "algorithm": algorithm,
+        "category": category,
+        "mode": "context",
+        "iterations": iterations,
+        **sizes,
+        **{f"{name}_ms": timing_stats.compute_stats(data) for name, data in raw_timings.items()},
+        "overhead": {},
+        "correctness_rate": 1.0,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    }
+    for name in raw_timings:
+        if name.endswith("_reused"):
+            op = name[:-len("_reused")]
+            reused = results[f"{op}_reused_ms"]["median"]
+            per_call = results[f"{op}_per_call_ms"]["median"]
+            results["overhead"][op] = {
+                "reused_median_ms": reused,
+                "per_call_median_ms": per_call,
+                "setup_ms": round(per_call - reused, 6),
+                "setup_share": round((per_call - reused) / per_call, 6) if per_call > 0 else 0.0
+            }
+    return results, raw_timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Context construction, teardown, key import and reuse costs")
+    parser.add_argument("algorithms", nargs="+")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--message-length", type=int, default=1024)
+    args = parser.parse_args()
+
+    label = os.getenv("SYSTEM_LABEL", "default")
+    for algorithm in args.algorithms:
+        kind = scaling_benchmark.job_kind(algorithm)
+        print(f"\nContext costs: {algorithm}")
+        results, _ = benchmark_context(kind, kind, algorithm, args.iterations, args.message_length)
+        print(json.dumps(results, indent=4))
+        path = raw_stream.export_path(label, algorithm, results["timestamp"], "context", ".json")
+        with open(path, "w") as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
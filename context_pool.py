@@ -0,0 +1,111 @@
+import ctypes
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import oqs
+
+
+CONTEXTS = {
+    "kem": oqs.KeyEncapsulation,
+    "sig": oqs.Signature
+}
+
+
+def _drop_secret_key(context):
+    # oqs contexts keep the last generated or imported secret key in a ctypes
+    # buffer until free(); zero it and drop it, as free() would
+    secret_key = getattr(context, "secret_key", None)
+    if secret_key is not None:
+        ctypes.memset(secret_key, 0, ctypes.sizeof(secret_key))
+        del context.secret_key
+
+
+class ContextPool:
+    """Preinitialised oqs contexts shared by benchmark runners and load tests.
+
+    Idle contexts are kept per (kind, algorithm), at most per_algorithm of
+    each and capacity in total; when the pool is full the least recently
+    used algorithm gives up its idle contexts first. acquire() hands out an
+    idle context or builds one, release() takes it back after wiping and
+    dropping any secret key it holds, so pooled contexts are keyless: use
+    them for keygen, encap and verify, or generate a keypair before decap
+    or sign. The pool is thread-safe; a leased context is not.
+    """
+
+    def __init__(self, capacity=16, per_algorithm=4):
+        self.capacity = capacity
+        self.per_algorithm = per_algorithm
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._idle = OrderedDict()  # (kind, algorithm) -> [context], most recent last
+        self._lock = threading.Lock()
+
+    def acquire(self, kind, algorithm):
+        key = (kind, algorithm)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.hits += 1
+                self._idle.move_to_end(key)
+                return idle.pop()
+            self.misses += 1
+        return CONTEXTS[kind](algorithm)
+
+    def release(self, kind, algorithm, context):
+        key = (kind, algorithm)
+        _drop_secret_key(context)
+        evicted = []
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) >= self.per_algorithm:
+                evicted.append(context)
+            else:
+                idle.append(context)
+            while sum(len(contexts) for contexts in self._idle.values()) > self.capacity:
+                oldest = next(iter(self._idle))
+                evicted.append(self._idle[oldest].pop(0))
+                if not self._idle[oldest]:
+                    del self._idle[oldest]
+            self.evictions += len(evicted)
+        for stale in evicted:
+            stale.free()
+
+    @contextmanager
+    def lease(self, kind, algorithm):
+        context = self.acquire(kind, algorithm)
+        try:
+            yield context
+        finally:
+            self.release(kind, algorithm, context)
+
+    def clear(self):
+        with self._lock:
+            contexts = [context for idle in self._idle.values() for context in idle]
+            self._idle.clear()
+        for context in contexts:
+            context.free()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "idle": {f"{kind}:{algorithm}": len(idle) for (kind, algorithm), idle in self._idle.items()}
+            }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool():
+    # One pool per process; forked workers start with a copy of the parent's
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ContextPool()
+    return _shared
@@ -0,0 +1,239 @@
+import argparse
+import csv
+import json
+import math
+import os
+import time
+
+import oqs
+from cryptography.hazmat.primitives import hashes, hmac, serialization
+from cryptography.hazmat.primitives.asymmetric import x25519
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+import classic_sig
+import raw_stream
+import timing_stats
+
+
+# Link profiles: bandwidth in bit/s, round-trip time in ms, MTU and per-packet
+# header overhead (IP + UDP/TCP + link framing) in bytes
+LINK_PROFILES = {
+    "lan": {"bandwidth_bps": 1_000_000_000, "rtt_ms": 0.5, "mtu": 1500, "overhead": 52},
+    "leo": {"bandwidth_bps": 50_000_000, "rtt_ms": 40, "mtu": 1500, "overhead": 52},
+    "meo": {"bandwidth_bps": 10_000_000, "rtt_ms": 150, "mtu": 1500, "overhead": 52},
+    "geo": {"bandwidth_bps": 2_000_000, "rtt_ms": 600, "mtu": 1500, "overhead": 52},
+    "cubesat-uhf": {"bandwidth_bps": 9_600, "rtt_ms": 40, "mtu": 256, "overhead": 28}
+}
+
+FINISHED_SIZE = 32  # HMAC-SHA256 over the transcript
+OPERATIONS = ("client", "server", "compute")
+
+
+def load_profiles(path=None):
+    if path is None:
+        return dict(LINK_PROFILES)
+    with open(path, "r") as file:
+        return json.load(file)
+
+def flight_cost(size, profile):
+    """Modelled one-way delivery of a flight of `size` bytes: packets, ms."""
+    payload = profile["mtu"] - profile["overhead"]
+    packets = max(1, math.ceil(size / payload))
+    wire_bytes = size + packets * profile["overhead"]
+    transmit_ms = wire_bytes * 8 / profile["bandwidth_bps"] * 1000
+    return packets, profile["rtt_ms"] / 2 + transmit_ms
+
+def _raw(public_key):
+    return public_key.public_bytes(encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw)
+
+def _derive(shared_secret, transcript):
+    digest = hashes.Hash(hashes.SHA256())
+    digest.update(transcript)
+    return HKDF(algorithm=hashes.SHA256(), length=64, salt=None, info=digest.finalize()).derive(shared_secret)
+
+def _finished(key, transcript):
+    mac = hmac.HMAC(key, hashes.SHA256())
+    mac.update(transcript)
+    return mac.finalize()
+
+
+class Authenticator:
+    """Server signing key for the CertificateVerify step, oqs or classical."""
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        if algorithm in classic_sig.BASELINES:
+            keygen, self._sign, self._verify = classic_sig.BASELINES[algorithm]
+            self.private_key = keygen()
+            self.public_key = self.private_key.public_key()
+            self.certificate = self.public_key.public_bytes(
+                encoding=serialization.Encoding.DER,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo
+            )
+            self.sig = None
+        else:
+            self.sig = oqs.Signature(algorithm)
+            self.public_key = self.certificate = self.sig.generate_keypair()
+
+    def sign(self, message):
+        if self.sig is None:
+            return self._sign(self.private_key, message)
+        return self.sig.sign(message)
+
+    def verify(self, message, signature):
+        if self.sig is None:
+            return self._verify(self.public_key, message, signature)
+        return self.sig.verify(message, signature, self.public_key)
+
+    def free(self):
+        if self.sig is not None:
+            self.sig.free()
+
+
+def handshake(kem, server_kem, auth):
+    """Run one hybrid handshake in-process.
+
+    Returns (client_ns, server_ns, client_hello_size, server_flight_size, ok).
+    Flights: ClientHello (X25519 share + KEM public key); ServerHello
+    (X25519 share + KEM ciphertext) with certificate, CertificateVerify and
+    Finished; client Finished.
+    """
+    # Client: ephemeral X25519 and KEM keypairs
+    start = time.perf_counter_ns()
+    client_ecdh = x25519.X25519PrivateKey.generate()
+    client_share = _raw(client_ecdh.public_key())
+    kem_public_key = kem.generate_keypair()
+    client_hello = client_share + kem_public_key
+    client_ns = time.perf_counter_ns() - start
+
+    # Server: encapsulate, ECDH, derive keys, sign the transcript
+    start = time.perf_counter_ns()
+    ciphertext, pq_secret = server_kem.encap_secret(kem_public_key)
+    server_ecdh = x25519.X25519PrivateKey.generate()
+    server_share = _raw(server_ecdh.public_key())
+    ec_secret = server_ecdh.exchange(x25519.X25519PublicKey.from_public_bytes(client_share))
+    transcript = client_hello + server_share + ciphertext + auth.certificate
+    server_keys = _derive(ec_secret + pq_secret, transcript)
+    signature = auth.sign(transcript)
+    transcript += signature
+    server_finished = _finished(server_keys[:32], transcript)
+    server_ns = time.perf_counter_ns() - start
+    server_flight = len(server_share) + len(ciphertext) + len(auth.certificate) + len(signature) + len(server_finished)
+
+    # Client: decapsulate, ECDH, derive, verify signature and Finished
+    start = time.perf_counter_ns()
+    pq_secret_dec = kem.decap_secret(ciphertext)
+    ec_secret_dec = client_ecdh.exchange(x25519.X25519PublicKey.from_public_bytes(server_share))
+    client_transcript = client_hello + server_share + ciphertext + auth.certificate
+    client_keys = _derive(ec_secret_dec + pq_secret_dec, client_transcript)
+    valid = auth.verify(client_transcript, signature)
+    client_transcript += signature
+    ok = valid and _finished(client_keys[:32], client_transcript) == server_finished
+    _finished(client_keys[32:], client_transcript + server_finished)
+    client_ns += time.perf_counter_ns() - start
+
+    return client_ns, server_ns, len(client_hello), server_flight, ok
+
+def summarize_profile(profile, client_hello, server_flight, compute_ms, server_ms):
+    hello_packets, hello_ms = flight_cost(client_hello, profile)
+    server_packets, server_flight_ms = flight_cost(server_flight, profile)
+    finished_packets, _ = flight_cost(FINISHED_SIZE, profile)
+    # The client can send data with its Finished, so the handshake costs one
+    # round trip plus transmission and compute on both sides
+    network_ms = hello_ms + server_flight_ms
+    total_bytes = client_hello + server_flight + FINISHED_SIZE
+    packets = hello_packets + server_packets + finished_packets
+    wire_bits = (total_bytes + packets * profile["overhead"]) * 8
+    # Sustained rate is bounded by server compute (one core) or link bandwidth
+    server_rate = 1000 / server_ms if server_ms > 0 else math.inf
+    link_rate = profile["bandwidth_bps"] / wire_bits
+    return {
+        "bytes": total_bytes,
+        "packets": packets,
+        "network_ms": round(network_ms, 6),
+        "handshake_ms": round(compute_ms + network_ms, 6),
+        "handshakes_per_sec": round(min(server_rate, link_rate), 3),
+        "bound": "server" if server_rate < link_rate else "link"
+    }
+
+def benchmark_handshake(kem_algorithm, sig_algorithm, iterations=100, profiles=None):
+    """Time full hybrid handshakes and model them over each link profile."""
+    profiles = profiles or LINK_PROFILES
+    auth = Authenticator(sig_algorithm)
+    timings = {op: timing_stats.empty(iterations) for op in OPERATIONS}
+    failures = 0
+    try:
+        # Client and server each keep one KEM context, as a long-running peer would
+        with oqs.KeyEncapsulation(kem_algorithm) as kem, oqs.KeyEncapsulation(kem_algorithm) as server_kem:
+            handshake(kem, server_kem, auth)  # warm-up
+            started = time.perf_counter_ns()
+            for i in range(iterations):
+                client_ns, server_ns, client_hello, server_flight, ok = handshake(kem, server_kem, auth)
+                timings["client"][i] = client_ns / 1_000_000
+                timings["server"][i] = server_ns / 1_000_000
+                timings["compute"][i] = (client_ns + server_ns) / 1_000_000
+                if not ok:
+                    failures += 1
+            elapsed_s = (time.perf_counter_ns() - started) / 1_000_000_000
+    finally:
+        auth.free()
+
+    results = {
+        "algorithm": f"{kem_algorithm}+X25519/{sig_algorithm}",
+        "category": "handshake",
+        "mode": "handshake",
+        "kem": kem_algorithm,
+        "signature": sig_algorithm,
+        "iterations": iterations,
+        "client_hello_size": client_hello,
+        "server_flight_size": server_flight,
+        **{f"{op}_ms": timing_stats.compute_stats(data) for op, data in timings.items()},
+        # Client and server sharing one core, no link
+        "in_process_handshakes_per_sec": round(iterations / elapsed_s, 3),
+        "correctness_rate": round(1 - failures / iterations, 6),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    }
+    compute_ms = results["compute_ms"]["median"]
+    server_ms = results["server_ms"]["median"]
+    results["links"] = {
+        name: summarize_profile(profile, client_hello, server_flight, compute_ms, server_ms)
+        for name, profile in profiles.items()
+    }
+    return results, timings
+
+def export_handshake_csv(results, label="default"):
+    path = raw_stream.export_path(label, results["algorithm"].replace("/", "_"), results["timestamp"], "handshake")
+    with open(path, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["profile", "kem", "signature", "bytes", "packets", "compute_ms",
+                         "network_ms", "handshake_ms", "handshakes_per_sec", "bound"])
+        for name, link in results["links"].items():
+            writer.writerow([
+                name, results["kem"], results["signature"], link["bytes"], link["packets"],
+                results["compute_ms"]["median"], link["network_ms"], link["handshake_ms"],
+                link["handshakes_per_sec"], link["bound"]
+            ])
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid handshake benchmark over simulated links")
+    parser.add_argument("--kem", action="append", default=None, help="liboqs KEM (repeatable)")
+    parser.add_argument("--sig", action="append", default=None, help="liboqs signature or classical baseline (repeatable)")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--profiles", default=None, help="JSON file of link profiles")
+    parser.add_argument("--profile", action="append", default=None, help="only these profiles (repeatable)")
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.profiles)
+    if args.profile:
+        profiles = {name: profiles[name] for name in args.profile}
+    for kem_algorithm in args.kem or ["ML-KEM-768"]:
+        for sig_algorithm in args.sig or ["ML-DSA-65", "Ed25519"]:
+            print(f"\nHandshake: {kem_algorithm}+X25519 / {sig_algorithm}")
+            results, _ = benchmark_handshake(kem_algorithm, sig_algorithm, args.iterations, profiles)
+            print(json.dumps(results, indent=4))
+            export_handshake_csv(results, os.getenv("SYSTEM_LABEL", "default"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+
+import benchmark_plan
+
+
+# cpus: cores the job may use; quota: share of each of those cores;
+# memory_mb: memory limit (cgroup only); period_us: throttling period
+HARDWARE_PROFILES = {
+    "cubesat-obc": {"cpus": 1, "quota": 0.25, "memory_mb": 256, "period_us": 10_000},
+    "smallsat-obc": {"cpus": 1, "quota": 0.5, "memory_mb": 512, "period_us": 10_000},
+    "payload-a53": {"cpus": 2, "quota": 0.4, "memory_mb": 1024, "period_us": 10_000},
+    "ground-edge": {"cpus": 4, "quota": 1.0, "memory_mb": 4096, "period_us": 100_000}
+}
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def load_profiles(path=None):
+    if path is None:
+        return dict(HARDWARE_PROFILES)
+    with open(path, "r") as file:
+        return json.load(file)
+
+def tagged_label(system_label, name):
+    return f"{system_label}@{name}"
+
+
+def _own_cgroup():
+    with open("/proc/self/cgroup", "r") as file:
+        for line in file:
+            if line.startswith("0::"):
+                return CGROUP_ROOT / line.strip()[3:].lstrip("/")
+    return None
+
+def cgroup_parent(base=None):
+    """A cgroup v2 directory that can host per-job child groups, or None.
+
+    base (BENCH_CGROUP) should be a delegated cgroup; by default this
+    process's own group is used. Controllers can only be enabled for the
+    children of a group without processes of its own, so this process may
+    first move itself into a "main" leaf below base. Returns (parent, undo);
+    pass undo to release_cgroup() when done so the process moves back and
+    the controllers enabled here are switched off again.
+    """
+    if not (CGROUP_ROOT / "cgroup.controllers").exists():
+        return None, None
+    base = Path(base) if base else _own_cgroup()
+    if base is None or not os.access(base, os.W_OK):
+        return None, None
+    undo = {"leaf": None, "controllers": []}
+    try:
+        if "cpu" not in (base / "cgroup.controllers").read_text().split():
+            return None, None
+        enabled = (base / "cgroup.subtree_control").read_text().split()
+        if "cpu" not in enabled:
+            try:
+                (base / "cgroup.subtree_control").write_text("+cpu")
+            except OSError:
+                leaf = base / "main"
+                leaf.mkdir(exist_ok=True)
+                (leaf / "cgroup.procs").write_text(str(os.getpid()))
+                undo["leaf"] = leaf
+                (base / "cgroup.subtree_control").write_text("+cpu")
+            undo["controllers"].append("cpu")
+        if "memory" not in enabled:
+            try:
+                (base / "cgroup.subtree_control").write_text("+memory")
+                undo["controllers"].append("memory")
+            except OSError:
+                pass
+    except OSError:
+        release_cgroup(base, undo)
+        return None, None
+    return base, undo
+
+def release_cgroup(parent, undo):
+    try:
+        if undo["controllers"]:
+            (parent / "cgroup.subtree_control").write_text(" ".join(f"-{name}" for name in undo["controllers"]))
+        if undo["leaf"] is not None:
+            (parent / "cgroup.procs").write_text(str(os.getpid()))
+            undo["leaf"].rmdir()
+    except OSError as e:
+        print(f"Could not restore cgroup {parent}: {e}")
+
+def create_cgroup(parent, name, profile):
+    path = parent / f"pqc-bench-{name}-{os.getpid()}"
+    path.mkdir(exist_ok=True)
+    period = profile.get("period_us", 100_000)
+    quota = int(profile["quota"] * profile["cpus"] * period)
+    (path / "cpu.max").write_text(f"{max(quota, 1000)} {period}")
+    memory_limited = False
+    if profile.get("memory_mb") and (path / "memory.max").exists():
+        (path / "memory.max").write_text(str(profile["memory_mb"] << 20))
+        if (path / "memory.swap.max").exists():
+            (path / "memory.swap.max").write_text("0")
+        memory_limited = True
+    return path, memory_limited
+
+def _profile_cpus(profile):
+    allowed = sorted(os.sched_getaffinity(0))
+    return set(allowed[:max(1, min(profile["cpus"], len(allowed)))])
+
+
+def _child(conn, job, options, mode, cpus, cgroup):
+    # Own process group, so throttling also reaches the processes this job spawns
+    os.setpgid(0, 0)
+    try:
+        if cgroup is not None:
+            (cgroup / "cgroup.procs").write_text(str(os.getpid()))
+        os.sched_setaffinity(0, cpus)
+        conn.send((*benchmark_plan.run(job, options, mode), None))
+    except Exception as e:
+        conn.send((None, None, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+def _duty_cycle(pgid, quota, period_s, done):
+    # Stop and resume the child's process group (the child, its key pool
+    # workers and memory-profile subprocesses) so it runs for quota of every
+    # period, the user-space equivalent of CFS bandwidth throttling
+    run_s = quota * period_s
+    while not done.is_set():
+        time.sleep(run_s)
+        try:
+            os.killpg(pgid, signal.SIGSTOP)
+            time.sleep(period_s - run_s)
+            os.killpg(pgid, signal.SIGCONT)
+        except ProcessLookupError:
+            return
+
+def run_constrained(job, name, profile, options=None, mode="latency", parent=None):
+    """Run one benchmark job in a child process limited to a hardware profile.
+
+    With a usable cgroup v2 parent the child joins its own group with
+    cpu.max (and memory.max) set from the profile. Otherwise it is pinned
+    with sched_setaffinity and the parent throttles it with SIGSTOP/SIGCONT
+    duty cycles; the memory limit is then not enforced. Either way a short
+    operation either runs at full speed or waits out a throttled slice, so
+    means (and throughput) track the slower hardware better than medians.
+    """
+    cgroup, memory_limited = create_cgroup(parent, name, profile) if parent is not None else (None, False)
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    child = multiprocessing.Process(target=_child, args=(sender, job, options, mode, _profile_cpus(profile), cgroup))
+    child.start()
+    sender.close()
+    try:
+        # Also set from here, so the group exists before the first signal
+        os.setpgid(child.pid, child.pid)
+    except OSError:
+        pass
+
+    done = threading.Event()
+    throttler = None
+    if cgroup is None and profile["quota"] < 1:
+        throttler = threading.Thread(target=_duty_cycle, daemon=True,
+                                     args=(child.pid, profile["quota"], profile.get("period_us", 100_000) / 1e6, done))
+        throttler.start()
+
+    try:
+        results, raw_timings, error = receiver.recv()
+    except EOFError:
+        results, raw_timings, error = None, None, "constrained child exited without a result"
+    finally:
+        done.set()
+        if throttler is not None:
+            throttler.join()
+            try:
+                os.killpg(child.pid, signal.SIGCONT)
+            except ProcessLookupError:
+                pass
+        child.join()
+        if cgroup is not None:
+            cgroup.rmdir()
+
+    if error is not None:
+        raise RuntimeError(error)
+    results["hardware_profile"] = {
+        "name": name,
+        **profile,
+        "method": "cgroup-v2" if cgroup is not None else "affinity+duty-cycle",
+        "memory_limited": memory_limited
+    }
+    return results, raw_timings
+
+def run_jobs(jobs, name, profile, options=None, mode="latency"):
+    """Yield (job, results, raw_timings, error) like parallel_runner.run_jobs, one constrained job at a time."""
+    parent, undo = cgroup_parent(os.getenv("BENCH_CGROUP"))
+    method = "cgroup v2" if parent is not None else "affinity + duty cycle"
+    print(f"\nHardware profile {name}: {profile['cpus']} CPU(s) at {profile['quota']:.0%}, "
+          f"{profile.get('memory_mb')} MB ({method})")
+    try:
+        for job in jobs:
+            print(f"\nBenchmarking {benchmark_plan.describe(job)} as {name}")
+            try:
+                results, raw_timings = run_constrained(job, name, profile, options, mode, parent)
+            except Exception as e:
+                yield job, None, None, e
+                continue
+            yield job, results, raw_timings, None
+    finally:
+        if parent is not None:
+            release_cgroup(parent, undo)
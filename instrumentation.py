@@ -0,0 +1,258 @@
+import ctypes
+import os
+import platform
+import resource
+import time
+import tracemalloc
+
+
+# perf_event_open syscall numbers by architecture
+PERF_EVENT_OPEN = {
+    "x86_64": 298,
+    "aarch64": 241,
+    "riscv64": 241,
+    "i686": 336,
+    "armv7l": 364
+}
+
+PERF_TYPE_HARDWARE = 0
+PERF_COUNT_HW_CPU_CYCLES = 0
+PERF_COUNT_HW_INSTRUCTIONS = 1
+PERF_COUNT_HW_CACHE_MISSES = 3  # usually last-level cache misses
+# exclude_kernel | exclude_hv, so unprivileged users can count their own code
+PERF_FLAGS = (1 << 5) | (1 << 6)
+
+
+class _PerfEventAttr(ctypes.Structure):
+    # struct perf_event_attr up to PERF_ATTR_SIZE_VER5 (112 bytes)
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("size", ctypes.c_uint32),
+        ("config", ctypes.c_uint64),
+        ("sample_period", ctypes.c_uint64),
+        ("sample_type", ctypes.c_uint64),
+        ("read_format", ctypes.c_uint64),
+        ("flags", ctypes.c_uint64),
+        ("wakeup_events", ctypes.c_uint32),
+        ("bp_type", ctypes.c_uint32),
+        ("config1", ctypes.c_uint64),
+        ("config2", ctypes.c_uint64),
+        ("branch_sample_type", ctypes.c_uint64),
+        ("sample_regs_user", ctypes.c_uint64),
+        ("sample_stack_user", ctypes.c_uint32),
+        ("clockid", ctypes.c_int32),
+        ("sample_regs_intr", ctypes.c_uint64),
+        ("aux_watermark", ctypes.c_uint32),
+        ("sample_max_stack", ctypes.c_uint16),
+        ("reserved_2", ctypes.c_uint16)
+    ]
+
+
+def _perf_event_open(config):
+    number = PERF_EVENT_OPEN.get(platform.machine())
+    if number is None:
+        return None
+    libc = ctypes.CDLL(None, use_errno=True)
+    attr = _PerfEventAttr()
+    attr.type = PERF_TYPE_HARDWARE
+    attr.size = ctypes.sizeof(_PerfEventAttr)
+    attr.config = config
+    attr.flags = PERF_FLAGS
+    # pid=0, cpu=-1: count the calling thread on any CPU
+    fd = libc.syscall(number, ctypes.byref(attr), 0, -1, -1, 0)
+    return fd if fd >= 0 else None
+
+
+class ThreadTime:
+    names = ("cpu_ms",)
+
+    def start(self):
+        return time.thread_time_ns()
+
+    def stop(self, mark):
+        return ((time.thread_time_ns() - mark) / 1_000_000,)
+
+
+class PerfCounters:
+    """Hardware counters through Linux perf_event; only counters that open are kept."""
+
+    EVENTS = {
+        "cycles": PERF_COUNT_HW_CPU_CYCLES,
+        "instructions": PERF_COUNT_HW_INSTRUCTIONS,
+        "llc_misses": PERF_COUNT_HW_CACHE_MISSES
+    }
+
+    def __init__(self):
+        self.fds = []
+        names = []
+        for name, config in self.EVENTS.items():
+            fd = _perf_event_open(config)
+            if fd is not None:
+                self.fds.append(fd)
+                names.append(name)
+        self.names = tuple(names)
+
+    def _read(self):
+        return [int.from_bytes(os.read(fd, 8), "little") for fd in self.fds]
+
+    def start(self):
+        return self._read()
+
+    def stop(self, mark):
+        return tuple(end - begin for begin, end in zip(mark, self._read()))
+
+    def close(self):
+        for fd in self.fds:
+            os.close(fd)
+        self.fds = []
+
+
+def _status_kb(key):
+    with open("/proc/self/status", "r") as file:
+        for line in file:
+            if line.startswith(key + ":"):
+                return int(line.split()[1])
+    return None
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux >= 4.0)
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class PeakRss:
+    """Peak resident set size during each operation.
+
+    VmHWM is reset to the current RSS before every operation, so
+    peak_rss_kb is the high-water mark of that operation alone and
+    rss_growth_kb how far it rose above the RSS at its start. Where the
+    reset is unavailable (not Linux, or no access to clear_refs) both fall
+    back to the process lifetime peak from getrusage, which stops changing
+    after the largest allocation so far; rss_growth_kb is then empty.
+    """
+
+    names = ("peak_rss_kb", "rss_growth_kb")
+
+    def __init__(self):
+        self.resettable = _reset_peak_rss()
+
+    def start(self):
+        if not self.resettable:
+            return None
+        _reset_peak_rss()
+        return _status_kb("VmRSS")
+
+    def stop(self, mark):
+        if mark is None:
+            return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, float("nan"))
+        peak = _status_kb("VmHWM")
+        return (peak, peak - mark)
+
+
+class Tracemalloc:
+    # Python-level allocations only; memory malloc'd inside liboqs is not traced.
+    # Tracing hooks every Python allocation, so while this collector is active
+    # the wall-clock timings (and thread_time/perf) of the run are slower
+    names = ("alloc_bytes", "alloc_peak_bytes")
+
+    def __init__(self):
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start()
+
+    def start(self):
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def stop(self, mark):
+        current, peak = tracemalloc.get_traced_memory()
+        return (current - mark, peak - mark)
+
+    def close(self):
+        if self.started:
+            tracemalloc.stop()
+
+
+# In nesting order, outermost first: the cheap, precise counters run closest
+# to the operation, so their windows exclude the other collectors' work
+COLLECTORS = {
+    "tracemalloc": Tracemalloc,
+    "rss": PeakRss,
+    "thread_time": ThreadTime,
+    "perf": PerfCounters
+}
+
+
+class Probe:
+    """Captures extra per-operation metrics around each timed region.
+
+    Benchmark loops call start() just before reading the wall clock and
+    stop(mark, op, slot) just after, so collector overhead stays outside the
+    wall-clock measurement. Collectors are nested: they start in COLLECTORS
+    order and stop in reverse. Values land in store.metrics["<op>.<metric>"].
+    Use as a context manager so perf file descriptors are closed on errors.
+    """
+
+    def __init__(self, names):
+        self.collectors = [collector() for name, collector in COLLECTORS.items() if name in names]
+        self.metrics = tuple(metric for c in self.collectors for metric in c.names)
+        self.store = None
+        self.keys = {}
+
+    def bind(self, store):
+        self.store = store
+        return self
+
+    def start(self):
+        return [collector.start() for collector in self.collectors]
+
+    def stop(self, marks, op, slot):
+        keys = self.keys.get(op)
+        if keys is None:
+            keys = self.keys[op] = [f"{op}.{metric}" for metric in self.metrics]
+        stopped = [c.stop(mark) for c, mark in zip(reversed(self.collectors), reversed(marks))]
+        values = [value for collector_values in reversed(stopped) for value in collector_values]
+        metrics = self.store.metrics
+        for key, value in zip(keys, values):
+            metrics[key][slot] = value
+
+    def close(self):
+        for collector in self.collectors:
+            if hasattr(collector, "close"):
+                collector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NullProbe:
+    metrics = ()
+
+    def bind(self, store):
+        return self
+
+    def start(self):
+        return None
+
+    def stop(self, marks, op, slot):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def probe(names=None):
+    return Probe(names) if names else NullProbe()
@@ -1,19 +1,12 @@
 import oqs
 import time
-import statistics as stats
-
-
-def compute_stats(data):
-    mean = stats.mean(data)
-    stddev = stats.stdev(data)
-    return {
-        "mean": round(mean, 6),
-        "median": round(stats.median(data), 6),
-        "max": round(max(data), 6),
-        "min": round(min(data), 6),
-        "stddev": round(stddev, 6),
-        "cv": round(stddev / mean, 6)
-    }
+import timing_stats
+import raw_stream
+import instrumentation
+import context_pool
+
+
+OPERATIONS = ("keygen", "encap", "decap")
 
 def warmup(kem):
     for _ in range(5):
@@ -23,53 +16,139 @@ def warmup(kem):
         assert shared_secret_enc == shared_secret_dec
 
 
-def benchmark(category, algorithm, iterations=100):
-    generation_times = []
-    encapsulate_times = []
-    decapsulate_times = []
-    failures = 0
+def benchmark(category, algorithm, iterations=100, adaptive=False, target_precision=0.01,
+              max_iterations=1_000_000, time_budget_s=300.0, stream=None, instrument=None,
+              pool_size=64, stable=False):
+    # In adaptive mode `iterations` is the first batch; sampling then continues
+    # until the median of every operation converges or the budget runs out
+    sampler = timing_stats.AdaptiveSampler(target_precision, max_iterations, time_budget_s) if adaptive else None
+    # instrument names the extra per-operation collectors, e.g. ("thread_time", "perf")
+    probe = instrumentation.probe(instrument)
+    store = raw_stream.open_store(OPERATIONS, iterations, algorithm, category, sampler, stream, probe.metrics)
+    probe.bind(store)
+    timings = store.timings
+
+    # The context comes from the shared pool, so repeated runs skip its setup; it is
+    # handed out without a secret key, and this run's key is wiped when it goes back
+    contexts = context_pool.shared_pool()
+    with contexts.lease("kem", algorithm) as kem, store, probe, timing_stats.GCPause(stable) as pause:
+        warmup(kem)
+        # Sizes are read while the lease holds the context; once released it may be evicted and freed
+        details = dict(kem.details)
+
+        # Each round fills up to pool_size slots one operation at a time: a pool
+        # of keypairs, then encaps against every key, then decaps with each
+        # secret key, so each operation runs in its own tight loop
+        while store.room():
+            pause.settle()  # collect between rounds, never inside a timed loop
+            i = store.slot
+            n = store.block(pool_size)
+
+            keypairs = []
+            for j in range(i, i + n):
+                mark = probe.start()
+                start_time = time.perf_counter_ns()
+                public_key = kem.generate_keypair()
+                elapsed_ns = time.perf_counter_ns() - start_time
+                elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
+                timings["keygen"][j] = elapsed_ms
+                probe.stop(mark, "keygen", j)
+                keypairs.append((public_key, kem.export_secret_key()))
 
+            exchanges = []
+            for j, (public_key, _) in enumerate(keypairs, i):
+                mark = probe.start()
+                start_time = time.perf_counter_ns()
+                ciphertext, shared_secret_enc = kem.encap_secret(public_key)
+                elapsed_ns = time.perf_counter_ns() - start_time
+                elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
+                timings["encap"][j] = elapsed_ms
+                probe.stop(mark, "encap", j)
+                exchanges.append((ciphertext, shared_secret_enc))
+
+            decapsulators = [oqs.KeyEncapsulation(algorithm, secret_key) for _, secret_key in keypairs]
+            try:
+                for j, (decapsulator, (ciphertext, shared_secret_enc)) in enumerate(zip(decapsulators, exchanges), i):
+                    mark = probe.start()
+                    start_time = time.perf_counter_ns()
+                    shared_secret_dec = decapsulator.decap_secret(ciphertext)
+                    elapsed_ns = time.perf_counter_ns() - start_time
+                    elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
+                    timings["decap"][j] = elapsed_ms
+                    probe.stop(mark, "decap", j)
+
+                    if shared_secret_enc != shared_secret_dec:
+                        store.fail()
+            finally:
+                for decapsulator in decapsulators:
+                    decapsulator.free()
+
+            store.commit(n)
+
+    count = store.count
+
+    benchmark_results = {
+        "algorithm": algorithm,
+        "category": category,
+        "iterations": count,
+        "key_size": len(public_key),
+        "public_key_size": len(public_key),
+        "secret_key_size": details["length_secret_key"],
+        "ciphertext_size": details["length_ciphertext"],
+        "shared_secret_size": details["length_shared_secret"],
+        "keygen_ms": store.summary("keygen"),
+        "encap_ms": store.summary("encap"),
+        "decap_ms": store.summary("decap"),
+        "correctness_rate": round((count - store.failures) / count, 6),
+        "timestamp": store.timestamp or time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    }
+    if sampler is not None:
+        benchmark_results["adaptive"] = sampler.report()
+    if probe.metrics:
+        benchmark_results["metrics"] = store.metric_summary()
+
+    raw_timings = store.raw_timings()
+
+    return benchmark_results, raw_timings
+
+
+def benchmark_throughput(category, algorithm, batch_size=1000, batches=20, pool_size=64):
+    # Times tight batches of each operation on precomputed inputs, so per-call
+    # timer overhead is amortized over batch_size operations
     with oqs.KeyEncapsulation(algorithm) as kem:
         warmup(kem)
 
-        for _ in range(iterations):
-            start_time = time.perf_counter_ns()
-            public_key = kem.generate_keypair()
-            elapsed_ns = time.perf_counter_ns() - start_time
-            elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
-            generation_times.append(elapsed_ms)
-
-            start_time = time.perf_counter_ns()
-            ciphertext, shared_secret_enc = kem.encap_secret(public_key)
-            elapsed_ns = time.perf_counter_ns() - start_time
-            elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
-            encapsulate_times.append(elapsed_ms)
-
-            start_time = time.perf_counter_ns()
-            shared_secret_dec = kem.decap_secret(ciphertext)
-            elapsed_ns = time.perf_counter_ns() - start_time
-            elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
-            decapsulate_times.append(elapsed_ms)
-
-            if shared_secret_enc != shared_secret_dec:
-                failures += 1
-    
+        per_op = {"keygen_batch": timing_stats.time_batches(kem.generate_keypair, [()], batch_size, batches)}
+
+        # Encapsulate against a pool of fresh public keys; the last keypair stays
+        # in the object, so the ciphertext pool is made against it for decap
+        public_keys = [(kem.generate_keypair(),) for _ in range(pool_size)]
+        public_key = public_keys[-1][0]
+        ciphertexts = []
+        for _ in range(pool_size):
+            ciphertext, shared_secret = kem.encap_secret(public_key)
+            assert kem.decap_secret(ciphertext) == shared_secret
+            ciphertexts.append((ciphertext,))
+
+        per_op["encap_batch"] = timing_stats.time_batches(kem.encap_secret, public_keys, batch_size, batches)
+        per_op["decap_batch"] = timing_stats.time_batches(kem.decap_secret, ciphertexts, batch_size, batches)
+
     benchmark_results = {
         "algorithm": algorithm,
         "category": category,
-        "iterations": iterations,
+        "mode": "throughput",
+        "iterations": batch_size * batches,
+        "batch_size": batch_size,
+        "batches": batches,
         "key_size": len(public_key),
-        "keygen_ms": compute_stats(generation_times),
-        "encap_ms": compute_stats(encapsulate_times),
-        "decap_ms": compute_stats(decapsulate_times),
-        "correctness_rate": round((iterations - failures) / iterations, 6),
+        "public_key_size": len(public_key),
+        "secret_key_size": kem.details["length_secret_key"],
+        "ciphertext_size": kem.details["length_ciphertext"],
+        "shared_secret_size": kem.details["length_shared_secret"],
+        **{f"{op}_ms": timing_stats.compute_stats(data) for op, data in per_op.items()},
+        "throughput": {op: timing_stats.throughput_stats(data) for op, data in per_op.items()},
+        "correctness_rate": 1.0,
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
     }
-    
-    raw_timings = {
-        "keygen": generation_times,
-        "encap": encapsulate_times,
-        "decap": decapsulate_times
-    }
 
-    return benchmark_results, raw_timings
+    return benchmark_results, per_op
@@ -0,0 +1,77 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.hazmat.primitives import serialization
+
+
+def usable_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def private_der(private_key):
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+def private_key_size(private_key):
+    return len(private_der(private_key))
+
+def _timed_keygen(keygen):
+    # Runs in a worker process; keys travel back as DER since they don't pickle
+    start_time = time.perf_counter_ns()
+    private_key = keygen()
+    elapsed_ms = (time.perf_counter_ns() - start_time) / 1_000_000
+    return private_der(private_key), elapsed_ms
+
+
+class KeyPool:
+    """Generates and times batches of cryptography private keys.
+
+    With workers > 1 the keys are generated on a process pool and each worker
+    times its own keygen calls, so slow keygens (RSA) no longer dominate the
+    run. Those timings are taken under contention from the other workers
+    (shared caches, memory bandwidth, lower turbo clocks) and are not
+    comparable with in-process keygen, so it is off by default and results
+    of pooled runs carry keygen_workers. The pool never uses more workers
+    than the CPUs this process may run on, so a worker pinned to one CPU
+    falls back to in-process generation. keygen must be picklable (a
+    module-level function) when workers > 1.
+    """
+
+    def __init__(self, keygen, workers=1):
+        self.keygen = keygen
+        self.workers = max(1, min(workers, usable_cpus()))
+        self.executor = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def fill(self, timings, probe, slot, count):
+        """Generate count keys, timing each into timings[slot:slot + count]."""
+        if self.executor is None:
+            private_keys = []
+            for i in range(slot, slot + count):
+                mark = probe.start()
+                start_time = time.perf_counter_ns()
+                private_keys.append(self.keygen())
+                timings[i] = (time.perf_counter_ns() - start_time) / 1_000_000
+                probe.stop(mark, "keygen", i)
+            return private_keys
+
+        private_keys = []
+        for i, (der, elapsed_ms) in enumerate(self.executor.map(_timed_keygen, [self.keygen] * count), slot):
+            timings[i] = elapsed_ms
+            private_keys.append(serialization.load_der_private_key(der, password=None))
+        return private_keys
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
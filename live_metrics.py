@@ -0,0 +1,251 @@
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import timing_stats
+
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+# The exporter of this run, set while a MetricsExporter is entered
+_active = None
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+def _number(value):
+    if value is None or math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Progress:
+    """Live state of the benchmark loop of one job.
+
+    Fed from the sample store on every commit, outside the timed region:
+    each operation's new timings go into a timing_stats.StreamingStats
+    sketch, so running quantiles cost constant memory however long the job.
+    """
+
+    def __init__(self, algorithm, category, operations, iterations):
+        self.algorithm = algorithm
+        self.category = category
+        self.iterations = iterations
+        self.count = 0
+        self.started = time.monotonic()
+        self.sketches = {op: timing_stats.StreamingStats() for op in operations}
+
+    def update(self, store, n):
+        # The n samples just committed sit in slots [slot - n, slot)
+        for op, sketch in self.sketches.items():
+            sketch.update(store.timings[op][store.slot - n:store.slot])
+        self.count = store.count
+        # Adaptive stores grow their buffers, streamed ones are fixed
+        self.iterations = max(self.iterations, getattr(store, "capacity", 0))
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        rate = self.rate()
+        return max(self.iterations - self.count, 0) / rate if rate > 0 else math.nan
+
+
+class StoreObserver:
+    def __init__(self, exporter, progress):
+        self.exporter = exporter
+        self.progress = progress
+
+    def committed(self, store, n):
+        with self.exporter.lock:
+            self.progress.update(store, n)
+            self.exporter.updated = time.time()
+
+
+class MetricsExporter:
+    """Publishes run progress in the Prometheus text format.
+
+    Serves GET /metrics on port (when given) and rewrites textfile (for the
+    node_exporter textfile collector) every interval seconds. Per-iteration
+    metrics come from benchmark loops running in this process; jobs run in
+    worker or constrained child processes only show up as job progress.
+    """
+
+    def __init__(self, port=None, textfile=None, interval=15.0, address="127.0.0.1", system_label="default"):
+        self.port = port
+        self.textfile = Path(textfile) if textfile else None
+        self.interval = interval
+        self.address = address
+        self.system_label = system_label
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.started = time.time()
+        self.updated = self.started
+        self.jobs_total = 0
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self.cost_total = 0.0
+        self.cost_done = 0.0
+        self.progress = None
+        self._server = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def __enter__(self):
+        global _active
+        if self.port is not None:
+            exporter = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] not in ("/", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = exporter.render().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((self.address, self.port), Handler)
+            self._server.daemon_threads = True
+            self._threads.append(threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True))
+        if self.textfile is not None:
+            self._threads.append(threading.Thread(target=self._write_loop, name="metrics-textfile", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        _active = self
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        _active = None
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+        if self.textfile is not None:
+            self.write_textfile()
+
+    def begin_run(self, jobs):
+        with self.lock:
+            self.jobs_total = len(jobs)
+            self.cost_total = sum(job.cost for job in jobs)
+            self.updated = time.time()
+
+    def observe(self, algorithm, category, operations, iterations):
+        with self.lock:
+            self.progress = Progress(algorithm, category, operations, iterations)
+            self.updated = time.time()
+        return StoreObserver(self, self.progress)
+
+    def finish_job(self, job, failed=False):
+        with self.lock:
+            self.jobs_completed += 1
+            self.jobs_failed += failed
+            self.cost_done += job.cost
+            self.updated = time.time()
+
+    def run_eta(self):
+        # Remaining plan cost at the pace so far; job costs are relative runtimes
+        if self.cost_done <= 0:
+            return math.nan
+        return (time.time() - self.started) / self.cost_done * (self.cost_total - self.cost_done)
+
+    def render(self):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP pqc_bench_{name} {help_text}")
+            lines.append(f"# TYPE pqc_bench_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"pqc_bench_{name}{_labels(system_label=self.system_label, **labels)} {_number(value)}")
+
+        with self.lock:
+            metric("jobs_total", "gauge", "Jobs scheduled in this run.", [({}, self.jobs_total)])
+            metric("jobs_completed", "gauge", "Jobs finished so far, including failed ones.", [({}, self.jobs_completed)])
+            metric("jobs_failed", "gauge", "Jobs that raised an error.", [({}, self.jobs_failed)])
+            metric("run_eta_seconds", "gauge", "Estimated time until the run finishes.", [({}, self.run_eta())])
+            metric("last_update_timestamp_seconds", "gauge", "Unix time of the last progress update; alert on stalls.",
+                   [({}, self.updated)])
+
+            progress = self.progress
+            if progress is not None:
+                job = {"algorithm": progress.algorithm, "category": progress.category}
+                rate = progress.rate()
+                metric("current_job_info", "gauge", "Algorithm whose loop reported progress last.", [(job, 1)])
+                metric("iterations_done", "gauge", "Iterations completed by the current job.", [(job, progress.count)])
+                metric("iterations_target", "gauge", "Iterations the current job will run.", [(job, progress.iterations)])
+                metric("iterations_per_second", "gauge", "Iterations of all operations per wall-clock second.",
+                       [(job, rate)])
+                metric("job_eta_seconds", "gauge", "Estimated time until the current job finishes.",
+                       [(job, progress.eta())])
+                sketches = [({**job, "operation": op}, sketch) for op, sketch in progress.sketches.items()
+                            if sketch.count]
+                metric("latency_ms", "summary", "Operation latency from a streaming quantile sketch.", [
+                    ({**labels, "quantile": q}, sketch.quantile(q)) for labels, sketch in sketches for q in QUANTILES
+                ])
+                for labels, sketch in sketches:
+                    labels = _labels(system_label=self.system_label, **labels)
+                    lines.append(f"pqc_bench_latency_ms_sum{labels} {_number(sketch.mean * sketch.count)}")
+                    lines.append(f"pqc_bench_latency_ms_count{labels} {sketch.count}")
+                metric("latency_stddev_ms", "gauge", "Running standard deviation of the operation latency.", [
+                    (labels, math.sqrt(sketch.m2 / (sketch.count - 1)) if sketch.count > 1 else 0.0)
+                    for labels, sketch in sketches
+                ])
+                metric("ops_per_second", "gauge", "Operations per second of busy time (1000 / mean latency).", [
+                    (labels, 1000 / sketch.mean if sketch.mean > 0 else math.nan) for labels, sketch in sketches
+                ])
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self):
+        # Written to a temporary file and renamed, as the textfile collector expects
+        tmp = self.textfile.with_name(f".{self.textfile.name}.tmp")
+        tmp.write_text(self.render())
+        os.replace(tmp, self.textfile)
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write_textfile()
+            except OSError as e:
+                print(f"Metrics textfile export failed: {e}")
+
+
+def active():
+    # None in worker processes: their updates could not reach the endpoint
+    if _active is None or _active.pid != os.getpid():
+        return None
+    return _active
+
+def begin_run(jobs):
+    exporter = active()
+    if exporter is not None:
+        exporter.begin_run(jobs)
+
+def observe(algorithm, category, operations, iterations):
+    """A store observer for a benchmark loop, or None when no exporter is running."""
+    exporter = active()
+    if exporter is None:
+        return None
+    return exporter.observe(algorithm, category, operations, iterations)
+
+def finish_job(job, failed=False):
+    exporter = active()
+    if exporter is not None:
+        exporter.finish_job(job, failed)
@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import classic_kem
+import classic_sig
+import context_pool
+import handshake_benchmark
+import key_pool
+import raw_stream
+import timing_stats
+
+
+WORKLOADS = ("handshake", "kem", "verify")
+
+
+class Session:
+    """Crypto state for one workload, built once per executor thread or process.
+
+    run() performs one session: a full hybrid handshake, a KEM exchange
+    (encap + decap against a static server key) or one signature check.
+    Classical primitives are used when the algorithm is RSA-OAEP_2048-bit or
+    one of the classic_sig baselines. Sessions live as long as their worker
+    and own their oqs contexts (a pool would only add bookkeeping, since
+    they are never given back); close() frees them.
+    """
+
+    def __init__(self, workload, kem_algorithm, sig_algorithm, message_length=1024):
+        self.workload = workload
+        self.contexts = []
+        if workload == "handshake":
+            client = self._context("kem", kem_algorithm)
+            server = self._context("kem", kem_algorithm)
+            auth = handshake_benchmark.Authenticator(sig_algorithm)
+            self.contexts.append(auth)
+            self.run = lambda: handshake_benchmark.handshake(client, server, auth)[4]
+        elif workload == "kem" and kem_algorithm == "RSA-OAEP_2048-bit":
+            oaep = classic_kem.OAEP
+            private_key = classic_kem.generate_rsa_key()
+            public_key = private_key.public_key()
+            secret = os.urandom(32)
+            self.run = lambda: private_key.decrypt(public_key.encrypt(secret, oaep), oaep) == secret
+        elif workload == "kem":
+            server = self._context("kem", kem_algorithm)
+            client = self._context("kem", kem_algorithm)
+            public_key = server.generate_keypair()
+
+            def exchange():
+                ciphertext, shared_secret = client.encap_secret(public_key)
+                return server.decap_secret(ciphertext) == shared_secret
+            self.run = exchange
+        elif workload == "verify" and sig_algorithm in classic_sig.BASELINES:
+            keygen, sign, verify = classic_sig.BASELINES[sig_algorithm]
+            message = b'\xFF' * message_length
+            private_key = keygen()
+            public_key = private_key.public_key()
+            signature = sign(private_key, message)
+            self.run = lambda: verify(public_key, message, signature)
+        elif workload == "verify":
+            sig = self._context("sig", sig_algorithm)
+            message = b'\xFF' * message_length
+            public_key = sig.generate_keypair()
+            signature = sig.sign(message)
+            self.run = lambda: sig.verify(message, signature, public_key)
+        else:
+            raise ValueError(f"Unknown workload: {workload}")
+
+    def _context(self, kind, algorithm):
+        context = context_pool.CONTEXTS[kind](algorithm)
+        self.contexts.append(context)
+        return context
+
+    def close(self):
+        for context in self.contexts:
+            context.free()
+        self.contexts = []
+
+
+# oqs contexts are not thread-safe, so every executor thread (or process) keeps its own
+_local = threading.local()
+# Sessions built in this process, freed once the executor's threads are gone
+_sessions = []
+_sessions_lock = threading.Lock()
+
+def _init_worker(spec, ready):
+    # Executor initializer: the session is built when the worker starts, never inside a timed level
+    _local.session = Session(*spec)
+    _local.ready = ready
+    with _sessions_lock:
+        _sessions.append(_local.session)
+
+def _wait_ready():
+    # Blocks until every worker has started, so none is spawned once timing begins
+    _local.ready.wait(timeout=600)
+
+def _serve():
+    start = time.perf_counter_ns()
+    ok = _local.session.run()
+    return start, time.perf_counter_ns(), ok
+
+def _close_sessions():
+    with _sessions_lock:
+        sessions = _sessions[:]
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+def make_executor(kind, workers, spec):
+    if kind == "process":
+        return ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(spec, multiprocessing.Barrier(workers)))
+    return ThreadPoolExecutor(workers, initializer=_init_worker, initargs=(spec, threading.Barrier(workers)))
+
+def arrival_offsets(rate, duration_s, arrivals="poisson", seed=None):
+    # Intended start times in ns from the run origin
+    count = max(1, int(rate * duration_s))
+    if arrivals == "poisson":
+        gaps = np.random.default_rng(seed).exponential(1 / rate, count)
+    else:
+        gaps = np.full(count, 1 / rate)
+    return (np.cumsum(gaps) * 1_000_000_000).astype(np.int64)
+
+
+async def run_rate(executor, rate, duration_s=10.0, arrivals="poisson", max_inflight=10_000, seed=None):
+    """Offer sessions at `rate` per second for duration_s, open-loop.
+
+    Arrivals follow a fixed schedule whatever the executor does, and latency
+    is measured from each session's intended arrival time, so a backlog shows
+    up as queueing delay instead of silently lowering the offered load.
+    Arrivals beyond max_inflight outstanding sessions are dropped.
+    """
+    loop = asyncio.get_running_loop()
+    offsets = arrival_offsets(rate, duration_s, arrivals, seed)
+    pending = []
+    outstanding = 0
+    dropped = 0
+
+    def completed(_):
+        nonlocal outstanding
+        outstanding -= 1
+
+    origin = time.perf_counter_ns()
+    for offset in offsets:
+        due = origin + int(offset)
+        delay = (due - time.perf_counter_ns()) / 1_000_000_000
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if outstanding >= max_inflight:
+            dropped += 1
+            continue
+        # run_in_executor submits immediately, so a busy loop cannot delay it
+        future = loop.run_in_executor(executor, _serve)
+        future.add_done_callback(completed)
+        outstanding += 1
+        pending.append((due, future))
+
+    outcomes = await asyncio.gather(*(future for _, future in pending), return_exceptions=True)
+
+    queue_ms, service_ms, latency_ms = [], [], []
+    failures = 0
+    last_end = origin
+    for (due, _), outcome in zip(pending, outcomes):
+        if isinstance(outcome, Exception):
+            failures += 1
+            continue
+        start, end, ok = outcome
+        if not ok:
+            failures += 1
+        queue_ms.append((start - due) / 1_000_000)
+        service_ms.append((end - start) / 1_000_000)
+        latency_ms.append((end - due) / 1_000_000)
+        last_end = max(last_end, end)
+
+    completed_count = len(latency_ms)
+    elapsed_s = (last_end - origin) / 1_000_000_000
+    result = {
+        "offered_rate": rate,
+        "offered": len(offsets),
+        # Poisson arrivals only average `rate`; this is the rate actually offered
+        "arrival_rate": round(len(offsets) / (offsets[-1] / 1_000_000_000), 3),
+        "completed": completed_count,
+        "dropped": dropped,
+        "failures": failures,
+        "achieved_rate": round(completed_count / elapsed_s, 3) if elapsed_s > 0 else 0.0
+    }
+    if completed_count:
+        result["latency_ms"] = timing_stats.compute_stats(np.asarray(latency_ms))
+        result["queue_ms"] = timing_stats.compute_stats(np.asarray(queue_ms))
+        result["service_ms"] = timing_stats.compute_stats(np.asarray(service_ms))
+    return result
+
+def saturated(level, slo_ms=None, tolerance=0.9):
+    if level["dropped"] or level["completed"] < tolerance * level["offered"]:
+        return True
+    if level["achieved_rate"] < tolerance * level["arrival_rate"]:
+        return True
+    return slo_ms is not None and level["latency_ms"]["p99"] > slo_ms
+
+async def sweep(workload, kem_algorithm, sig_algorithm, rates, duration_s=10.0, executor_kind="thread",
+                workers=None, arrivals="poisson", max_inflight=10_000, slo_ms=None, seed=None):
+    """Step the offered rate up until the executor saturates.
+
+    A level is saturated once it drops arrivals, completes fewer than 90% of
+    them, falls below 90% of the offered rate or (with slo_ms) misses the p99
+    latency target. The knee is the highest unsaturated rate.
+    """
+    spec = (workload, kem_algorithm, sig_algorithm)
+    workers = workers or key_pool.usable_cpus()
+    executor = make_executor(executor_kind, workers, spec)
+    loop = asyncio.get_running_loop()
+    levels = []
+    try:
+        # One blocking task per worker starts them all, each building its session
+        await asyncio.gather(*(loop.run_in_executor(executor, _wait_ready) for _ in range(workers)))
+        await asyncio.gather(*(loop.run_in_executor(executor, _serve) for _ in range(workers * 2)))
+        for rate in rates:
+            print(f"{workload}: offering {rate}/s")
+            level = await run_rate(executor, rate, duration_s, arrivals, max_inflight, seed)
+            level["saturated"] = saturated(level, slo_ms)
+            levels.append(level)
+            if level["saturated"]:
+                break
+    finally:
+        executor.shutdown()
+        _close_sessions()
+
+    knee = [level["offered_rate"] for level in levels if not level["saturated"]]
+    return {
+        "algorithm": "+".join(name for name in (kem_algorithm, sig_algorithm) if name),
+        "workload": workload,
+        "kem": kem_algorithm,
+        "signature": sig_algorithm,
+        "executor": executor_kind,
+        "workers": workers,
+        "arrivals": arrivals,
+        "duration_s": duration_s,
+        "slo_ms": slo_ms,
+        "levels": levels,
+        "knee_rate": max(knee) if knee else None,
+        "saturation_throughput": max(level["achieved_rate"] for level in levels),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    }
+
+def export_load_csv(results, label="default"):
+    path = raw_stream.export_path(label, f"{results['algorithm']}_{results['workload']}",
+                                  results["timestamp"], "load")
+    with open(path, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["offered_rate", "achieved_rate", "completed", "dropped", "failures", "saturated",
+                         "latency_median_ms", "latency_p99_ms", "latency_p999_ms",
+                         "queue_median_ms", "queue_p99_ms", "service_median_ms"])
+        for level in results["levels"]:
+            latency = level.get("latency_ms", {})
+            queue = level.get("queue_ms", {})
+            writer.writerow([
+                level["offered_rate"], level["achieved_rate"], level["completed"], level["dropped"],
+                level["failures"], level["saturated"], latency.get("median"), latency.get("p99"),
+                latency.get("p999"), queue.get("median"), queue.get("p99"),
+                level.get("service_ms", {}).get("median")
+            ])
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load generator for handshakes, KEM exchanges and verifies")
+    parser.add_argument("workload", choices=WORKLOADS)
+    parser.add_argument("--kem", default="ML-KEM-768")
+    parser.add_argument("--sig", default="ML-DSA-65")
+    parser.add_argument("--rates", default="100,200,400,800,1600,3200,6400",
+                        help="comma-separated offered rates (sessions/s), stepped until saturation")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per rate")
+    parser.add_argument("--executor", choices=["thread", "process"], default="process")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--arrivals", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--max-inflight", type=int, default=10_000)
+    parser.add_argument("--slo-ms", type=float, default=None, help="p99 latency target")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    kem_algorithm = args.kem if args.workload != "verify" else None
+    sig_algorithm = args.sig if args.workload != "kem" else None
+    rates = [float(rate) for rate in args.rates.split(",")]
+    results = asyncio.run(sweep(
+        args.workload, kem_algorithm, sig_algorithm, rates, args.duration, args.executor,
+        args.workers, args.arrivals, args.max_inflight, args.slo_ms, args.seed
+    ))
+    print(json.dumps(results, indent=4))
+    export_load_csv(results, os.getenv("SYSTEM_LABEL", "default"))
+
+if __name__ == "__main__":
+    main()
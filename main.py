@@ -2,158 +2,213 @@ import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 import oqs
 import os
-import json
 import validate
-import kem_benchmark
-import sig_benchmark
 import mysql_export
-import classic_kem
-import classic_sig
-from cryptography.hazmat.primitives.asymmetric import rsa, padding, ec, ed25519
-from cryptography.hazmat.primitives import hashes
-import csv
-from pathlib import Path
-
-
-def export_csv(results, raw_timings, label="default"):
-    timestamp = results["timestamp"].replace(":", "-").replace(" ", "_")
-    base_dir = Path("exports") / label
-    base_dir.mkdir(parents=True, exist_ok=True)
-
-    # Summary CSV
-    summary_file = base_dir / f"{results['algorithm']}_{timestamp}_summary.csv"
-    with open(summary_file, mode="w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["operation", "mean", "median", "max", "min", "stddev", "cv"])
-        for k, v in results.items():
-            if k.endswith("_ms"):
-                op = k.replace("_ms", "")
-                writer.writerow([
-                    op,
-                    v["mean"], v["median"], v["max"],
-                    v["min"], v["stddev"], v["cv"]
-                ])
-
-    # Raw timings CSV
-    raw_file = base_dir / f"{results['algorithm']}_{timestamp}_raw.csv"
-    with open(raw_file, mode="w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["operation", "iteration", "duration_ms"])
-        for operation, timings in raw_timings.items():
-            for idx, duration in enumerate(timings, 1):
-                writer.writerow([operation, idx, duration])
-
-def _safe_verify(verify_func, *args, **kwargs):
-    try:
-        verify_func(*args, **kwargs)
-        return True
-    except Exception:
-        return False
-
-def main():
+import parallel_runner
+import benchmark_plan
+import reporting
+import message_sweep
+import result_cache
+import stable_mode
+import series_analysis
+import hardware_profile
+import run_journal
+import live_metrics
+import argparse
+import sys
+import contextlib
+from dotenv import load_dotenv
+
+
+def main(resume=None):
+    load_dotenv()
+    # Resume mode: skip the jobs an interrupted run with the same settings completed
+    if resume is None:
+        resume = os.getenv("BENCH_RESUME", "0") == "1"
     system_label = os.getenv("SYSTEM_LABEL", "default")
-    # Import algorithms from json file
-    with open("algorithms.json", "r") as file:
-        standards = json.load(file)
-
-    # Validate the algorithms against the OQS library
-    kems_mlkem, kems_hqc, sigs_mldsa, sigs_slhdsa = validate.algorithms(oqs, standards)
-
-    
-    print(f"\nBenchmarking Classic KEM: RSA-OAEP (2048-bit)")
-    results, raw_timings = classic_kem.benchmark_rsa_oaep()
-    print(json.dumps(results, indent=4))
-    mysql_export.submit_summary(results, system_label)
-    mysql_export.submit_raw_data(results, raw_timings, system_label)
-    export_csv(results, raw_timings, system_label)
-
-    print(f"\nBenchmarking Classic Signature: RSA-2048")
-    results, raw_timings = classic_sig.benchmark(
-        category="legacy_sig",
-        algorithm="RSA-2048",
-        keygen=lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
-        sign=lambda priv, msg: priv.sign(
-            msg,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        ),
-        verify=lambda pub, msg, sig: _safe_verify(pub.verify, sig, msg,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
-    )
-    print(json.dumps(results, indent=4))
-    mysql_export.submit_summary(results, system_label)
-    mysql_export.submit_raw_data(results, raw_timings, system_label)
-    export_csv(results, raw_timings, system_label)
-
-    print(f"\nBenchmarking Classic Signature: ECDSA-P256")
-    results, raw_timings = classic_sig.benchmark(
-        category="legacy_sig",
-        algorithm="ECDSA-P256",
-        keygen=lambda: ec.generate_private_key(ec.SECP256R1()),
-        sign=lambda priv, msg: priv.sign(msg, ec.ECDSA(hashes.SHA256())),
-        verify=lambda pub, msg, sig: _safe_verify(pub.verify, sig, msg, ec.ECDSA(hashes.SHA256()))
-    )
-    print(json.dumps(results, indent=4))
-    mysql_export.submit_summary(results, system_label)
-    mysql_export.submit_raw_data(results, raw_timings, system_label)
-    export_csv(results, raw_timings, system_label)
-
-    print(f"\nBenchmarking Classic Signature: Ed25519")
-    results, raw_timings = classic_sig.benchmark(
-        category="legacy_sig",
-        algorithm="Ed25519",
-        keygen=lambda: ed25519.Ed25519PrivateKey.generate(),
-        sign=lambda priv, msg: priv.sign(msg),
-        verify=lambda pub, msg, sig: _safe_verify(pub.verify, sig, msg)
-    )
-    print(json.dumps(results, indent=4))
-    mysql_export.submit_summary(results, system_label)
-    mysql_export.submit_raw_data(results, raw_timings, system_label)
-    export_csv(results, raw_timings, system_label)
-
-
-    for kem in kems_mlkem:
-        print(f"\nBenchmarking KEM: {kem}")
-        results, raw_timings = kem_benchmark.benchmark("ML-KEM", kem)
-        print(json.dumps(results, indent=4))
-        mysql_export.submit_summary(results, system_label)
-        mysql_export.submit_raw_data(results, raw_timings, system_label)
-        export_csv(results, raw_timings, system_label)
-
-    for kem in kems_hqc:
-        print(f"\nBenchmarking KEM: {kem}")
-        results, raw_timings = kem_benchmark.benchmark("HQC", kem)
-        print(json.dumps(results, indent=4))
-        mysql_export.submit_summary(results, system_label)
-        mysql_export.submit_raw_data(results, raw_timings, system_label)
-        export_csv(results, raw_timings, system_label)
-
-    for sig in sigs_mldsa:
-        print(f"\nBenchmarking Signature Algorithm: {sig}")
-        results, raw_timings = sig_benchmark.benchmark("ML-DSA", sig)
-        print(json.dumps(results, indent=4))
-        mysql_export.submit_summary(results, system_label)
-        mysql_export.submit_raw_data(results, raw_timings, system_label)
-        export_csv(results, raw_timings, system_label)
-
-    for sig in sigs_slhdsa:
-        print(f"\nBenchmarking Signature Algorithm: {sig}")
-        results, raw_timings = sig_benchmark.benchmark("SLH-DSA", sig)
-        print(json.dumps(results, indent=4))
-        mysql_export.submit_summary(results, system_label)
-        mysql_export.submit_raw_data(results, raw_timings, system_label)
-        export_csv(results, raw_timings, system_label)
+    # Constrained-hardware mode: every job runs in a CPU-quota/memory-limited
+    # child process, and results are labelled "<label>@<profile>"
+    hardware = None
+    if os.getenv("BENCH_HW_PROFILE"):
+        name = os.getenv("BENCH_HW_PROFILE")
+        hardware = (name, hardware_profile.load_profiles(os.getenv("BENCH_HW_PROFILES"))[name])
+        system_label = hardware_profile.tagged_label(system_label, name)
+    # Worker processes for the benchmark jobs; 1 keeps the sequential run
+    workers = int(os.getenv("BENCH_WORKERS", "1"))
+    # Only use one logical CPU per physical core
+    isolated = os.getenv("BENCH_ISOLATED", "0") == "1"
+    # Also write raw timings as .npy columns plus a JSON manifest
+    columnar = os.getenv("BENCH_COLUMNAR", "0") == "1"
+    options = {}
+    # Adaptive sampling: run until the median converges
+    if os.getenv("BENCH_ADAPTIVE", "0") == "1":
+        options.update({
+            "adaptive": True,
+            "target_precision": float(os.getenv("BENCH_TARGET_PRECISION", "0.01")),
+            "max_iterations": int(os.getenv("BENCH_MAX_ITERATIONS", "1000000")),
+            "time_budget_s": float(os.getenv("BENCH_TIME_BUDGET", "300"))
+        })
+    # Streaming: spill raw timings to CSV/MySQL in chunks instead of holding them
+    if os.getenv("BENCH_STREAM_CHUNK"):
+        options["stream"] = {
+            "chunk_size": int(os.getenv("BENCH_STREAM_CHUNK")),
+            "label": system_label,
+            "database": True,
+            "columnar": columnar
+        }
+    if os.getenv("BENCH_ITERATIONS"):
+        options["iterations"] = int(os.getenv("BENCH_ITERATIONS"))
+    # Extra per-operation metrics, e.g. BENCH_INSTRUMENT=thread_time,perf,rss,tracemalloc
+    if os.getenv("BENCH_INSTRUMENT"):
+        options["instrument"] = tuple(os.getenv("BENCH_INSTRUMENT").split(","))
+    mode = "latency"
+    # Throughput mode: time batches of operations on precomputed inputs instead
+    if os.getenv("BENCH_THROUGHPUT", "0") == "1":
+        mode = "throughput"
+        options = {}
+        if os.getenv("BENCH_BATCH_SIZE"):
+            options["batch_size"] = int(os.getenv("BENCH_BATCH_SIZE"))
+        if os.getenv("BENCH_BATCHES"):
+            options["batches"] = int(os.getenv("BENCH_BATCHES"))
+    # Message-size sweep for the signature algorithms, e.g. BENCH_SWEEP=64:1048576:2
+    if os.getenv("BENCH_SWEEP"):
+        mode = "sweep"
+        min_size, max_size, factor = os.getenv("BENCH_SWEEP").split(":")
+        options = {"sizes": message_sweep.message_sizes(int(min_size), int(max_size), float(factor))}
+        if os.getenv("BENCH_ITERATIONS"):
+            options["iterations"] = int(os.getenv("BENCH_ITERATIONS"))
+
+    # Context mode: construction, teardown and key-import costs, and reused vs per-call contexts
+    if os.getenv("BENCH_CONTEXT", "0") == "1":
+        mode = "context"
+        options = {}
+        if os.getenv("BENCH_ITERATIONS"):
+            options["iterations"] = int(os.getenv("BENCH_ITERATIONS"))
+
+    # Bulk-verify mode: a pre-signed telemetry corpus verified serially and on a worker pool
+    if os.getenv("BENCH_BULK", "0") == "1":
+        mode = "bulk"
+        options = {}
+        for option, variable in (("keys", "BENCH_BULK_KEYS"), ("messages", "BENCH_BULK_MESSAGES"),
+                                 ("workers", "BENCH_BULK_WORKERS")):
+            if os.getenv(variable):
+                options[option] = int(os.getenv(variable))
+
+    # Memory mode: peak RSS, heap and stack of each operation in a fresh subprocess
+    if os.getenv("BENCH_MEMORY", "0") == "1":
+        mode = "memory"
+        options = {}
+
+    # Stable mode: pinned, GC-free timed loops, with the jobs interleaved in
+    # randomized rounds and an environment fingerprint stored with the results
+    stable = None
+    if os.getenv("BENCH_STABLE", "0") == "1":
+        if mode != "latency" or hardware is not None:
+            raise ValueError("BENCH_STABLE only applies to unconstrained latency runs")
+        stable = {
+            "rounds": int(os.getenv("BENCH_STABLE_ROUNDS", "10")),
+            "seed": int(os.getenv("BENCH_SEED")) if os.getenv("BENCH_SEED") else None
+        }
+        workers = 1
+
+    # Incremental mode: reuse cached results for unchanged jobs, run only the rest
+    incremental = os.getenv("BENCH_INCREMENTAL", "0") == "1"
+    max_age_s = float(os.getenv("BENCH_CACHE_MAX_AGE_DAYS", "7")) * 86400
+
+    # Load the benchmark plan and validate its algorithms against the OQS library
+    plan = benchmark_plan.load_plan(os.getenv("BENCH_PLAN", "algorithms.json"))
+    enabled = validate.algorithms(oqs, plan)
+
+    # Skip jobs without a benchmark for this mode, then run the slowest first
+    jobs = [job for job in benchmark_plan.build_jobs(plan, enabled) if benchmark_plan.supports(job, mode)]
+    jobs = benchmark_plan.schedule(jobs)
+    # Database inserts run on a background thread so they never hold up the next job
+    with mysql_export.BatchWriter(batch_size=int(os.getenv("DB_BATCH_SIZE", "1000"))) as writer:
+        cache = None
+        params = {"options": options, "mode": mode, "stable": stable}
+        if incremental:
+            cache = result_cache.ResultCache()
+            cache.evict(max_age_s, other_versions=True)
+            pending = []
+            for job in jobs:
+                cached = cache.get(cache.key(job[:4], params, system_label), max_age_s)
+                if cached is None:
+                    pending.append(job)
+                    continue
+                print(f"\nUsing cached result for {benchmark_plan.describe(job)}")
+                # Already in the database from the run that cached it; only re-export the files
+                reporting.report(*cached, system_label, None, columnar)
+            jobs = pending
+
+        # Every completed job is checkpointed to exports/journal/<label>/ before it is reported
+        journal = run_journal.RunJournal(system_label, params)
+        jobs, completed = journal.start(jobs, resume)
+        exported = []
+        for job, results, raw_timings, reported in completed:
+            if reported:
+                print(f"\nAlready completed: {benchmark_plan.describe(job)}")
+                continue
+            print(f"\nReporting journaled result for {benchmark_plan.describe(job)}")
+            exported.append((job, reporting.report_journaled(journal, job, results, raw_timings, system_label, writer, columnar)))
+
+        pinned = contextlib.nullcontext()
+        if hardware is not None:
+            runs = hardware_profile.run_jobs(jobs, *hardware, options, mode)
+        elif stable is None:
+            runs = parallel_runner.run_jobs(jobs, workers, isolated, options, mode)
+        else:
+            runs = stable_mode.run_interleaved(jobs, options, stable["rounds"], stable["seed"])
+            cpu = int(os.getenv("BENCH_CPU")) if os.getenv("BENCH_CPU") else None
+            pinned = stable_mode.StableEnvironment(cpu)
+
+        # Live progress in the Prometheus text format, on a local HTTP endpoint and/or a textfile
+        monitor = contextlib.nullcontext()
+        if os.getenv("BENCH_METRICS_PORT") or os.getenv("BENCH_METRICS_TEXTFILE"):
+            monitor = live_metrics.MetricsExporter(
+                port=int(os.getenv("BENCH_METRICS_PORT")) if os.getenv("BENCH_METRICS_PORT") else None,
+                textfile=os.getenv("BENCH_METRICS_TEXTFILE"),
+                interval=float(os.getenv("BENCH_METRICS_INTERVAL", "15")),
+                address=os.getenv("BENCH_METRICS_ADDRESS", "127.0.0.1"),
+                system_label=system_label
+            )
+
+        # The exporter's threads start before the pin, so they do not inherit the pinned CPU
+        with monitor, pinned:
+            live_metrics.begin_run(jobs)
+            for job, results, raw_timings, error in runs:
+                live_metrics.finish_job(job, error is not None)
+                if error is not None:
+                    print(f"An error occurred while benchmarking {benchmark_plan.describe(job)}: {error}")
+                    continue
+                # Warm-up, outliers, steady-state stats and periodic spikes; streamed runs have no raw timings
+                if raw_timings:
+                    results["analysis"] = series_analysis.analyze_run(raw_timings)
+                if cache is not None:
+                    cache.put(cache.key(job[:4], params, system_label), params, system_label, results, raw_timings)
+                journal.record(job, results, raw_timings)
+                exported.append((job, reporting.report_journaled(journal, job, results, raw_timings, system_label, writer, columnar)))
+
+        writer.flush()
+        unexported = reporting.failed_exports(exported)
+        if cache is not None:
+            # Cache hits skip the database, so only exported results stay cached
+            for job in unexported:
+                cache.discard(cache.key(job[:4], params, system_label))
+            cache.close()
+    return 1 if unexported else 0
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Post-quantum cryptography benchmark suite")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip jobs completed by an interrupted run with the same settings (also BENCH_RESUME=1)")
+    args = parser.parse_args()
     try:
-        main()
+        status = main(args.resume or None)
+    except KeyboardInterrupt:
+        print("\nInterrupted; completed jobs are journaled, rerun with --resume to continue")
+        sys.exit(130)
     except Exception as e:
-        print(f"An error occurred: {e}")
\ No newline at end of file
+        print(f"An error occurred: {e}")
+        print("Completed jobs are journaled; rerun with --resume to continue")
+        sys.exit(1)
+    sys.exit(status)
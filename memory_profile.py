@@ -0,0 +1,276 @@
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import oqs
+from cryptography.hazmat.primitives import serialization
+
+import classic_kem
+import classic_sig
+import key_pool
+import scaling_benchmark
+
+
+OPERATIONS = {
+    "kem": ("keygen", "encap", "decap"),
+    "sig": ("keygen", "sign", "verify"),
+    "classic_kem": ("keygen", "encap", "decap"),
+    "classic_sig": ("keygen", "sign", "verify")
+}
+
+# Stack for the measuring thread; large enough for the big-stack schemes
+STACK_SIZE = 32 << 20
+
+
+def _der_public(public_key):
+    return public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+def prepare(kind, algorithm, message_length=1024):
+    """Generate the inputs every operation needs: pk, sk and ct/ss or sig."""
+    message = b'\xFF' * message_length
+    if kind == "kem":
+        with oqs.KeyEncapsulation(algorithm) as kem:
+            public_key = kem.generate_keypair()
+            secret_key = kem.export_secret_key()
+            ciphertext, shared_secret = kem.encap_secret(public_key)
+        return {"public_key": public_key, "secret_key": secret_key,
+                "ciphertext": ciphertext, "shared_secret": shared_secret}
+    if kind == "sig":
+        with oqs.Signature(algorithm) as sig:
+            public_key = sig.generate_keypair()
+            secret_key = sig.export_secret_key()
+            signature = sig.sign(message)
+        return {"public_key": public_key, "secret_key": secret_key, "signature": signature}
+    if kind == "classic_kem":
+        private_key = classic_kem.generate_rsa_key()
+        shared_secret = os.urandom(32)
+        return {"public_key": _der_public(private_key.public_key()), "secret_key": key_pool.private_der(private_key),
+                "ciphertext": private_key.public_key().encrypt(shared_secret, classic_kem.OAEP),
+                "shared_secret": shared_secret}
+    if kind == "classic_sig":
+        keygen, sign, _ = classic_sig.BASELINES[algorithm]
+        private_key = keygen()
+        return {"public_key": _der_public(private_key.public_key()), "secret_key": key_pool.private_der(private_key),
+                "signature": sign(private_key, message)}
+    raise ValueError(f"Unknown job kind: {kind}")
+
+def artefact_sizes(artefacts):
+    return {f"{name}_size": len(artefacts[name]) for name in
+            ("public_key", "secret_key", "ciphertext", "shared_secret", "signature") if name in artefacts}
+
+def make_operation(kind, algorithm, operation, artefacts, message_length=1024):
+    # Builds the context and loads keys, so the returned op() runs nothing else
+    message = b'\xFF' * message_length
+    public_key, secret_key = artefacts["public_key"], artefacts["secret_key"]
+    if kind == "kem":
+        context = oqs.KeyEncapsulation(algorithm, secret_key if operation == "decap" else None)
+        return {
+            "keygen": context.generate_keypair,
+            "encap": lambda: context.encap_secret(public_key),
+            "decap": lambda: context.decap_secret(artefacts["ciphertext"])
+        }[operation]
+    if kind == "sig":
+        context = oqs.Signature(algorithm, secret_key if operation == "sign" else None)
+        return {
+            "keygen": context.generate_keypair,
+            "sign": lambda: context.sign(message),
+            "verify": lambda: context.verify(message, artefacts["signature"], public_key)
+        }[operation]
+    if kind == "classic_kem":
+        oaep = classic_kem.OAEP
+        private_key = serialization.load_der_private_key(secret_key, password=None)
+        loaded_public_key = serialization.load_der_public_key(public_key)
+        return {
+            "keygen": classic_kem.generate_rsa_key,
+            "encap": lambda: loaded_public_key.encrypt(artefacts["shared_secret"], oaep),
+            "decap": lambda: private_key.decrypt(artefacts["ciphertext"], oaep)
+        }[operation]
+    if kind == "classic_sig":
+        keygen, sign, verify = classic_sig.BASELINES[algorithm]
+        private_key = serialization.load_der_private_key(secret_key, password=None)
+        loaded_public_key = serialization.load_der_public_key(public_key)
+        return {
+            "keygen": keygen,
+            "sign": lambda: sign(private_key, message),
+            "verify": lambda: verify(loaded_public_key, message, artefacts["signature"])
+        }[operation]
+    raise ValueError(f"Unknown job kind: {kind}")
+
+
+def _status_kb(*keys):
+    values = {}
+    with open("/proc/self/status", "r") as file:
+        for line in file:
+            key, _, value = line.partition(":")
+            if key in keys:
+                values[key] = int(value.split()[0])
+    return values
+
+def _mappings():
+    # (start, end) of every writable mapping of this process
+    regions = set()
+    with open("/proc/self/maps", "r") as file:
+        for line in file:
+            addresses, permissions = line.split(maxsplit=2)[:2]
+            if permissions.startswith("rw"):
+                regions.add(tuple(int(address, 16) for address in addresses.split("-")))
+    return regions
+
+def _resident_kb(region):
+    # Pages of region that are present or swapped, from /proc/self/pagemap
+    # (bits 63/62); unlike smaps this is unaffected by the kernel merging the
+    # region with a neighbouring mapping
+    page = os.sysconf("SC_PAGE_SIZE")
+    start, end = region
+    with open("/proc/self/pagemap", "rb") as file:
+        file.seek(start // page * 8)
+        entries = np.frombuffer(file.read((end - start) // page * 8), dtype=np.uint64)
+    return int(np.count_nonzero(entries >> np.uint64(62))) * page // 1024
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux >= 4.0)
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+def measure(op, stack_size=STACK_SIZE):
+    """Memory use of one cold call of op() in this (fresh) process.
+
+    op() runs on a new thread whose stack is a fresh mapping, so the growth
+    of that mapping's resident size is its peak stack use (page granular,
+    including a few interpreter frames). peak_rss_kb is the operation's
+    peak RSS above the process's resident size just before it ran (VmHWM
+    after resetting it, minus that baseline); process_peak_rss_kb is the
+    whole interpreter's VmHWM, imports included. The heap estimate is the
+    RSS growth not explained by the stack. Python allocations are traced
+    separately on a second call, so tracemalloc does not inflate the RSS.
+    """
+    ready, go, done, release = (threading.Event() for _ in range(4))
+
+    def target():
+        ready.set()
+        go.wait()
+        op()
+        done.set()
+        release.wait()
+
+    before = _mappings()
+    thread = threading.Thread(target=target)
+    threading.stack_size(stack_size)
+    try:
+        thread.start()
+    finally:
+        threading.stack_size(0)
+    ready.wait()
+
+    # The thread stack is the one new mapping of about stack_size bytes
+    stacks = [region for region in _mappings() - before if region[1] - region[0] >= stack_size // 2]
+    stack = stacks[0] if len(stacks) == 1 else None
+
+    gc.collect()
+    gc.disable()
+    stack_before = _resident_kb(stack) if stack is not None else None
+    reset = _reset_peak_rss()
+    rss_before = _status_kb("VmRSS")["VmRSS"]
+
+    go.set()
+    done.wait()
+
+    status = _status_kb("VmHWM", "VmRSS")
+    stack_after = _resident_kb(stack) if stack is not None else None
+    gc.enable()
+    release.set()
+    thread.join()
+
+    tracemalloc.start()
+    op()
+    py_alloc_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    stack_peak = stack_after - stack_before if stack is not None else None
+    # Without the reset VmHWM may predate the operation, so nothing is attributable to it
+    rss_delta = status["VmHWM"] - rss_before if reset else None
+    return {
+        "peak_rss_kb": rss_delta,
+        "process_peak_rss_kb": status["VmHWM"],
+        "heap_peak_kb": max(0, rss_delta - (stack_peak or 0)) if rss_delta is not None else None,
+        "stack_peak_kb": stack_peak,
+        "py_alloc_peak_bytes": py_alloc_peak
+    }
+
+
+def _encode(artefacts):
+    return {name: value.hex() for name, value in artefacts.items()}
+
+def _decode(artefacts):
+    return {name: bytes.fromhex(value) for name, value in artefacts.items()}
+
+def profile_operation(kind, algorithm, operation, artefacts, message_length=1024, timeout=600):
+    # A fresh interpreter per operation, so no other operation has touched the
+    # stack or heap pages first
+    child = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", kind, algorithm, operation,
+         "--message-length", str(message_length)],
+        input=json.dumps(_encode(artefacts)), capture_output=True, text=True, timeout=timeout
+    )
+    if child.returncode != 0:
+        raise RuntimeError(f"Memory profile of {algorithm} {operation} failed: {child.stderr.strip()}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+def benchmark_memory(kind, category, algorithm, message_length=1024, timeout=600):
+    artefacts = prepare(kind, algorithm, message_length)
+    results = {
+        "algorithm": algorithm,
+        "category": category,
+        "mode": "memory",
+        "iterations": 1,
+        **artefact_sizes(artefacts),
+        "key_size": len(artefacts["public_key"]),
+        "memory": {
+            operation: profile_operation(kind, algorithm, operation, artefacts, message_length, timeout)
+            for operation in OPERATIONS[kind]
+        },
+        "correctness_rate": 1.0,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    }
+    return results, {}
+
+
+def _child(kind, algorithm, operation, message_length):
+    artefacts = _decode(json.load(sys.stdin))
+    op = make_operation(kind, algorithm, operation, artefacts, message_length)
+    print(json.dumps(measure(op)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-operation memory footprint in isolated subprocesses")
+    parser.add_argument("--child", nargs=3, metavar=("KIND", "ALGORITHM", "OPERATION"), help=argparse.SUPPRESS)
+    parser.add_argument("--kind", choices=sorted(OPERATIONS), default=None)
+    parser.add_argument("--message-length", type=int, default=1024)
+    parser.add_argument("algorithms", nargs="*")
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child, args.message_length)
+        return
+
+    for algorithm in args.algorithms:
+        kind = args.kind or scaling_benchmark.job_kind(algorithm)
+        print(f"\nMemory profile: {algorithm}")
+        results, _ = benchmark_memory(kind, kind, algorithm, args.message_length)
+        print(json.dumps(results, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+import oqs
+
+import classic_sig
+import raw_stream
+import timing_stats
+
+
+def message_sizes(min_size=64, max_size=1 << 20, factor=2):
+    sizes = []
+    size = min_size
+    while size <= max_size:
+        sizes.append(int(size))
+        size *= factor
+    return sizes
+
+def message_buffer(max_size, seed=None):
+    # One random buffer shared by every message size; each size is a prefix view
+    rng = np.random.default_rng(seed)
+    return memoryview(bytearray(rng.bytes(max_size)))
+
+def fit_cost(sizes, medians):
+    # Least-squares line through (size, median ms): slope is per-byte cost,
+    # intercept the fixed cost of the operation
+    sizes = np.asarray(sizes, dtype=np.float64)
+    medians = np.asarray(medians, dtype=np.float64)
+    slope, intercept = np.polyfit(sizes, medians, 1)
+    predicted = slope * sizes + intercept
+    total = np.square(medians - medians.mean()).sum()
+    r2 = 1 - np.square(medians - predicted).sum() / total if total > 0 else 1.0
+    return {
+        "per_byte_ns": round(float(slope * 1_000_000), 6),
+        "fixed_ms": round(float(intercept), 6),
+        "r2": round(float(r2), 6)
+    }
+
+def _time_sign_verify(sign, verify, message, iterations):
+    sign_times = timing_stats.empty(iterations)
+    verify_times = timing_stats.empty(iterations)
+    failures = 0
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        signature = sign(message)
+        sign_times[i] = (time.perf_counter_ns() - start) / 1_000_000
+
+        start = time.perf_counter_ns()
+        valid = verify(message, signature)
+        verify_times[i] = (time.perf_counter_ns() - start) / 1_000_000
+        if not valid:
+            failures += 1
+    return sign_times, verify_times, failures, len(signature)
+
+def benchmark_sweep(category, algorithm, sizes=None, iterations=50, seed=None):
+    """Benchmark sign/verify across message sizes and fit a linear cost model.
+
+    Messages are prefixes of one preallocated random buffer. The
+    cryptography baselines sign the memoryview slices directly; liboqs-python
+    only accepts bytes (and copies them on every call), so for oqs each size
+    is materialised once before its timing loop.
+    """
+    sizes = sizes or message_sizes()
+    buffer = message_buffer(max(sizes), seed)
+
+    if algorithm in classic_sig.BASELINES:
+        keygen, sign, verify = classic_sig.BASELINES[algorithm]
+        private_key = keygen()
+        public_key = private_key.public_key()
+        sign_message = lambda message: sign(private_key, message)
+        verify_message = lambda message, signature: verify(public_key, message, signature)
+        prepare = lambda view: view
+        cleanup = lambda: None
+    else:
+        sig = oqs.Signature(algorithm)
+        public_key = sig.generate_keypair()
+        sign_message = sig.sign
+        verify_message = lambda message, signature: sig.verify(message, signature, public_key)
+        prepare = bytes
+        cleanup = sig.free
+
+    raw_timings = {}
+    benchmark_results = {
+        "algorithm": algorithm,
+        "category": category,
+        "mode": "message_sweep",
+        "iterations": iterations,
+        "message_sizes": sizes
+    }
+    failures = 0
+    try:
+        for size in sizes:
+            message = prepare(buffer[:size])
+            sign_message(message)  # warm-up for this size
+            sign_times, verify_times, size_failures, signature_size = _time_sign_verify(
+                sign_message, verify_message, message, iterations
+            )
+            failures += size_failures
+            raw_timings[f"sign_{size}B"] = sign_times
+            raw_timings[f"verify_{size}B"] = verify_times
+    finally:
+        cleanup()
+
+    for op, data in raw_timings.items():
+        benchmark_results[f"{op}_ms"] = timing_stats.compute_stats(data)
+
+    benchmark_results["signature_size"] = signature_size
+    benchmark_results["cost_model"] = {
+        op: fit_cost(sizes, [benchmark_results[f"{op}_{size}B_ms"]["median"] for size in sizes])
+        for op in ("sign", "verify")
+    }
+    benchmark_results["correctness_rate"] = round(1 - failures / (iterations * len(sizes)), 6)
+    benchmark_results["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+
+    return benchmark_results, raw_timings
+
+def export_sweep_csv(results, label="default"):
+    path = raw_stream.export_path(label, results["algorithm"], results["timestamp"], "sweep")
+    with open(path, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["operation", "message_length", "median_ms", "p99_ms", "per_byte_ns", "fixed_ms", "r2"])
+        for op in ("sign", "verify"):
+            model = results["cost_model"][op]
+            for size in results["message_sizes"]:
+                stats = results[f"{op}_{size}B_ms"]
+                writer.writerow([op, size, stats["median"], stats["p99"],
+                                 model["per_byte_ns"], model["fixed_ms"], model["r2"]])
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Signature message-size sweep")
+    parser.add_argument("algorithms", nargs="+")
+    parser.add_argument("--min-size", type=int, default=64)
+    parser.add_argument("--max-size", type=int, default=1 << 20)
+    parser.add_argument("--factor", type=float, default=2)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    sizes = message_sizes(args.min_size, args.max_size, args.factor)
+    for algorithm in args.algorithms:
+        category = "legacy_sig" if algorithm in classic_sig.BASELINES else "pqc_sig"
+        print(f"\nSweeping message sizes: {algorithm}")
+        results, _ = benchmark_sweep(category, algorithm, sizes, args.iterations)
+        print(json.dumps(results["cost_model"], indent=4))
+        export_sweep_csv(results, os.getenv("SYSTEM_LABEL", "default"))
+
+if __name__ == "__main__":
+    main()
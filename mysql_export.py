@@ -1,93 +1,317 @@
-import mysql.connector
+from concurrent.futures import Future
 from datetime import datetime
 from dotenv import load_dotenv
+import itertools
 import os
+import queue
+import threading
+import time
 
-load_dotenv()
 
-config = {
-    'host': os.getenv("DB_HOST"),
-    'port': int(os.getenv("DB_PORT")),
-    'user': os.getenv("DB_USER"),
-    'password': os.getenv("DB_PASS"),
-    'database': os.getenv("DB_NAME")
-}
+def db_config():
+    # Read on first connection, so importing this module needs no database settings
+    load_dotenv()
+    return {
+        'host': os.getenv("DB_HOST"),
+        'port': int(os.getenv("DB_PORT", "3306")),
+        'user': os.getenv("DB_USER"),
+        'password': os.getenv("DB_PASS"),
+        'database': os.getenv("DB_NAME")
+    }
 
-def submit_raw_data(results, raw_timings, system_label="default"):
+RAW_COLUMNS = (
+    "algorithm", "category", "operation",
+    "iteration", "duration_ms", "correctness",
+    "timestamp", "system_label"
+)
+
+BASE_SUMMARY_COLUMNS = (
+    "algorithm", "category", "operation",
+    "mean_ms", "median_ms", "max_ms", "min_ms", "stddev_ms", "cv",
+    "signature_size", "key_size", "iterations", "timestamp", "system_label"
+)
+# Added by the schema upgrade in the README; only sent when the results have them
+SIZE_COLUMNS = ("public_key_size", "secret_key_size", "ciphertext_size", "shared_secret_size")
+MEMORY_COLUMNS = ("peak_rss_kb", "heap_peak_kb", "stack_peak_kb")
+SUMMARY_COLUMNS = BASE_SUMMARY_COLUMNS + SIZE_COLUMNS + MEMORY_COLUMNS
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pooled_connection():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import mysql.connector.pooling
+
+            _pool = mysql.connector.pooling.MySQLConnectionPool(
+                pool_name="pqc_benchmark",
+                pool_size=int(os.getenv("DB_POOL_SIZE", "4")),
+                **db_config()
+            )
+    return _pool.get_connection()
+
+def raw_chunk_rows(algorithm, category, operation, first_iteration, timings,
+                   correctness, timestamp, system_label="default"):
+    for idx, duration in enumerate(map(float, timings), first_iteration):
+        yield (
+            algorithm,
+            category,
+            operation,
+            idx,
+            duration,
+            correctness,
+            timestamp,
+            system_label
+        )
+
+def raw_rows(results, raw_timings, system_label="default"):
+    # Generator, so batches are built as they are sent rather than all at once
     algorithm = results["algorithm"]
     category = results["category"]
     timestamp = datetime.strptime(results["timestamp"], "%Y-%m-%d %H:%M:%S")
     correctness = results["correctness_rate"] == 1.0
 
-    data_rows = []
-
     for operation, timings in raw_timings.items():
-        for idx, duration in enumerate(timings, 1):
-            data_rows.append((
-                algorithm,
-                category,
-                operation,
-                idx,
-                duration,
-                correctness,
-                timestamp,
-                system_label
-            ))
-
-    query = """
-    INSERT INTO benchmark_results_raw (
-        algorithm, category, operation,
-        iteration, duration_ms, correctness,
-        timestamp, system_label
-    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    with mysql.connector.connect(**config) as conn:
-        with conn.cursor() as cursor:
-            cursor.executemany(query, data_rows)
-            conn.commit()
+        if "." in operation:
+            continue  # "<op>.<metric>" instrumentation series have no column in this table
+        yield from raw_chunk_rows(algorithm, category, operation, 1, timings,
+                                  correctness, timestamp, system_label)
 
-def submit_summary(results, system_label="default"):
+def summary_columns(results):
+    columns = BASE_SUMMARY_COLUMNS
+    if any(results.get(field) is not None for field in SIZE_COLUMNS):
+        columns += SIZE_COLUMNS
+    if results.get("memory"):
+        columns += MEMORY_COLUMNS
+    return columns
+
+def summary_rows(results, system_label="default"):
+    # One row per operation, with the columns of summary_columns(results)
     algorithm = results["algorithm"]
     category = results["category"]
     iterations = results["iterations"]
     timestamp = datetime.strptime(results["timestamp"], "%Y-%m-%d %H:%M:%S")
     key_size = results.get("key_size")
     signature_size = results.get("signature_size")
+    sizes = tuple(results.get(field) for field in SIZE_COLUMNS)
+    memory = results.get("memory", {})
+    columns = summary_columns(results)
 
-    operations = [key for key in results.keys() if key.endswith("_ms")]
+    operations = [key.replace("_ms", "") for key in results.keys() if key.endswith("_ms")]
+    operations += [op for op in memory if op not in operations]
 
     rows = []
 
-    for op_key in operations:
-        operation = op_key.replace("_ms", "")
-        stats = results[op_key]
+    for operation in operations:
+        stats = results.get(f"{operation}_ms", {})
+        footprint = memory.get(operation, {})
 
-        rows.append((
+        row = dict(zip(SUMMARY_COLUMNS, (
             algorithm,
             category,
             operation,
-            stats["mean"],
-            stats["median"],
-            stats["max"],
-            stats["min"],
-            stats["stddev"],
-            stats["cv"],
+            stats.get("mean"),
+            stats.get("median"),
+            stats.get("max"),
+            stats.get("min"),
+            stats.get("stddev"),
+            stats.get("cv"),
             signature_size,
             key_size,
             iterations,
             timestamp,
-            system_label
-        )) 
-
-    query = """
-    INSERT INTO benchmark_summary (
-        algorithm, category, operation,
-        mean_ms, median_ms, max_ms, min_ms, stddev_ms, cv,
-        signature_size, key_size, iterations, timestamp, system_label
-    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
+            system_label,
+            *sizes,
+            *(footprint.get(field) for field in MEMORY_COLUMNS)
+        )))
+        rows.append(tuple(row[column] for column in columns))
+
+    return rows
+
+def insert_query(table, columns, row_count, placeholder="%s"):
+    values = "(" + ", ".join([placeholder] * len(columns)) + ")"
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        + ", ".join([values] * row_count)
+    )
+
+def submit_raw_data(results, raw_timings, system_label="default"):
+    rows = list(raw_rows(results, raw_timings, system_label))
+    query = insert_query("benchmark_results_raw", RAW_COLUMNS, 1)
+    conn = pooled_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.executemany(query, rows)
+            conn.commit()
+    finally:
+        conn.close()
 
-    with mysql.connector.connect(**config) as conn:
+def submit_summary(results, system_label="default"):
+    rows = summary_rows(results, system_label)
+    query = insert_query("benchmark_summary", summary_columns(results), 1)
+    conn = pooled_connection()
+    try:
         with conn.cursor() as cursor:
             cursor.executemany(query, rows)
-            conn.commit()
\ No newline at end of file
+            conn.commit()
+    finally:
+        conn.close()
+
+RUN_OPERATIONS_QUERY = """
+SELECT algorithm, timestamp, operation
+FROM benchmark_results_raw
+WHERE system_label = %s
+GROUP BY algorithm, timestamp, operation
+"""
+
+RUN_RAW_QUERY = """
+SELECT operation, duration_ms
+FROM benchmark_results_raw
+WHERE system_label = %s AND algorithm = %s AND timestamp = %s
+ORDER BY operation, iteration
+"""
+
+def fetch_raw_timings(system_label="default", connect=pooled_connection, accept=None):
+    # Raw timings of the latest run of every algorithm under system_label,
+    # as {algorithm: {operation: [duration_ms, ...]}}; with accept, only runs
+    # whose set of operations accept() takes count (e.g. one benchmark mode)
+    timings = {}
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(RUN_OPERATIONS_QUERY, (system_label,))
+            runs = {}
+            for algorithm, timestamp, operation in cursor.fetchall():
+                runs.setdefault((algorithm, timestamp), set()).add(operation)
+            latest = {}
+            for (algorithm, timestamp), operations in runs.items():
+                if accept is not None and not accept(operations):
+                    continue
+                if algorithm not in latest or timestamp > latest[algorithm]:
+                    latest[algorithm] = timestamp
+            for algorithm, timestamp in latest.items():
+                cursor.execute(RUN_RAW_QUERY, (system_label, algorithm, timestamp))
+                for operation, duration in cursor.fetchall():
+                    timings.setdefault(algorithm, {}).setdefault(operation, []).append(float(duration))
+    finally:
+        conn.close()
+    return timings
+
+
+class BatchWriter:
+    """Writes benchmark results from a background thread.
+
+    Rows are sent as multi-row INSERT statements of up to batch_size rows.
+    Each submission (one summary or one run's raw rows) is written in a
+    single transaction and committed once, so a failure in a later batch
+    leaves none of its rows behind; the whole submission is then retried on
+    a fresh connection with exponential backoff, and if every retry fails
+    the exception is appended to errors.
+    `connect` is any callable returning a DB-API connection (a pooled MySQL
+    connection by default); pass e.g. sqlite3.connect with placeholder="?" to
+    run against a local database. With max_pending > 0, submitting blocks
+    while that many exports are still queued. Every submit_* call returns a
+    Future that the writer thread resolves once the submission is committed,
+    or fails with its last exception.
+    """
+
+    def __init__(self, connect=pooled_connection, batch_size=1000, placeholder="%s",
+                 max_retries=5, backoff=0.5, max_pending=0):
+        self.connect = connect
+        self.batch_size = batch_size
+        self.placeholder = placeholder
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.errors = []
+        self._queue = queue.Queue(max_pending)
+        self._conn = None
+        self._thread = threading.Thread(target=self._run, name="mysql-export", daemon=True)
+        self._thread.start()
+
+    def submit_summary(self, results, system_label="default"):
+        return self._submit("benchmark_summary", summary_columns(results), summary_rows, (results, system_label))
+
+    def submit_raw_data(self, results, raw_timings, system_label="default"):
+        return self._submit("benchmark_results_raw", RAW_COLUMNS, raw_rows, (results, raw_timings, system_label))
+
+    def submit_raw_chunk(self, algorithm, category, operation, first_iteration, timings,
+                         correctness, timestamp, system_label="default"):
+        return self._submit("benchmark_results_raw", RAW_COLUMNS, raw_chunk_rows, (
+            algorithm, category, operation, first_iteration, timings,
+            correctness, timestamp, system_label
+        ))
+
+    def _submit(self, table, columns, build_rows, args):
+        done = Future()
+        self._queue.put((done, table, columns, build_rows, args))
+        return done
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                done, *export = item
+                try:
+                    self._write_export(*export)
+                except Exception as e:
+                    done.set_exception(e)
+                    raise
+                done.set_result(None)
+            except Exception as e:
+                self.errors.append(e)
+                print(f"Database export failed: {e}")
+            finally:
+                self._queue.task_done()
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _write_export(self, table, columns, build_rows, args):
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self._conn is None:
+                    self._conn = self.connect()
+                cursor = self._conn.cursor()
+                try:
+                    # Rows are rebuilt on every attempt, batch by batch
+                    rows = iter(build_rows(*args))
+                    while batch := list(itertools.islice(rows, self.batch_size)):
+                        query = insert_query(table, columns, len(batch), self.placeholder)
+                        cursor.execute(query, [value for row in batch for value in row])
+                finally:
+                    cursor.close()
+                self._conn.commit()
+                return
+            except Exception:
+                if self._conn is not None:
+                    # A broken connection may fail the rollback; it is closed (returned to the pool) regardless
+                    try:
+                        self._conn.rollback()
+                    except Exception:
+                        pass
+                    try:
+                        self._conn.close()
+                    except Exception:
+                        pass
+                    self._conn = None
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
@@ -0,0 +1,76 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import benchmark_plan
+
+
+def run_job(job, options=None, mode="latency"):
+    # options are extra keyword arguments passed to the benchmark for this mode
+    return benchmark_plan.run(job, options, mode)
+
+
+def allowed_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def physical_cores():
+    # One logical CPU per (package, core) pair, so SMT siblings stay idle
+    cores = {}
+    for cpu in allowed_cpus():
+        topology = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology")
+        try:
+            package = (topology / "physical_package_id").read_text().strip()
+            core = (topology / "core_id").read_text().strip()
+            key = (package, core)
+        except OSError:
+            key = cpu
+        cores.setdefault(key, cpu)
+    return sorted(cores.values())
+
+def _pin_worker(cpu_queue):
+    cpu = cpu_queue.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+
+
+def run_jobs(jobs, workers=1, isolated=False, options=None, mode="latency"):
+    """Yield (job, results, raw_timings, error) as jobs complete.
+
+    With workers <= 1 the jobs run in order in the current process. Otherwise
+    each job is sent to a pool of worker processes, each pinned to its own
+    CPU. In isolated mode only one logical CPU per physical core is used.
+    """
+    if workers <= 1:
+        for job in jobs:
+            print(f"\nBenchmarking {benchmark_plan.describe(job)}")
+            try:
+                results, raw_timings = run_job(job, options, mode)
+            except Exception as e:
+                yield job, None, None, e
+                continue
+            yield job, results, raw_timings, None
+        return
+
+    cpus = physical_cores() if isolated else allowed_cpus()
+    workers = min(workers, len(cpus))
+
+    cpu_queue = multiprocessing.Queue()
+    for cpu in cpus[:workers]:
+        cpu_queue.put(cpu)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_pin_worker,
+                             initargs=(cpu_queue,)) as pool:
+        futures = {pool.submit(run_job, job, options, mode): job for job in jobs}
+        print(f"\nBenchmarking {len(jobs)} jobs on {workers} workers (CPUs {cpus[:workers]})")
+        for future in as_completed(futures):
+            job = futures[future]
+            print(f"\nFinished {benchmark_plan.describe(job)}")
+            try:
+                results, raw_timings = future.result()
+            except Exception as e:
+                yield job, None, None, e
+                continue
+            yield job, results, raw_timings, None
@@ -0,0 +1,166 @@
+import csv
+import time
+from datetime import datetime
+from pathlib import Path
+
+import live_metrics
+import timing_stats
+
+
+def export_path(label, algorithm, timestamp, kind, suffix=".csv"):
+    timestamp = timestamp.replace(":", "-").replace(" ", "_")
+    base_dir = Path("exports") / label
+    base_dir.mkdir(parents=True, exist_ok=True)
+    return base_dir / f"{algorithm}_{timestamp}_{kind}{suffix}"
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.file = open(path, mode="w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["operation", "iteration", "duration_ms"])
+
+    def write(self, operation, first_iteration, chunk, correct):
+        self.writer.writerows(
+            (operation, idx, duration)
+            for idx, duration in enumerate(chunk.tolist(), first_iteration)
+        )
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class DatabaseSink:
+    def __init__(self, algorithm, category, timestamp, label, max_pending=4):
+        import mysql_export
+
+        self.algorithm = algorithm
+        self.category = category
+        self.timestamp = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        self.label = label
+        # A bounded queue applies backpressure instead of buffering the whole run
+        self.writer = mysql_export.BatchWriter(max_pending=max_pending)
+
+    def write(self, operation, first_iteration, chunk, correct):
+        self.writer.submit_raw_chunk(
+            self.algorithm, self.category, operation, first_iteration,
+            chunk.copy(), correct, self.timestamp, self.label
+        )
+
+    def close(self):
+        self.writer.close()
+
+
+class StreamingStore:
+    """Fixed-size sample buffers that spill to sinks as they fill.
+
+    Drop-in replacement for timing_stats.SampleStore for long runs: every
+    chunk_size iterations the buffers are summarised into StreamingStats and
+    written to the sinks, so memory stays constant and a crash only loses the
+    current chunk. Raw rows carry per-chunk correctness.
+    """
+
+    observer = None
+
+    def __init__(self, operations, iterations, sinks, chunk_size, timestamp):
+        self.timestamp = timestamp
+        self.iterations = iterations
+        self.chunk_size = min(chunk_size, iterations)
+        self.timings = {op: timing_stats.empty(self.chunk_size) for op in operations}
+        self.stats = {op: timing_stats.StreamingStats() for op in operations}
+        self.metrics = {}
+        self.sinks = sinks
+        self.slot = 0
+        self.count = 0
+        self.failures = 0
+        self.chunk_failures = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def spill(self):
+        first_iteration = self.count - self.slot + 1
+        for op, data in self.timings.items():
+            chunk = data[:self.slot]
+            self.stats[op].update(chunk)
+            for sink in self.sinks:
+                sink.write(op, first_iteration, chunk, self.chunk_failures == 0)
+        self.slot = 0
+        self.chunk_failures = 0
+
+    def room(self):
+        if self.count >= self.iterations:
+            return False
+        if self.slot == self.chunk_size:
+            self.spill()
+        return True
+
+    def block(self, size):
+        return min(size, self.chunk_size - self.slot, self.iterations - self.count)
+
+    def commit(self, n=1):
+        self.slot += n
+        self.count += n
+        if self.observer is not None:
+            self.observer.committed(self, n)
+
+    def fail(self):
+        self.failures += 1
+        self.chunk_failures += 1
+
+    def close(self):
+        if self.sinks is None:
+            return
+        try:
+            if self.slot:
+                self.spill()
+        finally:
+            for sink in self.sinks:
+                sink.close()
+            self.sinks = None
+
+    def raw_timings(self):
+        # Everything has already gone to the sinks
+        return {}
+
+    def summary(self, op):
+        return self.stats[op].summary()
+
+    def metric_summary(self):
+        return {}
+
+
+def open_store(operations, iterations, algorithm, category, sampler=None, stream=None, metrics=()):
+    """Return the sample store for a benchmark loop.
+
+    `stream` is None for in-memory timings, or a dict with chunk_size, label,
+    database and columnar (bools) to stream raw timings to CSV (and MySQL
+    and .npy columns) instead.
+    """
+    store = _open_store(operations, iterations, algorithm, category, sampler, stream, metrics)
+    # Live progress for the metrics endpoint, when one is running in this process
+    store.observer = live_metrics.observe(algorithm, category, operations, iterations)
+    return store
+
+def _open_store(operations, iterations, algorithm, category, sampler, stream, metrics):
+    if stream is None:
+        return timing_stats.SampleStore(operations, iterations, sampler, metrics)
+    if sampler is not None:
+        raise ValueError("Adaptive sampling needs in-memory timings and cannot be streamed")
+    if metrics:
+        raise ValueError("Instrumented runs keep their metrics in memory and cannot be streamed")
+
+    label = stream.get("label", "default")
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    sinks = [CsvSink(export_path(label, algorithm, timestamp, "raw"))]
+    if stream.get("database", False):
+        sinks.append(DatabaseSink(algorithm, category, timestamp, label))
+    if stream.get("columnar", False):
+        import columnar_export
+        sinks.append(columnar_export.NpySink(operations, iterations, algorithm, category, timestamp, label))
+
+    return StreamingStore(operations, iterations, sinks, stream.get("chunk_size", 65536), timestamp)
@@ -0,0 +1,230 @@
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+
+import raw_stream
+
+
+RAW_FILE = re.compile(r"^(?P<algorithm>.+)_(?P<timestamp>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})_raw\.csv$")
+
+
+def read_raw_csv(path):
+    timings = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            timings.setdefault(row["operation"], []).append(float(row["duration_ms"]))
+    return {op: np.asarray(data) for op, data in timings.items()}
+
+def run_mode(operations):
+    """Benchmark mode of a run, from the names of its raw timing series.
+
+    Used where the run's results JSON is not at hand (the database has no
+    mode column); the names are as the benchmark modules write them.
+    """
+    operations = set(operations)
+    if operations and all(op.endswith("_batch") for op in operations):
+        return "throughput"
+    if operations & {"verify_serial", "verify_pool"}:
+        return "bulk_verify"
+    if "construct" in operations or "import_secret_key" in operations:
+        return "context"
+    if any(re.search(r"_\d+B$", op) for op in operations):
+        return "message_sweep"
+    if operations & {"client", "server", "compute"}:
+        return "handshake"
+    return "latency"
+
+def _results_mode(raw_file):
+    # The mode stored next to a raw CSV, or None for exports without results JSON
+    results_file = raw_file.with_name(raw_file.name[:-len("_raw.csv")] + "_results.json")
+    try:
+        with open(results_file, "r") as f:
+            return json.load(f).get("mode", "latency")
+    except (OSError, ValueError):
+        return None
+
+def load_csv_runs(path, mode=None):
+    """Raw timings of the latest run per algorithm in an export directory.
+
+    path is an exports/<label> directory or a single *_raw.csv file. With
+    mode, runs of other benchmark modes are skipped (the mode comes from the
+    run's _results.json, or its operation names without one).
+    Returns {algorithm: {operation: array}}.
+    """
+    path = Path(path)
+    files = [path] if path.is_file() else sorted(path.glob("*_raw.csv"))
+    # Newest first, so each algorithm's first run of the mode is its latest
+    runs = []
+    for file in files:
+        match = RAW_FILE.match(file.name)
+        if match is not None:
+            runs.append((match.group("timestamp"), match.group("algorithm"), file))
+    latest = {}
+    for _, algorithm, file in sorted(runs, reverse=True):
+        if algorithm in latest:
+            continue
+        stored = _results_mode(file) if mode is not None else None
+        if stored is not None and stored != mode:
+            continue
+        timings = read_raw_csv(file)
+        if mode is None or stored == mode or run_mode(timings) == mode:
+            latest[algorithm] = timings
+    return latest
+
+def load_runs(source, mode=None):
+    # "mysql:<system_label>" reads benchmark_results_raw, anything else is a path
+    if source.startswith("mysql:"):
+        import mysql_export
+        accept = None if mode is None else (lambda operations: run_mode(operations) == mode)
+        runs = mysql_export.fetch_raw_timings(source[len("mysql:"):], accept=accept)
+        return {
+            algorithm: {op: np.asarray(data) for op, data in ops.items()}
+            for algorithm, ops in runs.items()
+        }
+    return load_csv_runs(source, mode)
+
+
+def mann_whitney_u(baseline, candidate):
+    """One-sided Mann-Whitney U test that candidate timings tend to be larger.
+
+    Uses the normal approximation with tie and continuity correction, which
+    is accurate for the sample sizes the benchmarks produce (n >= 20).
+    Returns (p_value, probability that a candidate timing exceeds a baseline one).
+    """
+    n1, n2 = baseline.size, candidate.size
+    values, inverse, counts = np.unique(np.concatenate([baseline, candidate]),
+                                        return_inverse=True, return_counts=True)
+    # Average rank of each distinct value, so ties share their rank
+    ranks = (np.cumsum(counts) - (counts - 1) / 2)[inverse]
+    u = ranks[n1:].sum() - n2 * (n2 + 1) / 2
+    n = n1 + n2
+    ties = float(np.sum(counts.astype(np.float64) ** 3 - counts))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    if sigma == 0:
+        return 1.0, 0.5
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return 1 - NormalDist().cdf(z), u / (n1 * n2)
+
+def median_ratio_ci(baseline, candidate, n_boot=2000, confidence=0.95, rng=None):
+    # Bootstrap CI of candidate/baseline median, resampling each side's median
+    # through the Beta order-statistic trick used by timing_stats
+    rng = np.random.default_rng(rng)
+    draws = []
+    for data in (np.sort(baseline), np.sort(candidate)):
+        n = data.size
+        k = (n + 1) // 2
+        idx = np.floor(rng.beta(k, n - k + 1, size=n_boot) * n).astype(np.intp)
+        draws.append(data[np.minimum(idx, n - 1)])
+    ratios = draws[1] / draws[0]
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(ratios, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+def compare_operation(baseline, candidate, threshold=0.05, alpha=0.01, rng=None):
+    base_median = float(np.median(baseline))
+    cand_median = float(np.median(candidate))
+    change = cand_median / base_median - 1 if base_median > 0 else 0.0
+    p_slower, p_superiority = mann_whitney_u(baseline, candidate)
+    p_faster, _ = mann_whitney_u(candidate, baseline)
+    ratio_low, ratio_high = median_ratio_ci(baseline, candidate, rng=rng)
+
+    # A verdict needs all three: a large enough median change, a significant
+    # rank test, and a bootstrap CI of the ratio that excludes 1
+    if change > threshold and p_slower < alpha and ratio_low > 1:
+        verdict = "regression"
+    elif change < -threshold and p_faster < alpha and ratio_high < 1:
+        verdict = "improvement"
+    else:
+        verdict = "unchanged"
+
+    return {
+        "baseline_median_ms": round(base_median, 6),
+        "candidate_median_ms": round(cand_median, 6),
+        "change": round(change, 6),
+        "ratio_ci_low": round(ratio_low, 6),
+        "ratio_ci_high": round(ratio_high, 6),
+        "p_slower": float(f"{p_slower:.3g}"),
+        "p_faster": float(f"{p_faster:.3g}"),
+        "prob_slower": round(float(p_superiority), 6),
+        "baseline_n": int(baseline.size),
+        "candidate_n": int(candidate.size),
+        "verdict": verdict
+    }
+
+def compare_runs(baseline_runs, candidate_runs, threshold=0.05, alpha=0.01, algorithms=None, seed=None):
+    """Compare every (algorithm, operation) present in both sets of runs."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for algorithm in sorted(set(baseline_runs) & set(candidate_runs)):
+        if algorithms and algorithm not in algorithms:
+            continue
+        baseline, candidate = baseline_runs[algorithm], candidate_runs[algorithm]
+        for operation in sorted(set(baseline) & set(candidate)):
+            if baseline[operation].size < 2 or candidate[operation].size < 2:
+                continue
+            rows.append({
+                "algorithm": algorithm,
+                "operation": operation,
+                **compare_operation(baseline[operation], candidate[operation], threshold, alpha, rng)
+            })
+    return rows
+
+def format_report(rows):
+    lines = [f"{'algorithm':<32} {'operation':<14} {'base ms':>10} {'cand ms':>10} {'change':>8} {'p':>9}  verdict"]
+    for row in rows:
+        p = row["p_slower"] if row["change"] >= 0 else row["p_faster"]
+        lines.append(
+            f"{row['algorithm']:<32} {row['operation']:<14} {row['baseline_median_ms']:>10.4f} "
+            f"{row['candidate_median_ms']:>10.4f} {row['change']:>+8.1%} {p:>9.2g}  {row['verdict']}"
+        )
+    counts = {verdict: sum(row["verdict"] == verdict for row in rows)
+              for verdict in ("regression", "improvement", "unchanged")}
+    lines.append(", ".join(f"{count} {verdict}" for verdict, count in counts.items()))
+    return "\n".join(lines)
+
+def export_report(rows, label="default"):
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    path = raw_stream.export_path(label, "compare", timestamp, "regression")
+    with open(path, mode="w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["algorithm", "operation"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare benchmark runs and flag significant regressions")
+    parser.add_argument("baseline", help="exports/<label> directory, *_raw.csv file or mysql:<system_label>")
+    parser.add_argument("candidate", help="exports/<label> directory, *_raw.csv file or mysql:<system_label>")
+    parser.add_argument("--threshold", type=float, default=0.05, help="minimum relative median change")
+    parser.add_argument("--alpha", type=float, default=0.01, help="significance level")
+    parser.add_argument("--algorithm", action="append", default=None)
+    parser.add_argument("--mode", default="latency",
+                        help="only compare runs of this mode, e.g. throughput or bulk_verify ('any' for the latest run of each)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the full comparison as JSON")
+    args = parser.parse_args(argv)
+
+    mode = None if args.mode == "any" else args.mode
+    rows = compare_runs(load_runs(args.baseline, mode), load_runs(args.candidate, mode),
+                        args.threshold, args.alpha, args.algorithm, args.seed)
+    if not rows:
+        # A gate that compared nothing must not pass
+        print(f"No {args.mode} runs with a common algorithm and operation in both sources; nothing was compared")
+        return 2
+    print(json.dumps(rows, indent=4) if args.json else format_report(rows))
+    print(f"Report written to {export_report(rows, os.getenv('SYSTEM_LABEL', 'default'))}")
+    # Non-zero exit so CI or a deployment script can stop on a slowdown
+    return 1 if any(row["verdict"] == "regression" for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import csv
+import json
+
+import columnar_export
+import raw_stream
+import series_analysis
+import stable_mode
+import timing_stats
+
+
+# Shared by main.py and cli.py; kept free of liboqs and the database driver
+# so that importing it does not load the whole suite
+
+# Artefact sizes in bytes, recorded by every benchmark that knows them
+SIZE_FIELDS = ("public_key_size", "secret_key_size", "ciphertext_size", "shared_secret_size", "signature_size")
+# Per-operation footprints of memory-mode runs (see memory_profile)
+MEMORY_FIELDS = ("peak_rss_kb", "process_peak_rss_kb", "heap_peak_kb", "stack_peak_kb", "py_alloc_peak_bytes")
+
+
+def export_csv(results, raw_timings, label="default"):
+    # Instrumented runs add one median and one mean column per extra metric
+    metrics = results.get("metrics", {})
+    metric_names = sorted({name for op_metrics in metrics.values() for name in op_metrics})
+
+    # Memory-mode runs have per-operation footprints instead of timings
+    memory = results.get("memory", {})
+    operations = [k.replace("_ms", "") for k in results if k.endswith("_ms")]
+    operations += [op for op in memory if op not in operations]
+    sizes = [results.get(field) for field in SIZE_FIELDS]
+    analysis = results.get("analysis", {})
+
+    # Summary CSV
+    summary_file = raw_stream.export_path(label, results["algorithm"], results["timestamp"], "summary")
+    with open(summary_file, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "operation", *timing_stats.SUMMARY_FIELDS,
+            *(f"{name}_{stat}" for name in metric_names for stat in ("median", "mean")),
+            *SIZE_FIELDS, *MEMORY_FIELDS, *series_analysis.SUMMARY_FIELDS
+        ])
+        for op in operations:
+            stats = results.get(f"{op}_ms", {})
+            op_metrics = metrics.get(op, {})
+            writer.writerow([
+                op, *(stats.get(field) for field in timing_stats.SUMMARY_FIELDS),
+                *(op_metrics.get(name, {}).get(stat) for name in metric_names for stat in ("median", "mean")),
+                *sizes, *(memory.get(op, {}).get(field) for field in MEMORY_FIELDS),
+                *series_analysis.summary_values(analysis.get(op, {}))
+            ])
+
+    # Raw timings CSV; streamed runs have already written it
+    if not raw_timings:
+        return
+    raw_file = raw_stream.export_path(label, results["algorithm"], results["timestamp"], "raw")
+    with open(raw_file, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["operation", "iteration", "duration_ms", *metric_names, "sample_class"])
+        for operation, timings in raw_timings.items():
+            if "." in operation:
+                continue  # "<op>.<metric>" series become columns of their operation
+            columns = [timings, *(raw_timings[f"{operation}.{name}"] for name in metric_names),
+                       series_analysis.sample_classes(timings)]
+            for idx, row in enumerate(zip(*columns), 1):
+                writer.writerow([operation, idx, *row])
+
+def export_results_json(results, label="default"):
+    # The full results next to the CSVs, so `cli.py export` can load them into MySQL later
+    path = raw_stream.export_path(label, results["algorithm"], results["timestamp"], "results", ".json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=4)
+    return path
+
+def report(results, raw_timings, system_label, writer=None, columnar=False):
+    # writer is None for runs without a database; returns its export futures
+    print(json.dumps(results, indent=4))
+    exports = []
+    if writer is not None:
+        exports.append(writer.submit_summary(results, system_label))
+        exports.append(writer.submit_raw_data(results, raw_timings, system_label))
+    export_csv(results, raw_timings, system_label)
+    export_results_json(results, system_label)
+    if columnar:
+        columnar_export.export_columnar(results, raw_timings, system_label)
+    if results.get("mode") == "message_sweep":
+        # message_sweep needs liboqs, so it is imported on use
+        import message_sweep
+        message_sweep.export_sweep_csv(results, system_label)
+    if "environment" in results:
+        stable_mode.export_environment(results, system_label)
+    return exports
+
+def report_journaled(journal, job, results, raw_timings, system_label, writer=None, columnar=False):
+    """Report a journaled job and mark it reported once the database has its rows.
+
+    The writer thread marks the job when the last of its exports commits, so
+    the next job never waits on the database; if an export fails the job is
+    left unmarked and a resumed run reports it again. Returns the exports.
+    """
+    exports = report(results, raw_timings, system_label, writer, columnar)
+    if not exports:
+        journal.mark_reported(job)
+        return exports
+
+    def exported(last):
+        # Exports are written in submission order, so the others are done too
+        if all(export.exception() is None for export in exports):
+            journal.mark_reported(job)
+
+    exports[-1].add_done_callback(exported)
+    return exports
+
+def failed_exports(reported):
+    """Jobs of (job, exports) pairs with a failed export; call after writer.flush()."""
+    failed = [job for job, exports in reported if any(export.exception() is not None for export in exports)]
+    for job in failed:
+        print(f"Database export of {job.algorithm} failed; rerun with --resume to export it again")
+    return failed
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import platform
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+CACHE_DIR = Path("exports") / "cache"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    cache_key TEXT PRIMARY KEY,
+    algorithm TEXT NOT NULL,
+    category TEXT NOT NULL,
+    system_label TEXT NOT NULL,
+    liboqs_version TEXT,
+    cryptography_version TEXT,
+    cpu_model TEXT,
+    params TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    results TEXT NOT NULL,
+    raw_file TEXT
+)
+"""
+
+
+def cpu_model():
+    try:
+        with open("/proc/cpuinfo", "r") as file:
+            for line in file:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+def environment():
+    import cryptography
+    import oqs
+
+    return {
+        "liboqs_version": oqs.oqs_version(),
+        "liboqs_python_version": oqs.oqs_python_version(),
+        "cryptography_version": cryptography.__version__,
+        "python_version": platform.python_version(),
+        "cpu_model": cpu_model()
+    }
+
+def cache_key(job, params, env, system_label):
+    payload = json.dumps([list(job), params, env, system_label], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """On-disk cache of benchmark results keyed by job, parameters and host.
+
+    The index is a SQLite database; raw timings are kept next to it as .npz
+    files so cached runs can be re-exported in full.
+    """
+
+    def __init__(self, directory=CACHE_DIR, env=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.env = env or environment()
+        self.conn = sqlite3.connect(self.directory / "index.sqlite")
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def key(self, job, params, system_label):
+        return cache_key(job, params, self.env, system_label)
+
+    def get(self, key, max_age_s=None):
+        row = self.conn.execute(
+            "SELECT created_at, results, raw_file FROM results WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        created_at, results, raw_file = row
+        if max_age_s is not None and time.time() - created_at > max_age_s:
+            return None
+
+        raw_timings = {}
+        if raw_file:
+            try:
+                with np.load(self.directory / raw_file) as data:
+                    raw_timings = {op: data[op] for op in data.files}
+            except OSError:
+                return None
+        return json.loads(results), raw_timings
+
+    def put(self, key, params, system_label, results, raw_timings):
+        raw_file = None
+        if raw_timings:
+            raw_file = f"{key}.npz"
+            np.savez(self.directory / raw_file, **raw_timings)
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key, results["algorithm"], results["category"], system_label,
+                self.env["liboqs_version"], self.env["cryptography_version"], self.env["cpu_model"],
+                json.dumps(params, sort_keys=True, default=str), time.time(),
+                json.dumps(results), raw_file
+            )
+        )
+        self.conn.commit()
+
+    def discard(self, key):
+        row = self.conn.execute("SELECT raw_file FROM results WHERE cache_key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        if row[0]:
+            (self.directory / row[0]).unlink(missing_ok=True)
+        self.conn.execute("DELETE FROM results WHERE cache_key = ?", (key,))
+        self.conn.commit()
+
+    def evict(self, max_age_s=None, other_versions=False):
+        """Drop entries older than max_age_s and/or from other library versions."""
+        clauses = []
+        args = []
+        if max_age_s is not None:
+            clauses.append("created_at < ?")
+            args.append(time.time() - max_age_s)
+        if other_versions:
+            clauses.append("liboqs_version IS NOT ? OR cryptography_version IS NOT ?")
+            args += [self.env["liboqs_version"], self.env["cryptography_version"]]
+        if not clauses:
+            return 0
+
+        where = " OR ".join(f"({clause})" for clause in clauses)
+        stale = self.conn.execute(f"SELECT raw_file FROM results WHERE {where}", args).fetchall()
+        for (raw_file,) in stale:
+            if raw_file:
+                (self.directory / raw_file).unlink(missing_ok=True)
+        self.conn.execute(f"DELETE FROM results WHERE {where}", args)
+        self.conn.commit()
+        return len(stale)
@@ -0,0 +1,114 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+import result_cache
+
+
+JOURNAL_DIR = Path("exports") / "journal"
+
+
+def _atomic_write(path, write):
+    # Write to a temporary file in the same directory and rename it over the
+    # target, so a crash leaves either the old file or the complete new one
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
+
+
+class RunJournal:
+    """Local checkpoints of the completed jobs of a run, for --resume.
+
+    Every finished job is written to exports/journal/<label>/ before it is
+    reported: its raw timings as <key>.npz, then its results as <key>.json,
+    which marks the entry complete. Keys follow result_cache (job,
+    parameters, library versions, CPU model and system label), so a resumed
+    run only skips jobs that ran with the same settings on the same host.
+    Entries also record whether the job was reported (exports and database
+    submit), so a run interrupted in between reports it on resume.
+    """
+
+    def __init__(self, system_label, params, directory=JOURNAL_DIR, env=None):
+        self.system_label = system_label
+        self.params = params
+        self.directory = Path(directory) / system_label
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.env = env or result_cache.environment()
+
+    def key(self, job):
+        return result_cache.cache_key(job[:4], self.params, self.env, self.system_label)
+
+    def start(self, jobs, resume=False):
+        """Split jobs into (pending, completed) for a new or resumed run.
+
+        completed holds (job, results, raw_timings, reported) entries. A new
+        run drops the entries of its jobs so that a later resume does not
+        skip them on the strength of an older run.
+        """
+        if not resume:
+            for job in jobs:
+                self.discard(job)
+            return list(jobs), []
+
+        pending, completed = [], []
+        for job in jobs:
+            entry = self.get(job)
+            if entry is None:
+                pending.append(job)
+            else:
+                completed.append((job, *entry))
+        return pending, completed
+
+    def get(self, job):
+        key = self.key(job)
+        try:
+            with open(self.directory / f"{key}.json", "r") as file:
+                entry = json.load(file)
+            raw_timings = {}
+            if entry["raw_file"]:
+                with np.load(self.directory / entry["raw_file"]) as data:
+                    raw_timings = {op: data[op] for op in data.files}
+        except (OSError, ValueError):
+            return None
+        return entry["results"], raw_timings, entry["reported"]
+
+    def record(self, job, results, raw_timings):
+        key = self.key(job)
+        raw_file = None
+        if raw_timings:
+            raw_file = f"{key}.npz"
+            _atomic_write(self.directory / raw_file, lambda file: np.savez(file, **raw_timings))
+        self._write_entry(key, {
+            "job": list(job[:4]),
+            "params": self.params,
+            "completed_at": time.time(),
+            "reported": False,
+            "raw_file": raw_file,
+            "results": results
+        })
+
+    def mark_reported(self, job):
+        key = self.key(job)
+        try:
+            with open(self.directory / f"{key}.json", "r") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return
+        entry["reported"] = True
+        self._write_entry(key, entry)
+
+    def _write_entry(self, key, entry):
+        payload = json.dumps(entry, default=str).encode()
+        _atomic_write(self.directory / f"{key}.json", lambda file: file.write(payload))
+
+    def discard(self, job):
+        key = self.key(job)
+        # The .json goes first: without it the entry no longer counts as complete
+        (self.directory / f"{key}.json").unlink(missing_ok=True)
+        (self.directory / f"{key}.npz").unlink(missing_ok=True)
@@ -0,0 +1,248 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import oqs
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import classic_kem
+import classic_sig
+import raw_stream
+import timing_stats
+
+
+OPERATIONS = {
+    "kem": ("keygen", "encap", "decap"),
+    "sig": ("keygen", "sign", "verify"),
+    "classic_kem": ("keygen", "encap", "decap"),
+    "classic_sig": ("keygen", "sign", "verify")
+}
+
+
+def job_kind(algorithm):
+    if algorithm == "RSA-OAEP_2048-bit":
+        return "classic_kem"
+    if algorithm in classic_sig.BASELINES:
+        return "classic_sig"
+    if algorithm in oqs.get_enabled_kem_mechanisms():
+        return "kem"
+    if algorithm in oqs.get_enabled_sig_mechanisms():
+        return "sig"
+    raise ValueError(f"Unknown or disabled algorithm: {algorithm}")
+
+def make_operation(kind, algorithm, operation, message_length=1024):
+    # Returns (op, cleanup): op() runs one operation on inputs prepared here,
+    # so every thread or process gets its own context and keys
+    message = b'\xFF' * message_length
+
+    if kind == "kem":
+        kem = oqs.KeyEncapsulation(algorithm)
+        public_key = kem.generate_keypair()
+        ciphertext, _ = kem.encap_secret(public_key)
+        ops = {
+            "keygen": kem.generate_keypair,
+            "encap": lambda: kem.encap_secret(public_key),
+            "decap": lambda: kem.decap_secret(ciphertext)
+        }
+        return ops[operation], kem.free
+
+    if kind == "sig":
+        sig = oqs.Signature(algorithm)
+        public_key = sig.generate_keypair()
+        signature = sig.sign(message)
+        ops = {
+            "keygen": sig.generate_keypair,
+            "sign": lambda: sig.sign(message),
+            "verify": lambda: sig.verify(message, signature, public_key)
+        }
+        return ops[operation], sig.free
+
+    if kind == "classic_kem":
+        oaep = classic_kem.OAEP
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        public_key = private_key.public_key()
+        secret = os.urandom(32)
+        ciphertext = public_key.encrypt(secret, oaep)
+        ops = {
+            "keygen": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+            "encap": lambda: public_key.encrypt(secret, oaep),
+            "decap": lambda: private_key.decrypt(ciphertext, oaep)
+        }
+        return ops[operation], lambda: None
+
+    if kind == "classic_sig":
+        keygen, sign, verify = classic_sig.BASELINES[algorithm]
+        private_key = keygen()
+        public_key = private_key.public_key()
+        signature = sign(private_key, message)
+        ops = {
+            "keygen": keygen,
+            "sign": lambda: sign(private_key, message),
+            "verify": lambda: verify(public_key, message, signature)
+        }
+        return ops[operation], lambda: None
+
+    raise ValueError(f"Unknown job kind: {kind}")
+
+def _run_worker(kind, algorithm, operation, ops_per_worker, barrier):
+    op, cleanup = make_operation(kind, algorithm, operation)
+    try:
+        op()  # warm-up
+        latencies = timing_stats.empty(ops_per_worker)
+        barrier.wait()
+        started = time.perf_counter_ns()
+        for i in range(ops_per_worker):
+            start = time.perf_counter_ns()
+            op()
+            latencies[i] = (time.perf_counter_ns() - start) / 1_000_000
+        finished = time.perf_counter_ns()
+    finally:
+        cleanup()
+    return started, finished, latencies
+
+def _process_entry(args, barrier, results):
+    try:
+        results.put(_run_worker(*args, barrier))
+    except Exception as e:
+        barrier.abort()
+        results.put(e)
+
+
+def run_threads(kind, algorithm, operation, workers, ops_per_worker):
+    barrier = threading.Barrier(workers)
+    outcomes = [None] * workers
+    errors = []
+
+    def target(index):
+        try:
+            outcomes[index] = _run_worker(kind, algorithm, operation, ops_per_worker, barrier)
+        except Exception as e:
+            barrier.abort()
+            errors.append(e)
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return outcomes
+
+def run_processes(kind, algorithm, operation, workers, ops_per_worker):
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    args = (kind, algorithm, operation, ops_per_worker)
+    processes = [
+        multiprocessing.Process(target=_process_entry, args=(args, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Drain the queue before joining so large latency arrays cannot block the children
+    outcomes = []
+    try:
+        while len(outcomes) < workers:
+            try:
+                outcomes.append(results.get(timeout=1))
+            except queue.Empty:
+                # A child killed by a signal (segfault, OOM killer) never reports back
+                dead = [process for process in processes if process.exitcode not in (None, 0)]
+                if dead or all(process.exitcode is not None for process in processes):
+                    barrier.abort()
+                    codes = ", ".join(str(process.exitcode) for process in dead) or "0"
+                    raise RuntimeError(f"{algorithm} {operation} worker exited without a result (exit code {codes})")
+    finally:
+        if len(outcomes) < workers:
+            for process in processes:
+                process.terminate()
+    for process in processes:
+        process.join()
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            raise outcome
+    return outcomes
+
+def summarize_level(workers, outcomes):
+    started = min(o[0] for o in outcomes)
+    finished = max(o[1] for o in outcomes)
+    latencies = [o[2] for o in outcomes]
+    total_ops = sum(data.size for data in latencies)
+    elapsed_s = (finished - started) / 1_000_000_000
+    return {
+        "workers": workers,
+        "total_ops": total_ops,
+        "elapsed_s": round(elapsed_s, 6),
+        "ops_per_sec": round(total_ops / elapsed_s, 3),
+        "latency_ms": timing_stats.compute_stats(np.concatenate(latencies)),
+        "worker_median_ms": [round(float(np.median(data)), 6) for data in latencies]
+    }
+
+def benchmark_scaling(algorithm, operation, max_workers=None, ops_per_worker=1000, modes=("threads", "processes")):
+    """Run one operation from 1..max_workers threads and processes.
+
+    Reports aggregate throughput, the latency distribution over all workers,
+    each worker's median, and scaling efficiency relative to one worker.
+    """
+    kind = job_kind(algorithm)
+    if operation not in OPERATIONS[kind]:
+        raise ValueError(f"{algorithm} has no operation {operation}; expected one of {OPERATIONS[kind]}")
+    max_workers = max_workers or os.cpu_count() or 1
+    runners = {"threads": run_threads, "processes": run_processes}
+
+    results = {
+        "algorithm": algorithm,
+        "kind": kind,
+        "operation": operation,
+        "ops_per_worker": ops_per_worker,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    }
+    for mode in modes:
+        levels = []
+        for workers in range(1, max_workers + 1):
+            print(f"{algorithm} {operation}: {workers} {mode}")
+            levels.append(summarize_level(workers, runners[mode](kind, algorithm, operation, workers, ops_per_worker)))
+        baseline = levels[0]["ops_per_sec"]
+        for level in levels:
+            level["efficiency"] = round(level["ops_per_sec"] / (level["workers"] * baseline), 6)
+        results[mode] = levels
+
+    return results
+
+def export_scaling_csv(results, label="default"):
+    path = raw_stream.export_path(label, f"{results['algorithm']}_{results['operation']}",
+                                  results["timestamp"], "scaling")
+    with open(path, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["mode", "workers", "ops_per_sec", "efficiency", *timing_stats.SUMMARY_FIELDS])
+        for mode in ("threads", "processes"):
+            for level in results.get(mode, []):
+                writer.writerow([
+                    mode, level["workers"], level["ops_per_sec"], level["efficiency"],
+                    *(level["latency_ms"][field] for field in timing_stats.SUMMARY_FIELDS)
+                ])
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-core scaling benchmark for a single operation")
+    parser.add_argument("algorithm")
+    parser.add_argument("operation")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--ops-per-worker", type=int, default=1000)
+    parser.add_argument("--mode", choices=["threads", "processes", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ("threads", "processes") if args.mode == "both" else (args.mode,)
+    results = benchmark_scaling(args.algorithm, args.operation, args.max_workers, args.ops_per_worker, modes)
+    print(json.dumps(results, indent=4))
+    export_scaling_csv(results, os.getenv("SYSTEM_LABEL", "default"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import math
+
+import numpy as np
+
+import timing_stats
+
+
+# Below this many samples the tests have too little data to mean anything
+MIN_SAMPLES = 20
+# Change-point penalty in units of sigma^2 * log(n); higher is more conservative
+PENALTY = 3.0
+# CONFIG_HZ values a Linux kernel is commonly built with
+TICK_HZ = (100, 250, 300, 1000)
+
+SUMMARY_FIELDS = (
+    "warmup_iterations", "outlier_fraction", "steady_median", "steady_p99", "steady_cv",
+    "period_iterations", "period_ms"
+)
+
+
+def _robust_sigma(x):
+    # Noise scale from successive differences, so a level shift barely moves it
+    diffs = np.diff(x)
+    return 1.4826 * float(np.median(np.abs(diffs - np.median(diffs)))) / math.sqrt(2)
+
+def warmup_length(data, max_fraction=0.5):
+    """Number of leading samples before the timings settle.
+
+    Finds the single split of the log timings that most reduces the summed
+    squared error of the two segment means (one vectorized pass over prefix
+    sums). The split counts as a warm-up only if the leading segment is the
+    slower one and the gain beats a BIC-style penalty. Values are clipped to
+    the median +- 6 sigma first, so one mid-run spike cannot pose as a
+    change point. Only the first max_fraction of the run is searched.
+    """
+    n = data.size
+    if n < MIN_SAMPLES:
+        return 0
+    x = np.log(np.maximum(np.asarray(data, dtype=np.float64), 1e-9))
+    sigma = _robust_sigma(x)
+    if sigma == 0:
+        return 0
+    center = np.median(x)
+    x = np.clip(x, center - 6 * sigma, center + 6 * sigma)
+
+    csum = np.cumsum(x)
+    csum2 = np.cumsum(x * x)
+    k = np.arange(1, int(n * max_fraction) + 1)
+    left_sse = csum2[k - 1] - csum[k - 1] ** 2 / k
+    right_sum = csum[-1] - csum[k - 1]
+    right_sse = (csum2[-1] - csum2[k - 1]) - right_sum ** 2 / (n - k)
+    gain = (csum2[-1] - csum[-1] ** 2 / n) - (left_sse + right_sse)
+
+    best = int(np.argmax(gain))
+    split = int(k[best])
+    slower = csum[split - 1] / split > right_sum[best] / (n - split)
+    if slower and gain[best] > PENALTY * sigma ** 2 * math.log(n):
+        return split
+    return 0
+
+def outliers(data):
+    """Tukey IQR fences (mild 1.5, extreme 3.0) and modified z-scores > 3.5 from the MAD."""
+    q1, median, q3 = np.quantile(data, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    mild = (data < q1 - 1.5 * iqr) | (data > q3 + 1.5 * iqr)
+    extreme = (data < q1 - 3.0 * iqr) | (data > q3 + 3.0 * iqr)
+    mad = np.median(np.abs(data - median))
+    if mad > 0:
+        mad_outlier = np.abs(0.6745 * (data - median) / mad) > 3.5
+    else:
+        mad_outlier = data != median
+    return {"mild": mild, "extreme": extreme, "mad": mad_outlier}
+
+def periodicity(spikes, min_events=4, threshold=0.3):
+    """Dominant period (in samples) of a boolean spike series, or None.
+
+    The autocorrelation comes from one FFT of the zero-padded, centred
+    series; a lag counts if at least two periods fit and its correlation
+    is at least threshold.
+    """
+    n = spikes.size
+    if spikes.sum() < min_events or n < MIN_SAMPLES:
+        return None
+    x = spikes.astype(np.float64) - spikes.mean()
+    spectrum = np.fft.rfft(x, 2 * n)
+    acf = np.fft.irfft(spectrum * np.conj(spectrum))[:n]
+    if acf[0] <= 0:
+        return None
+    acf /= acf[0]
+    lag = int(np.argmax(acf[2:n // 2])) + 2 if n // 2 > 2 else None
+    if lag is None or acf[lag] < threshold:
+        return None
+    return lag, float(acf[lag])
+
+def analyze(data):
+    """Warm-up, outlier and periodic-interference analysis of one raw series."""
+    data = np.asarray(data, dtype=np.float64)
+    warmup = warmup_length(data)
+    steady = data[warmup:]
+    flags = outliers(steady)
+
+    periodic = None
+    found = periodicity(flags["mild"] & (steady > np.median(steady)))
+    if found is not None:
+        lag, strength = found
+        # Samples run back to back, so the mean duration approximates their spacing
+        period_ms = lag * float(steady.mean())
+        hz = 1000 / period_ms if period_ms > 0 else 0.0
+        tick = min(TICK_HZ, key=lambda value: abs(value - hz) / value)
+        periodic = {
+            "period_iterations": lag,
+            "period_ms": round(period_ms, 6),
+            "strength": round(strength, 6),
+            "tick_hz": tick if abs(tick - hz) / tick < 0.1 else None
+        }
+
+    return {
+        "warmup_iterations": warmup,
+        "steady_ms": timing_stats.compute_stats(steady),
+        "outliers": {
+            name: {"count": int(mask.sum()), "fraction": round(float(mask.mean()), 6)}
+            for name, mask in flags.items()
+        },
+        "periodic": periodic
+    }
+
+def analyze_run(raw_timings):
+    # "<op>.<metric>" instrumentation series are not timings and are skipped
+    return {op: analyze(data) for op, data in raw_timings.items() if "." not in op and len(data)}
+
+def sample_classes(data):
+    """Per-sample label: warmup, extreme, mild or normal."""
+    data = np.asarray(data, dtype=np.float64)
+    warmup = warmup_length(data)
+    flags = outliers(data[warmup:])
+    labels = np.full(data.size, "normal", dtype=object)
+    labels[:warmup] = "warmup"
+    labels[warmup:][flags["mild"]] = "mild"
+    labels[warmup:][flags["extreme"]] = "extreme"
+    return labels
+
+def summary_values(analysis):
+    # Values for SUMMARY_FIELDS from one operation's analysis (or {})
+    steady = analysis.get("steady_ms", {})
+    periodic = analysis.get("periodic") or {}
+    return (
+        analysis.get("warmup_iterations"),
+        analysis.get("outliers", {}).get("mad", {}).get("fraction"),
+        steady.get("median"),
+        steady.get("p99"),
+        steady.get("cv"),
+        periodic.get("period_iterations"),
+        periodic.get("period_ms")
+    )
@@ -1,19 +1,12 @@
 import oqs
 import time
-import statistics as stats
-
-
-def compute_stats(data):
-    mean = stats.mean(data)
-    stddev = stats.stdev(data)
-    return {
-        "mean": round(mean, 6),
-        "median": round(stats.median(data), 6),
-        "max": round(max(data), 6),
-        "min": round(min(data), 6),
-        "stddev": round(stddev, 6),
-        "cv": round(stddev / mean, 6)
-    }
+import timing_stats
+import raw_stream
+import instrumentation
+import context_pool
+
+
+OPERATIONS = ("keygen", "sign", "verify")
 
 def warmup(message, sig):
     for _ in range(5):
@@ -23,55 +16,139 @@ def warmup(message, sig):
         assert verification
 
 
-def benchmark(category, algorithm, iterations=100, message_length=1024):
-    generation_times = []
-    sign_times = []
-    verify_times = []
-    failures = 0
+def benchmark(category, algorithm, iterations=100, message_length=1024, adaptive=False,
+              target_precision=0.01, max_iterations=1_000_000, time_budget_s=300.0, stream=None,
+              instrument=None, pool_size=64, stable=False):
+    # In adaptive mode `iterations` is the first batch; sampling then continues
+    # until the median of every operation converges or the budget runs out
+    sampler = timing_stats.AdaptiveSampler(target_precision, max_iterations, time_budget_s) if adaptive else None
+    # instrument names the extra per-operation collectors, e.g. ("thread_time", "perf")
+    probe = instrumentation.probe(instrument)
+    store = raw_stream.open_store(OPERATIONS, iterations, algorithm, category, sampler, stream, probe.metrics)
+    probe.bind(store)
+    timings = store.timings
+    message = b'\xFF' * message_length
+
+    # The context comes from the shared pool, so repeated runs skip its setup; it is
+    # handed out without a secret key, and this run's key is wiped when it goes back
+    contexts = context_pool.shared_pool()
+    with contexts.lease("sig", algorithm) as sig, store, probe, timing_stats.GCPause(stable) as pause:
+        warmup(message, sig)
+        # Sizes are read while the lease holds the context; once released it may be evicted and freed
+        details = dict(sig.details)
+
+        # Each round fills up to pool_size slots one operation at a time: a pool
+        # of keypairs, then a signature with every secret key, then verifies,
+        # so each operation runs in its own tight loop
+        while store.room():
+            pause.settle()  # collect between rounds, never inside a timed loop
+            i = store.slot
+            n = store.block(pool_size)
+
+            keypairs = []
+            for j in range(i, i + n):
+                mark = probe.start()
+                start_time = time.perf_counter_ns()
+                public_key = sig.generate_keypair()
+                elapsed_ns = time.perf_counter_ns() - start_time
+                elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
+                timings["keygen"][j] = elapsed_ms
+                probe.stop(mark, "keygen", j)
+                keypairs.append((public_key, sig.export_secret_key()))
+
+            signers = [oqs.Signature(algorithm, secret_key) for _, secret_key in keypairs]
+            signatures = []
+            try:
+                for j, signer in enumerate(signers, i):
+                    mark = probe.start()
+                    start_time = time.perf_counter_ns()
+                    signature = signer.sign(message)
+                    elapsed_ns = time.perf_counter_ns() - start_time
+                    elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
+                    timings["sign"][j] = elapsed_ms
+                    probe.stop(mark, "sign", j)
+                    signatures.append(signature)
+            finally:
+                for signer in signers:
+                    signer.free()
+
+            for j, ((public_key, _), signature) in enumerate(zip(keypairs, signatures), i):
+                mark = probe.start()
+                start_time = time.perf_counter_ns()
+                verification = sig.verify(message, signature, public_key)
+                elapsed_ns = time.perf_counter_ns() - start_time
+                elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
+                timings["verify"][j] = elapsed_ms
+                probe.stop(mark, "verify", j)
+
+                if not verification:
+                    store.fail()
+
+            store.commit(n)
+
+    count = store.count
+
+    benchmark_results = {
+        "algorithm": algorithm,
+        "category": category,
+        "iterations": count,
+        "key_size": len(public_key),
+        "public_key_size": len(public_key),
+        "secret_key_size": details["length_secret_key"],
+        "signature_size": len(signature),
+        "keygen_ms": store.summary("keygen"),
+        "sign_ms": store.summary("sign"),
+        "verify_ms": store.summary("verify"),
+        "correctness_rate": round((count - store.failures) / count, 6),
+        "timestamp": store.timestamp or time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    }
+    if sampler is not None:
+        benchmark_results["adaptive"] = sampler.report()
+    if probe.metrics:
+        benchmark_results["metrics"] = store.metric_summary()
+
+    raw_timings = store.raw_timings()
+
+    return benchmark_results, raw_timings
+
+
+def benchmark_throughput(category, algorithm, batch_size=1000, batches=20, pool_size=64, message_length=1024):
+    # Times tight batches of each operation on precomputed inputs, so per-call
+    # timer overhead is amortized over batch_size operations
     message = b'\xFF' * message_length
 
     with oqs.Signature(algorithm) as sig:
         warmup(message, sig)
 
-        for _ in range(iterations):
-            start_time = time.perf_counter_ns()
-            public_key = sig.generate_keypair()
-            elapsed_ns = time.perf_counter_ns() - start_time
-            elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
-            generation_times.append(elapsed_ms)
+        per_op = {"keygen_batch": timing_stats.time_batches(sig.generate_keypair, [()], batch_size, batches)}
 
-            start_time = time.perf_counter_ns()
+        # Signing uses the object's last keypair; verification cycles through a
+        # pool of (message, signature, public key) triples from distinct keypairs
+        signed = []
+        for _ in range(pool_size):
+            public_key = sig.generate_keypair()
             signature = sig.sign(message)
-            elapsed_ns = time.perf_counter_ns() - start_time
-            elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
-            sign_times.append(elapsed_ms)
-
-            start_time = time.perf_counter_ns()
-            verification = sig.verify(message, signature, public_key)
-            elapsed_ns = time.perf_counter_ns() - start_time
-            elapsed_ms = elapsed_ns / 1_000_000  # Convert to milliseconds
-            verify_times.append(elapsed_ms)
-
-            if not verification:
-                failures += 1
-    
+            assert sig.verify(message, signature, public_key)
+            signed.append((message, signature, public_key))
+
+        per_op["sign_batch"] = timing_stats.time_batches(sig.sign, [(message,)], batch_size, batches)
+        per_op["verify_batch"] = timing_stats.time_batches(sig.verify, signed, batch_size, batches)
+
     benchmark_results = {
         "algorithm": algorithm,
         "category": category,
-        "iterations": iterations,
+        "mode": "throughput",
+        "iterations": batch_size * batches,
+        "batch_size": batch_size,
+        "batches": batches,
         "key_size": len(public_key),
+        "public_key_size": len(public_key),
+        "secret_key_size": sig.details["length_secret_key"],
         "signature_size": len(signature),
-        "keygen_ms": compute_stats(generation_times),
-        "sign_ms": compute_stats(sign_times),
-        "verify_ms": compute_stats(verify_times),
-        "correctness_rate": round((iterations - failures) / iterations, 6),
+        **{f"{op}_ms": timing_stats.compute_stats(data) for op, data in per_op.items()},
+        "throughput": {op: timing_stats.throughput_stats(data) for op, data in per_op.items()},
+        "correctness_rate": 1.0,
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
     }
 
-    raw_timings = {
-        "keygen": generation_times,
-        "sign": sign_times,
-        "verify": verify_times
-    }
-
-    return benchmark_results, raw_timings
+    return benchmark_results, per_op
@@ -0,0 +1,203 @@
+import gc
+import json
+import os
+import platform
+import threading
+from pathlib import Path
+
+import numpy as np
+
+import benchmark_plan
+import raw_stream
+import result_cache
+import timing_stats
+
+
+CPUFREQ = Path("/sys/devices/system/cpu")
+
+
+def _read(path):
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return None
+
+def governor(cpu):
+    return _read(CPUFREQ / f"cpu{cpu}" / "cpufreq" / "scaling_governor")
+
+def turbo():
+    # intel_pstate reports the inverse ("no_turbo"), acpi-cpufreq/amd use "boost"
+    no_turbo = _read(CPUFREQ / "intel_pstate" / "no_turbo")
+    if no_turbo is not None:
+        return "off" if no_turbo == "1" else "on"
+    boost = _read(CPUFREQ / "cpufreq" / "boost")
+    if boost is not None:
+        return "on" if boost == "1" else "off"
+    return None
+
+def fingerprint():
+    """Host, library and scheduling state that affects timing stability."""
+    cpus = sorted(os.sched_getaffinity(0))
+    return {
+        **result_cache.environment(),
+        "kernel": platform.release(),
+        "affinity": cpus,
+        "governors": sorted({governor(cpu) or "unknown" for cpu in cpus}),
+        "turbo": turbo(),
+        "loadavg": [round(load, 2) for load in os.getloadavg()],
+        "nice": os.getpriority(os.PRIO_PROCESS, 0),
+        "gc_thresholds": list(gc.get_threshold())
+    }
+
+def warnings(env):
+    issues = []
+    if any(name not in ("performance", "unknown") for name in env["governors"]):
+        issues.append(f"CPU governor is {'/'.join(env['governors'])}, not performance")
+    if env["turbo"] == "on":
+        issues.append("turbo boost is enabled")
+    if env["loadavg"][0] > 0.5:
+        issues.append(f"1-minute load average is {env['loadavg'][0]}")
+    return issues
+
+
+class StableEnvironment:
+    """Pins the calling thread to one CPU and raises its priority where permitted.
+
+    cpu defaults to the last CPU the process may run on, which usually sees
+    fewer interrupts than CPU 0. niceness is applied with setpriority and
+    silently kept as-is without CAP_SYS_NICE. On Linux both only affect the
+    calling (benchmarking) thread: threads already running, such as the
+    database writer and the metrics exporter, are moved off the pinned CPU
+    where another one is allowed, and threads started inside the block
+    inherit the pin, so start them first. Everything is restored on exit.
+    """
+
+    def __init__(self, cpu=None, niceness=-10):
+        self.cpu = cpu
+        self.niceness = niceness
+        self._affinity = None
+        self._niceness = None
+        self._others = {}
+
+    def __enter__(self):
+        self._affinity = os.sched_getaffinity(0)
+        if self.cpu is None:
+            self.cpu = max(self._affinity)
+        os.sched_setaffinity(0, {self.cpu})
+        self._others = _move_other_threads(self.cpu)
+        previous = os.getpriority(os.PRIO_PROCESS, 0)
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, self.niceness)
+            self._niceness = previous
+        except PermissionError:
+            pass
+        return self
+
+    def __exit__(self, *exc):
+        os.sched_setaffinity(0, self._affinity)
+        for tid, affinity in self._others.items():
+            try:
+                os.sched_setaffinity(tid, affinity)
+            except OSError:
+                pass  # the thread has exited
+        self._others = {}
+        if self._niceness is not None:
+            # Lowering the priority back needs no privileges
+            os.setpriority(os.PRIO_PROCESS, 0, self._niceness)
+            self._niceness = None
+
+
+def _move_other_threads(cpu):
+    # Keeps this process's other threads off cpu; returns their previous affinities
+    moved = {}
+    try:
+        tids = [int(tid) for tid in os.listdir("/proc/self/task")]
+    except OSError:
+        return moved
+    for tid in tids:
+        if tid == threading.get_native_id():
+            continue
+        try:
+            affinity = os.sched_getaffinity(tid)
+            if affinity - {cpu}:
+                os.sched_setaffinity(tid, affinity - {cpu})
+                moved[tid] = affinity
+        except OSError:
+            pass
+    return moved
+
+
+def merge_rounds(parts):
+    """Combine the (results, raw_timings) of several rounds of one job."""
+    results = dict(parts[0][0])
+    raw_timings = {key: np.concatenate([raw[key] for _, raw in parts]) for key in parts[0][1]}
+    count = sum(part["iterations"] for part, _ in parts)
+    failures = sum(round((1 - part["correctness_rate"]) * part["iterations"]) for part, _ in parts)
+
+    for key, data in raw_timings.items():
+        if "." not in key:
+            results[f"{key}_ms"] = timing_stats.compute_stats(data)
+    metrics = {key: data for key, data in raw_timings.items() if "." in key}
+    if metrics:
+        results["metrics"] = timing_stats.metric_summary(metrics)
+    results["iterations"] = count
+    results["correctness_rate"] = round((count - failures) / count, 6)
+    results["rounds"] = len(parts)
+    return results, raw_timings
+
+def run_interleaved(jobs, options=None, rounds=10, seed=None):
+    """Yield (job, results, raw_timings, error) like parallel_runner.run_jobs.
+
+    Each job's iterations are split into rounds, and every round runs all
+    jobs once in a fresh random order, so slow drift (thermal, frequency,
+    background load) spreads evenly over the algorithms instead of biasing
+    whichever ran last. Each job's rounds are merged once it has finished.
+    """
+    options = dict(options or {})
+    if options.get("adaptive") or options.get("stream"):
+        raise ValueError("Stable mode does not support adaptive or streamed runs")
+    options["stable"] = True
+
+    rng = np.random.default_rng(seed)
+    env = fingerprint()
+    for issue in warnings(env):
+        print(f"Warning: {issue}")
+
+    # Jobs carry dicts, so they are tracked by their index in jobs. Each
+    # round gets total // rounds iterations and the last one the remainder,
+    # so the merged run has exactly the requested count
+    per_round = []
+    for job in jobs:
+        total = options.get("iterations") or (job.options or {}).get("latency", {}).get("iterations", 100)
+        sizes = [total // rounds] * rounds
+        sizes[-1] += total % rounds
+        per_round.append(sizes)
+    parts = [[] for _ in jobs]
+    errors = [None] * len(jobs)
+
+    for round_index in range(rounds):
+        print(f"\nRound {round_index + 1}/{rounds}")
+        for index in rng.permutation(len(jobs)):
+            if errors[index] is not None or per_round[index][round_index] == 0:
+                continue
+            job = jobs[index]
+            print(f"Benchmarking {benchmark_plan.describe(job)}")
+            try:
+                parts[index].append(benchmark_plan.run(job, {**options, "iterations": per_round[index][round_index]}))
+            except Exception as e:
+                errors[index] = e
+
+    loadavg_end = [round(load, 2) for load in os.getloadavg()]
+    for job, job_parts, error in zip(jobs, parts, errors):
+        if error is not None:
+            yield job, None, None, error
+            continue
+        results, raw_timings = merge_rounds(job_parts)
+        results["environment"] = {**env, "seed": seed, "loadavg_end": loadavg_end}
+        yield job, results, raw_timings, None
+
+def export_environment(results, label="default"):
+    path = raw_stream.export_path(label, results["algorithm"], results["timestamp"], "environment", ".json")
+    with open(path, "w") as f:
+        json.dump(results["environment"], f, indent=4)
+    return path
@@ -0,0 +1,69 @@
+import ctypes
+
+import pytest
+
+try:
+    import context_pool
+except (ImportError, SystemExit):
+    # liboqs-python exits when it can neither find nor build liboqs
+    pytest.skip("liboqs is not available", allow_module_level=True)
+
+
+class FakeContext:
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.freed = False
+
+    def free(self):
+        self.freed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setitem(context_pool.CONTEXTS, "kem", FakeContext)
+    return context_pool.ContextPool(capacity=3, per_algorithm=2)
+
+def test_acquire_reuses_released_contexts(pool):
+    context = pool.acquire("kem", "A")
+    pool.release("kem", "A", context)
+    assert pool.acquire("kem", "A") is context
+    assert (pool.hits, pool.misses) == (1, 1)
+
+def test_per_algorithm_limit(pool):
+    contexts = [pool.acquire("kem", "A") for _ in range(3)]
+    for context in contexts:
+        pool.release("kem", "A", context)
+    assert pool.stats()["idle"] == {"kem:A": 2}
+    assert contexts[2].freed
+    assert pool.evictions == 1
+
+def test_least_recently_used_algorithm_is_evicted_first(pool):
+    a, b, c, d = (pool.acquire("kem", name) for name in "ABCD")
+    pool.release("kem", "A", a)
+    pool.release("kem", "B", b)
+    pool.release("kem", "C", c)
+    # Touch A, so B is now the least recently used
+    pool.release("kem", "A", pool.acquire("kem", "A"))
+    pool.release("kem", "D", d)
+    assert b.freed and not a.freed
+    assert set(pool.stats()["idle"]) == {"kem:A", "kem:C", "kem:D"}
+
+def test_lease_returns_context_on_error(pool):
+    with pytest.raises(RuntimeError):
+        with pool.lease("kem", "A"):
+            raise RuntimeError("boom")
+    assert pool.stats()["idle"] == {"kem:A": 1}
+
+def test_clear_frees_idle_contexts(pool):
+    context = pool.acquire("kem", "A")
+    pool.release("kem", "A", context)
+    pool.clear()
+    assert context.freed
+    assert pool.stats()["idle"] == {}
+
+def test_release_wipes_the_secret_key(pool):
+    context = pool.acquire("kem", "A")
+    context.secret_key = buffer = ctypes.create_string_buffer(b"secret", 6)
+    pool.release("kem", "A", context)
+    assert buffer.raw == bytes(6)
+    assert not hasattr(pool.acquire("kem", "A"), "secret_key")
@@ -0,0 +1,31 @@
+import instrumentation
+import timing_stats
+
+
+VALUES = {"outer": 1.0, "middle": 2.0, "inner": 3.0}
+
+def test_collectors_are_nested(monkeypatch):
+    events = []
+
+    def collector(name):
+        class Collector:
+            names = (name,)
+
+            def start(self):
+                events.append(f"start {name}")
+                return name
+
+            def stop(self, mark):
+                events.append(f"stop {name}")
+                return (VALUES[mark],)
+
+        return Collector
+
+    monkeypatch.setattr(instrumentation, "COLLECTORS", {name: collector(name) for name in ("outer", "middle", "inner")})
+    store = timing_stats.SampleStore(("keygen",), 1, metrics=("inner", "outer"))
+    with instrumentation.probe(("inner", "outer")).bind(store) as probe:
+        probe.stop(probe.start(), "keygen", 0)
+    assert probe.metrics == ("outer", "inner")
+    assert events == ["start outer", "start inner", "stop inner", "stop outer"]
+    assert store.metrics["keygen.outer"][0] == 1.0
+    assert store.metrics["keygen.inner"][0] == 3.0
@@ -0,0 +1,80 @@
+import re
+import urllib.request
+
+import numpy as np
+import pytest
+
+import benchmark_plan
+import live_metrics
+import timing_stats
+
+
+SAMPLE = re.compile(r'^(pqc_bench_\w+)\{([^}]*)\} (\S+)$')
+
+
+def samples(text):
+    parsed = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        name, labels, value = SAMPLE.match(line).groups()
+        parsed[(name, labels)] = float(value)
+    return parsed
+
+def run_loop(exporter, iterations=100, block=10):
+    observer = exporter.observe("ML-KEM-768", "pq_kem", ("keygen", "encap"), iterations)
+    store = timing_stats.SampleStore(("keygen", "encap"), iterations)
+    store.observer = observer
+    while store.room():
+        n = store.block(block)
+        store.timings["keygen"][store.slot:store.slot + n] = np.arange(store.slot, store.slot + n) + 1.0
+        store.timings["encap"][store.slot:store.slot + n] = 2.0
+        store.commit(n)
+    return store
+
+def test_render_progress():
+    exporter = live_metrics.MetricsExporter(system_label="lab")
+    jobs = [benchmark_plan.Job("kem", "pq_kem", "ML-KEM-768", {}, 3.0), benchmark_plan.Job("kem", "pq_kem", "X", {}, 1.0)]
+    exporter.begin_run(jobs)
+    run_loop(exporter)
+    exporter.finish_job(jobs[0])
+
+    text = exporter.render()
+    values = samples(text)
+    job = 'system_label="lab",algorithm="ML-KEM-768",category="pq_kem"'
+    assert values[("pqc_bench_jobs_total", 'system_label="lab"')] == 2
+    assert values[("pqc_bench_jobs_completed", 'system_label="lab"')] == 1
+    assert values[("pqc_bench_iterations_done", job)] == 100
+    assert values[("pqc_bench_iterations_target", job)] == 100
+    assert values[("pqc_bench_job_eta_seconds", job)] == 0
+    # keygen timings are 1..100 ms; the sketch is within its 1% bucket width
+    assert values[("pqc_bench_latency_ms", job + ',operation="keygen",quantile="0.5"')] == pytest.approx(50.5, rel=0.02)
+    assert values[("pqc_bench_latency_ms", job + ',operation="encap",quantile="0.99"')] == 2.0
+    assert values[("pqc_bench_latency_ms_count", job + ',operation="keygen"')] == 100
+    assert values[("pqc_bench_latency_ms_sum", job + ',operation="keygen"')] == pytest.approx(5050)
+    assert values[("pqc_bench_ops_per_second", job + ',operation="encap"')] == pytest.approx(500)
+    assert "# TYPE pqc_bench_latency_ms summary" in text
+    assert values[("pqc_bench_run_eta_seconds", 'system_label="lab"')] >= 0
+
+def test_label_values_are_escaped():
+    exporter = live_metrics.MetricsExporter(system_label='a"b\\c\nd')
+    assert 'system_label="a\\"b\\\\c\\nd"' in exporter.render()
+
+def test_observe_is_inactive_without_exporter():
+    assert live_metrics.observe("ML-KEM-768", "pq_kem", ("keygen",), 10) is None
+
+def test_textfile_and_http_endpoint(tmp_path):
+    textfile = tmp_path / "bench.prom"
+    with live_metrics.MetricsExporter(port=0, textfile=textfile, system_label="lab") as exporter:
+        assert live_metrics.active() is exporter
+        observer = live_metrics.observe("ML-KEM-768", "pq_kem", ("keygen",), 10)
+        assert observer is not None
+        port = exporter._server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            body = response.read().decode()
+        assert 'pqc_bench_current_job_info{system_label="lab",algorithm="ML-KEM-768",category="pq_kem"} 1.0' in body
+    assert live_metrics.active() is None
+    # Written once more on exit
+    assert "pqc_bench_jobs_total" in textfile.read_text()
+    assert not list(tmp_path.glob(".*.tmp"))
@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import mysql_export
+
+
+TIMESTAMP = "2024-01-01 12:00:00"
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "bench.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE benchmark_results_raw ({', '.join(mysql_export.RAW_COLUMNS)})")
+    conn.commit()
+    conn.close()
+    return path
+
+def raw_count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM benchmark_results_raw").fetchone()[0]
+    finally:
+        conn.close()
+
+def submit(writer, n, algorithm="ML-KEM-768"):
+    return writer.submit_raw_chunk(algorithm, "pq_kem", "encap", 1, np.arange(n, dtype=np.float64),
+                            True, TIMESTAMP, "test")
+
+
+class Flaky:
+    """sqlite3 connections whose first `failures` INSERTs raise, counting executes."""
+
+    def __init__(self, path, failures=0, fail_on_execute=1):
+        self.path = path
+        self.failures = failures
+        self.fail_on_execute = fail_on_execute
+        self.connects = 0
+        self.executes = 0
+
+    def __call__(self):
+        self.connects += 1
+        conn = sqlite3.connect(self.path)
+        flaky = self
+
+        class Cursor:
+            def __init__(self):
+                self.cursor = conn.cursor()
+                self.calls = 0
+
+            def execute(self, query, params):
+                self.calls += 1
+                flaky.executes += 1
+                if flaky.failures and self.calls == flaky.fail_on_execute:
+                    flaky.failures -= 1
+                    raise sqlite3.OperationalError("connection lost")
+                return self.cursor.execute(query, params)
+
+            def close(self):
+                self.cursor.close()
+
+        class Connection:
+            def cursor(self):
+                return Cursor()
+
+            def commit(self):
+                conn.commit()
+
+            def rollback(self):
+                conn.rollback()
+
+            def close(self):
+                conn.close()
+
+        return Connection()
+
+
+def test_rows_are_split_into_batches(database):
+    connect = Flaky(database)
+    with mysql_export.BatchWriter(connect, batch_size=3, placeholder="?") as writer:
+        submit(writer, 10)
+    assert writer.errors == []
+    assert raw_count(database) == 10
+    assert connect.executes == 4
+
+def test_failed_export_is_retried_on_a_new_connection(database):
+    connect = Flaky(database, failures=2)
+    with mysql_export.BatchWriter(connect, batch_size=4, placeholder="?", backoff=0) as writer:
+        submit(writer, 10)
+    assert writer.errors == []
+    assert raw_count(database) == 10
+    assert connect.connects == 3
+
+def test_export_is_one_transaction(database):
+    # The third batch fails on every attempt: nothing of the export may remain
+    connect = Flaky(database, failures=3, fail_on_execute=3)
+    with mysql_export.BatchWriter(connect, batch_size=2, placeholder="?", max_retries=2, backoff=0) as writer:
+        failed = submit(writer, 10)
+        committed = submit(writer, 1, "ML-KEM-512")
+    assert len(writer.errors) == 1
+    assert raw_count(database) == 1
+    assert isinstance(failed.exception(), sqlite3.OperationalError)
+    assert committed.exception() is None
+
+def test_retry_backoff_grows_exponentially(database, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(mysql_export.time, "sleep", sleeps.append)
+    connect = Flaky(database, failures=3)
+    with mysql_export.BatchWriter(connect, placeholder="?", backoff=0.5) as writer:
+        submit(writer, 5)
+    assert sleeps == [0.5, 1.0, 2.0]
+    assert raw_count(database) == 5
+
+def test_close_drains_the_queue(database):
+    writer = mysql_export.BatchWriter(lambda: sqlite3.connect(database), batch_size=7, placeholder="?")
+    for _ in range(20):
+        submit(writer, 50)
+    writer.close()
+    assert raw_count(database) == 1000
+
+def test_max_pending_blocks_submitters(database):
+    release = threading.Event()
+
+    def connect():
+        release.wait()
+        return sqlite3.connect(database)
+
+    writer = mysql_export.BatchWriter(connect, placeholder="?", max_pending=1)
+    submit(writer, 1)          # taken by the writer thread, which waits in connect()
+    deadline = time.monotonic() + 5
+    while writer._queue.qsize() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    submit(writer, 1)          # fills the queue
+    blocked = threading.Thread(target=submit, args=(writer, 1))
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join(5)
+    assert not blocked.is_alive()
+    writer.close()
+    assert raw_count(database) == 3
+
+def test_summary_sends_only_the_columns_results_have(tmp_path):
+    path = tmp_path / "bench.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE benchmark_summary ({', '.join(mysql_export.BASE_SUMMARY_COLUMNS)})")
+    conn.commit()
+    conn.close()
+    results = {"algorithm": "Ed25519", "category": "classic_sig", "iterations": 10,
+               "timestamp": TIMESTAMP, "keygen_ms": {"mean": 0.1, "median": 0.1}}
+    memory = {**results, "public_key_size": 32, "memory": {"keygen": {"peak_rss_kb": 4}}}
+    assert mysql_export.summary_columns(results) == mysql_export.BASE_SUMMARY_COLUMNS
+    assert mysql_export.summary_columns(memory) == mysql_export.SUMMARY_COLUMNS
+    [row] = mysql_export.summary_rows(memory, "test")
+    assert row[-3:] == (4, None, None)
+
+    # A table without the upgrade still takes results that have no sizes or footprints
+    with mysql_export.BatchWriter(lambda: sqlite3.connect(path), placeholder="?") as writer:
+        done = writer.submit_summary(results, "test")
+    assert done.exception() is None
+
+def test_connection_is_closed_when_rollback_fails(database):
+    closed = []
+
+    class Broken:
+        def cursor(self):
+            raise sqlite3.OperationalError("connection lost")
+
+        def rollback(self):
+            raise sqlite3.OperationalError("connection lost")
+
+        def close(self):
+            closed.append(self)
+
+    with mysql_export.BatchWriter(Broken, placeholder="?", max_retries=2, backoff=0) as writer:
+        submit(writer, 1)
+    assert len(writer.errors) == 1
+    assert len(closed) == 3
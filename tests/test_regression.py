@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+import pytest
+
+import regression
+
+
+def test_mann_whitney_u_separated_samples():
+    # U = 9 of 9, mean 4.5, sigma = sqrt(3 * 3 / 12 * 7); z = (9 - 4.5 - 0.5) / sigma
+    p, prob = regression.mann_whitney_u(np.array([1.0, 2.0, 3.0]), np.array([4.0, 5.0, 6.0]))
+    assert p == pytest.approx(0.0404278, abs=1e-6)
+    assert prob == 1.0
+
+def test_mann_whitney_u_tie_correction():
+    # Average ranks 1.5, 4.5, 7.5 give U = 14; the tie term sum(t^3 - t) = 72
+    # shrinks sigma to sqrt(16 / 12 * (9 - 72 / 56))
+    p, prob = regression.mann_whitney_u(np.array([1.0, 1.0, 2.0, 2.0]), np.array([2.0, 2.0, 3.0, 3.0]))
+    assert p == pytest.approx(0.0431794, abs=1e-6)
+    assert prob == 0.875
+
+def test_mann_whitney_u_is_one_sided():
+    baseline, candidate = np.array([1.0, 2.0, 3.0]), np.array([4.0, 5.0, 6.0])
+    p_slower, _ = regression.mann_whitney_u(baseline, candidate)
+    p_faster, prob = regression.mann_whitney_u(candidate, baseline)
+    assert p_faster > 0.95
+    assert prob == 0.0
+    assert p_slower < 0.05
+
+def test_mann_whitney_u_all_tied():
+    assert regression.mann_whitney_u(np.ones(5), np.ones(5)) == (1.0, 0.5)
+
+def test_median_ratio_ci_contains_true_ratio():
+    rng = np.random.default_rng(0)
+    baseline = rng.lognormal(0.0, 0.1, 1000)
+    candidate = 1.2 * rng.lognormal(0.0, 0.1, 1000)
+    low, high = regression.median_ratio_ci(baseline, candidate, rng=1)
+    assert low < 1.2 < high
+    assert high - low < 0.05
+
+@pytest.mark.parametrize("factor, verdict", [(1.2, "regression"), (1.0, "unchanged"), (0.8, "improvement")])
+def test_compare_operation_verdicts(factor, verdict):
+    rng = np.random.default_rng(2)
+    baseline = rng.lognormal(0.0, 0.1, 500)
+    candidate = factor * rng.lognormal(0.0, 0.1, 500)
+    assert regression.compare_operation(baseline, candidate, rng=3)["verdict"] == verdict
+
+def test_small_change_below_threshold_is_unchanged():
+    # Significant but only 2% slower, under the default 5% threshold
+    rng = np.random.default_rng(4)
+    baseline = rng.lognormal(0.0, 0.01, 5000)
+    candidate = 1.02 * rng.lognormal(0.0, 0.01, 5000)
+    row = regression.compare_operation(baseline, candidate, rng=5)
+    assert row["p_slower"] < 0.01
+    assert row["verdict"] == "unchanged"
+
+def test_compare_runs_matches_algorithms_and_operations():
+    rng = np.random.default_rng(6)
+    baseline = {"A": {"sign": rng.random(50), "verify": rng.random(50)}, "B": {"sign": rng.random(50)}}
+    candidate = {"A": {"sign": rng.random(50), "keygen": rng.random(50)}, "C": {"sign": rng.random(50)}}
+    rows = regression.compare_runs(baseline, candidate, seed=7)
+    assert [(row["algorithm"], row["operation"]) for row in rows] == [("A", "sign")]
+
+def write_run(directory, algorithm, timestamp, operations, mode=None):
+    stem = f"{algorithm}_{timestamp}"
+    with open(directory / f"{stem}_raw.csv", "w") as f:
+        f.write("operation,iteration,duration_ms\n")
+        for operation in operations:
+            f.writelines(f"{operation},{i},{1.0 + i / 100}\n" for i in range(1, 21))
+    if mode is not None:
+        (directory / f"{stem}_results.json").write_text(json.dumps({"algorithm": algorithm, "mode": mode}))
+
+def test_load_csv_runs_picks_the_latest_run_of_the_mode(tmp_path):
+    write_run(tmp_path, "ML-KEM-768", "2024-01-01_10-00-00", ["keygen", "encap"])
+    write_run(tmp_path, "ML-KEM-768", "2024-01-02_10-00-00", ["keygen_batch"], mode="throughput")
+    assert set(regression.load_csv_runs(tmp_path, "latency")["ML-KEM-768"]) == {"keygen", "encap"}
+    assert set(regression.load_csv_runs(tmp_path, "throughput")["ML-KEM-768"]) == {"keygen_batch"}
+    assert set(regression.load_csv_runs(tmp_path)["ML-KEM-768"]) == {"keygen_batch"}
+
+def test_nothing_compared_is_not_a_pass(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name, operation in (("baseline", "keygen"), ("candidate", "keygen_batch")):
+        (tmp_path / name).mkdir()
+        write_run(tmp_path / name, "ML-KEM-768", "2024-01-01_10-00-00", [operation])
+    assert regression.main([str(tmp_path / "baseline"), str(tmp_path / "candidate")]) == 2
+    assert regression.main([str(tmp_path / "baseline"), str(tmp_path / "candidate"), "--mode", "any"]) == 2
+    assert regression.main([str(tmp_path / "baseline"), str(tmp_path / "baseline")]) == 0
@@ -0,0 +1,80 @@
+import sys
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+import benchmark_plan
+import reporting
+import run_journal
+
+
+ENV = {"liboqs_version": "0.10.0", "cryptography_version": "42.0.0", "cpu_model": "test-cpu"}
+PARAMS = {"options": {"iterations": 100}, "mode": "latency", "stable": None}
+JOB = benchmark_plan.Job("kem", "pq_kem", "ML-KEM-768", {}, 1.0)
+RESULTS = {"algorithm": "ML-KEM-768", "category": "pq_kem", "keygen_ms": {"median": 0.1}}
+
+
+class Writer:
+    """Queues exports like BatchWriter; flush() commits them, or fails them when asked to."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.pending = []
+
+    def submit_summary(self, results, system_label):
+        self.pending.append(Future())
+        return self.pending[-1]
+
+    def submit_raw_data(self, results, raw_timings, system_label):
+        self.pending.append(Future())
+        return self.pending[-1]
+
+    def flush(self):
+        for done in self.pending:
+            if self.fail:
+                done.set_exception(RuntimeError("connection lost"))
+            else:
+                done.set_result(None)
+        self.pending = []
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    # Only the database side is under test; skip the file exports
+    monkeypatch.setattr(reporting, "export_csv", lambda *args: None)
+    monkeypatch.setattr(reporting, "export_results_json", lambda *args: None)
+    journal = run_journal.RunJournal("lab", PARAMS, directory=tmp_path, env=ENV)
+    journal.record(JOB, RESULTS, {})
+    return journal
+
+def test_marked_once_exported(journal):
+    writer = Writer()
+    exports = reporting.report_journaled(journal, JOB, RESULTS, {}, "lab", writer)
+    # Reporting does not wait for the database
+    assert len(exports) == 2
+    assert journal.get(JOB)[2] is False
+    writer.flush()
+    assert journal.get(JOB)[2] is True
+    assert reporting.failed_exports([(JOB, exports)]) == []
+
+def test_failed_export_stays_unreported(journal):
+    writer = Writer(fail=True)
+    exports = reporting.report_journaled(journal, JOB, RESULTS, {}, "lab", writer)
+    writer.flush()
+    assert journal.get(JOB)[2] is False
+    assert reporting.failed_exports([(JOB, exports)]) == [JOB]
+    _, [(_, _, _, reported)] = journal.start([JOB], resume=True)
+    assert reported is False
+
+def test_without_database(journal):
+    assert reporting.report_journaled(journal, JOB, RESULTS, {}, "lab") == []
+    assert journal.get(JOB)[2] is True
+
+def test_export_csv_needs_no_liboqs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(sys.modules, "oqs", None)
+    results = {"algorithm": "ML-KEM-768", "timestamp": "2024-01-01 12:00:00", "keygen_ms": {"median": 0.1}}
+    reporting.export_csv(results, {"keygen": np.array([0.1, 0.2])}, "lab")
+    [summary] = (tmp_path / "exports" / "lab").glob("*_summary.csv")
+    assert "public_key_size" in summary.read_text().splitlines()[0]
@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+import pytest
+
+import result_cache
+
+
+ENV = {"liboqs_version": "0.10.0", "cryptography_version": "42.0.0", "cpu_model": "test-cpu"}
+JOB = ("kem", "pq_kem", "ML-KEM-768", {})
+PARAMS = {"options": {"iterations": 100}, "mode": "latency", "stable": None}
+RESULTS = {"algorithm": "ML-KEM-768", "category": "pq_kem", "keygen_ms": {"median": 0.05}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with result_cache.ResultCache(tmp_path, env=ENV) as cache:
+        yield cache
+
+def test_cache_key_is_stable_and_sensitive():
+    key = result_cache.cache_key(JOB, PARAMS, ENV, "lab")
+    assert key == result_cache.cache_key(JOB, dict(reversed(PARAMS.items())), ENV, "lab")
+    assert key != result_cache.cache_key(JOB, {**PARAMS, "mode": "throughput"}, ENV, "lab")
+    assert key != result_cache.cache_key(JOB, PARAMS, {**ENV, "liboqs_version": "0.11.0"}, "lab")
+    assert key != result_cache.cache_key(JOB, PARAMS, ENV, "other")
+    assert key != result_cache.cache_key(("kem", "pq_kem", "ML-KEM-512", {}), PARAMS, ENV, "lab")
+
+def test_put_get_round_trip(cache):
+    key = cache.key(JOB, PARAMS, "lab")
+    raw = {"keygen": np.arange(5, dtype=np.float64), "keygen.thread_time": np.ones(5)}
+    cache.put(key, PARAMS, "lab", RESULTS, raw)
+    results, raw_timings = cache.get(key)
+    assert results == RESULTS
+    assert set(raw_timings) == set(raw)
+    np.testing.assert_array_equal(raw_timings["keygen"], raw["keygen"])
+
+def test_get_respects_max_age(cache, monkeypatch):
+    key = cache.key(JOB, PARAMS, "lab")
+    cache.put(key, PARAMS, "lab", RESULTS, {})
+    assert cache.get(key, max_age_s=60) is not None
+    later = time.time() + 120
+    monkeypatch.setattr(result_cache.time, "time", lambda: later)
+    assert cache.get(key, max_age_s=60) is None
+    assert cache.get(key) is not None
+
+def test_missing_raw_file_is_a_miss(cache):
+    key = cache.key(JOB, PARAMS, "lab")
+    cache.put(key, PARAMS, "lab", RESULTS, {"keygen": np.ones(3)})
+    (cache.directory / f"{key}.npz").unlink()
+    assert cache.get(key) is None
+
+def test_evict_old_and_other_versions(tmp_path, monkeypatch):
+    with result_cache.ResultCache(tmp_path, env={**ENV, "liboqs_version": "0.9.0"}) as old:
+        old_key = old.key(JOB, PARAMS, "lab")
+        old.put(old_key, PARAMS, "lab", RESULTS, {"keygen": np.ones(3)})
+
+    with result_cache.ResultCache(tmp_path, env=ENV) as cache:
+        key = cache.key(JOB, PARAMS, "lab")
+        cache.put(key, PARAMS, "lab", RESULTS, {})
+        assert cache.evict() == 0
+        assert cache.evict(other_versions=True) == 1
+        assert not (tmp_path / f"{old_key}.npz").exists()
+        assert cache.get(key) is not None
+
+        later = time.time() + 3600
+        monkeypatch.setattr(result_cache.time, "time", lambda: later)
+        assert cache.evict(max_age_s=60) == 1
+        assert cache.get(key) is None
@@ -0,0 +1,82 @@
+import json
+
+import numpy as np
+import pytest
+
+import benchmark_plan
+import run_journal
+
+
+ENV = {"liboqs_version": "0.10.0", "cryptography_version": "42.0.0", "cpu_model": "test-cpu"}
+PARAMS = {"options": {"iterations": 100}, "mode": "latency", "stable": None}
+JOBS = [
+    benchmark_plan.Job("kem", "pq_kem", "ML-KEM-768", {}, 2.0),
+    benchmark_plan.Job("sig", "pq_sig", "ML-DSA-65", {}, 1.0)
+]
+
+
+def results(job):
+    return {"algorithm": job.algorithm, "category": job.category, "keygen_ms": {"median": 0.1}}
+
+@pytest.fixture
+def journal(tmp_path):
+    return run_journal.RunJournal("lab", PARAMS, directory=tmp_path, env=ENV)
+
+def test_record_and_resume(journal):
+    raw = {"keygen": np.arange(4, dtype=np.float64)}
+    journal.record(JOBS[0], results(JOBS[0]), raw)
+
+    pending, completed = journal.start(JOBS, resume=True)
+    assert pending == [JOBS[1]]
+    [(job, stored, raw_timings, reported)] = completed
+    assert job == JOBS[0]
+    assert stored == results(JOBS[0])
+    np.testing.assert_array_equal(raw_timings["keygen"], raw["keygen"])
+    assert reported is False
+
+    journal.mark_reported(JOBS[0])
+    assert journal.get(JOBS[0])[2] is True
+
+def test_new_run_discards_its_jobs(journal):
+    for job in JOBS:
+        journal.record(job, results(job), {})
+    pending, completed = journal.start(JOBS[:1])
+    assert (pending, completed) == ([JOBS[0]], [])
+    assert journal.get(JOBS[0]) is None
+    assert journal.get(JOBS[1]) is not None
+
+def test_other_settings_do_not_match(journal, tmp_path):
+    journal.record(JOBS[0], results(JOBS[0]), {})
+    other = run_journal.RunJournal("lab", {**PARAMS, "mode": "throughput"}, directory=tmp_path, env=ENV)
+    assert other.start(JOBS, resume=True) == (JOBS, [])
+
+def test_failed_write_keeps_previous_entry(journal):
+    journal.record(JOBS[0], results(JOBS[0]), {})
+    path = journal.directory / f"{journal.key(JOBS[0])}.json"
+    before = path.read_bytes()
+
+    def crash(file):
+        file.write(b'{"partial": ')
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        run_journal._atomic_write(path, crash)
+    assert path.read_bytes() == before
+    assert journal.get(JOBS[0]) is not None
+
+def test_entry_without_results_is_pending(journal):
+    # A crash between the .npz and the .json leaves an entry that does not count
+    journal.record(JOBS[0], results(JOBS[0]), {"keygen": np.ones(3)})
+    (journal.directory / f"{journal.key(JOBS[0])}.json").unlink()
+    assert journal.start(JOBS, resume=True) == (JOBS, [])
+
+def test_corrupt_entry_is_pending(journal):
+    journal.record(JOBS[0], results(JOBS[0]), {})
+    (journal.directory / f"{journal.key(JOBS[0])}.json").write_text('{"results": ')
+    assert journal.get(JOBS[0]) is None
+
+def test_entries_are_plain_json(journal):
+    journal.record(JOBS[0], results(JOBS[0]), {})
+    entry = json.loads((journal.directory / f"{journal.key(JOBS[0])}.json").read_text())
+    assert entry["job"] == ["kem", "pq_kem", "ML-KEM-768", {}]
+    assert entry["raw_file"] is None
@@ -0,0 +1,42 @@
+import numpy as np
+
+import series_analysis
+
+
+def noisy(levels, seed=0):
+    return np.asarray(levels, dtype=np.float64) * np.random.default_rng(seed).lognormal(0.0, 0.02, len(levels))
+
+def test_warmup_length_finds_the_step():
+    data = noisy(np.r_[np.full(100, 10.0), np.full(900, 1.0)])
+    assert series_analysis.warmup_length(data) == 100
+
+def test_no_warmup_in_a_flat_series():
+    assert series_analysis.warmup_length(noisy(np.ones(1000), seed=1)) == 0
+
+def test_single_spike_is_not_a_warmup():
+    data = noisy(np.ones(1000), seed=2)
+    data[500] = 100.0
+    assert series_analysis.warmup_length(data) == 0
+
+def test_slowdown_is_not_a_warmup():
+    # The leading segment must be the slower one
+    data = noisy(np.r_[np.full(100, 1.0), np.full(900, 10.0)], seed=3)
+    assert series_analysis.warmup_length(data) == 0
+
+def test_short_series_has_no_warmup():
+    assert series_analysis.warmup_length(np.r_[np.full(5, 10.0), np.ones(10)]) == 0
+
+def test_outlier_fences():
+    # q1 = 2, q3 = 4, IQR = 2: mild beyond [-1, 7], extreme beyond [-4, 10]
+    data = np.array([1.0, 2.0, 2.0, 3.0, 3.0, 3.0, 4.0, 4.0, 5.0, 8.0, 11.0])
+    flags = series_analysis.outliers(data)
+    assert data[flags["mild"]].tolist() == [8.0, 11.0]
+    assert data[flags["extreme"]].tolist() == [11.0]
+
+def test_periodic_spikes():
+    spikes = np.zeros(1000, dtype=bool)
+    spikes[::50] = True
+    period, correlation = series_analysis.periodicity(spikes)
+    assert period == 50
+    assert correlation > 0.9
+    assert series_analysis.periodicity(np.zeros(1000, dtype=bool)) is None
@@ -0,0 +1,77 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+import benchmark_plan
+import stable_mode
+
+
+JOBS = [
+    benchmark_plan.Job("kem", "pq_kem", "ML-KEM-768", {}, 1.0),
+    benchmark_plan.Job("sig", "pq_sig", "ML-DSA-65", {"latency": {"iterations": 7}}, 1.0)
+]
+
+
+@pytest.fixture
+def fake_runs(monkeypatch):
+    calls = []
+
+    def run(job, options=None, mode="latency"):
+        n = options["iterations"]
+        calls.append((job.algorithm, n))
+        results = {"algorithm": job.algorithm, "category": job.category, "iterations": n, "correctness_rate": 1.0}
+        return results, {"keygen": np.ones(n)}
+
+    monkeypatch.setattr(stable_mode.benchmark_plan, "run", run)
+    monkeypatch.setattr(stable_mode.result_cache, "environment", lambda: {"liboqs_version": "test"})
+    return calls
+
+def test_rounds_add_up_to_the_requested_iterations(fake_runs):
+    runs = list(stable_mode.run_interleaved(JOBS, {"iterations": 103}, rounds=10, seed=0))
+    for job, results, raw_timings, error in runs:
+        assert error is None
+        assert results["iterations"] == 103
+        assert raw_timings["keygen"].size == 103
+    sizes = [n for algorithm, n in fake_runs if algorithm == "ML-KEM-768"]
+    assert sizes.count(10) == 9 and sizes.count(13) == 1
+
+def test_fewer_iterations_than_rounds(fake_runs):
+    runs = {job.algorithm: results for job, results, _, _ in stable_mode.run_interleaved(JOBS, rounds=10, seed=0)}
+    assert runs["ML-DSA-65"]["iterations"] == 7
+    assert runs["ML-KEM-768"]["iterations"] == 100
+    assert all(n > 0 for _, n in fake_runs)
+
+def test_stable_environment_restores_niceness():
+    before = os.getpriority(os.PRIO_PROCESS, 0)
+    affinity = os.sched_getaffinity(0)
+    # Raising priority needs CAP_SYS_NICE; without it the niceness is left alone
+    with stable_mode.StableEnvironment(niceness=before - 1):
+        assert os.getpriority(os.PRIO_PROCESS, 0) in (before, before - 1)
+    assert os.getpriority(os.PRIO_PROCESS, 0) == before
+    assert os.sched_getaffinity(0) == affinity
+
+def test_other_threads_are_kept_off_the_pinned_cpu():
+    started, stop = threading.Event(), threading.Event()
+    tids = []
+
+    def worker():
+        tids.append(threading.get_native_id())
+        started.set()
+        stop.wait()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    started.wait()
+    try:
+        affinity = os.sched_getaffinity(tids[0])
+        with stable_mode.StableEnvironment() as pinned:
+            inside = os.sched_getaffinity(tids[0])
+            assert os.sched_getaffinity(0) == {pinned.cpu}
+        # With a single allowed CPU there is nowhere else to go
+        assert inside == (affinity - {pinned.cpu} or affinity)
+        assert os.sched_getaffinity(tids[0]) == affinity
+    finally:
+        stop.set()
+        thread.join()
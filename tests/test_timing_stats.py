@@ -0,0 +1,112 @@
+import math
+
+import numpy as np
+import pytest
+
+import timing_stats
+
+
+def test_compute_stats_known_answers():
+    stats = timing_stats.compute_stats(np.arange(1, 101, dtype=np.float64), rng=0)
+    assert stats["mean"] == 50.5
+    assert stats["median"] == 50.5
+    assert stats["min"] == 1.0
+    assert stats["max"] == 100.0
+    assert stats["stddev"] == pytest.approx(29.011492, abs=1e-6)
+    assert stats["cv"] == pytest.approx(29.011492 / 50.5, abs=1e-6)
+    # numpy's linear interpolation: p = 1 + q * 99
+    assert stats["p90"] == pytest.approx(90.1)
+    assert stats["p99"] == pytest.approx(99.01)
+    assert stats["p999"] == pytest.approx(99.901)
+    assert stats["mad"] == 25.0
+    assert stats["mean_ci_low"] < stats["mean"] < stats["mean_ci_high"]
+    assert stats["median_ci_low"] <= stats["median"] <= stats["median_ci_high"]
+
+def test_compute_stats_single_sample():
+    stats = timing_stats.compute_stats(np.array([2.5]), rng=0)
+    assert stats["stddev"] == 0.0
+    assert stats["mean_ci_low"] == stats["mean_ci_high"] == 2.5
+    assert stats["median_ci_low"] == stats["median_ci_high"] == 2.5
+
+def test_bootstrap_mean_ci_matches_normal_theory():
+    data = np.random.default_rng(1).normal(10.0, 2.0, 2000)
+    low, high = timing_stats.bootstrap_mean_ci(data, n_boot=4000, rng=2)
+    half = 1.959964 * data.std(ddof=1) / math.sqrt(data.size)
+    assert (high - low) / 2 == pytest.approx(half, rel=0.1)
+    assert low < data.mean() < high
+
+def test_bootstrap_mean_ci_rescales_subsampled_resamples():
+    # Larger than BOOTSTRAP_SUBSAMPLE, so the m-out-of-n path and its sqrt(m/n) rescaling are used
+    n = 4 * timing_stats.BOOTSTRAP_SUBSAMPLE
+    data = np.random.default_rng(3).normal(10.0, 2.0, n)
+    low, high = timing_stats.bootstrap_mean_ci(data, n_boot=2000, rng=4)
+    half = 1.959964 * data.std(ddof=1) / math.sqrt(n)
+    assert (high - low) / 2 == pytest.approx(half, rel=0.1)
+
+def test_bootstrap_median_ci_matches_resampling_bootstrap():
+    data = np.sort(np.random.default_rng(5).lognormal(0.0, 0.5, 501))
+    low, high = timing_stats.bootstrap_median_ci(data, n_boot=20000, rng=6)
+
+    rng = np.random.default_rng(7)
+    medians = np.median(data[rng.integers(0, data.size, size=(20000, data.size))], axis=1)
+    ref_low, ref_high = np.quantile(medians, [0.025, 0.975])
+    # Both are quantiles of the same bootstrap distribution of the median
+    spread = ref_high - ref_low
+    assert low == pytest.approx(ref_low, abs=0.1 * spread)
+    assert high == pytest.approx(ref_high, abs=0.1 * spread)
+
+def test_bootstrap_median_ci_matches_asymptotic_width():
+    data = np.sort(np.random.default_rng(8).normal(0.0, 1.0, 4001))
+    low, high = timing_stats.bootstrap_median_ci(data, n_boot=20000, rng=9)
+    # Standard error of the median of a normal sample: sqrt(pi / 2) * sigma / sqrt(n)
+    half = 1.959964 * math.sqrt(math.pi / 2) / math.sqrt(data.size)
+    assert (high - low) / 2 == pytest.approx(half, rel=0.15)
+
+def test_relative_median_ci_uses_order_statistics():
+    data = np.arange(1, 101, dtype=np.float64)
+    # half = 1.96 * sqrt(100) / 2 = 9.8 ranks: order statistics 40 and 60 (0-based)
+    assert timing_stats.relative_median_ci(data) == pytest.approx((61 - 41) / (2 * 50.5))
+    assert timing_stats.relative_median_ci(np.array([1.0])) == math.inf
+
+def test_throughput_stats():
+    stats = timing_stats.throughput_stats(np.array([0.5, 1.0, 2.0]))
+    assert stats["ops_per_sec"] == 1000.0
+    assert stats["ops_per_sec_best"] == 2000.0
+    assert stats["ops_per_sec_mean"] == pytest.approx(1000 / (3.5 / 3), abs=1e-3)
+    assert stats["amortized_ms"] == 1.0
+
+
+def test_streaming_stats_moments_are_exact():
+    data = np.random.default_rng(10).lognormal(-1.0, 0.4, 10_000)
+    stream = timing_stats.StreamingStats()
+    for chunk in np.array_split(data, 7):
+        stream.update(chunk)
+    assert stream.count == data.size
+    assert stream.mean == pytest.approx(data.mean(), rel=1e-12)
+    assert math.sqrt(stream.m2 / (stream.count - 1)) == pytest.approx(data.std(ddof=1), rel=1e-9)
+    assert stream.min == data.min()
+    assert stream.max == data.max()
+
+@pytest.mark.parametrize("q", [0.01, 0.25, 0.5, 0.9, 0.99, 0.999])
+def test_streaming_stats_quantiles_within_bucket_width(q):
+    data = np.random.default_rng(11).lognormal(-1.0, 0.4, 100_000)
+    stream = timing_stats.StreamingStats()
+    for chunk in np.array_split(data, 10):
+        stream.update(chunk)
+    # Buckets are 1% wide, and the estimate is a bucket midpoint
+    assert stream.quantile(q) == pytest.approx(np.quantile(data, q), rel=0.011)
+
+def test_streaming_summary_agrees_with_compute_stats():
+    data = np.random.default_rng(12).lognormal(0.0, 0.3, 20_000)
+    stream = timing_stats.StreamingStats()
+    stream.update(data)
+    streamed = stream.summary()
+    exact = timing_stats.compute_stats(data, rng=13)
+    assert set(streamed) == set(timing_stats.SUMMARY_FIELDS)
+    for field in ("median", "p90", "p99", "mad", "median_ci_low", "median_ci_high"):
+        assert streamed[field] == pytest.approx(exact[field], rel=0.03)
+    for field in ("mean", "stddev", "min", "max"):
+        assert streamed[field] == pytest.approx(exact[field], rel=1e-6)
+
+def test_streaming_stats_empty():
+    assert math.isnan(timing_stats.StreamingStats().quantile(0.5))
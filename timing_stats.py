@@ -0,0 +1,367 @@
+import gc
+import math
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+
+PERCENTILES = {"p90": 0.90, "p99": 0.99, "p999": 0.999}
+
+SUMMARY_FIELDS = (
+    "mean", "median", "max", "min", "stddev", "cv",
+    "p90", "p99", "p999", "mad",
+    "mean_ci_low", "mean_ci_high", "median_ci_low", "median_ci_high"
+)
+
+# Upper bound on resampled elements held in memory at once while bootstrapping
+BOOTSTRAP_CHUNK = 1 << 22
+# Largest resample drawn for the mean; bigger samples use a rescaled m-out-of-n bootstrap
+BOOTSTRAP_SUBSAMPLE = 1 << 14
+
+
+def empty(iterations):
+    return np.empty(iterations, dtype=np.float64)
+
+def grow(timings, capacity):
+    for op, data in timings.items():
+        grown = empty(capacity)
+        grown[:data.size] = data
+        timings[op] = grown
+
+def time_batches(op, inputs, batch_size, batches):
+    # Amortized per-call cost in ms of each batch of batch_size op(*args)
+    # calls, cycling through the precomputed argument tuples in inputs
+    batch = [inputs[j % len(inputs)] for j in range(batch_size)]
+    per_op = empty(batches)
+    for b in range(batches):
+        start = time.perf_counter_ns()
+        for args in batch:
+            op(*args)
+        per_op[b] = (time.perf_counter_ns() - start) / 1_000_000 / batch_size
+    return per_op
+
+def throughput_stats(per_op_ms):
+    mean = per_op_ms.mean()
+    median = np.median(per_op_ms)
+    return {
+        "ops_per_sec": round(float(1000 / median), 3) if median > 0 else math.inf,
+        "ops_per_sec_mean": round(float(1000 / mean), 3) if mean > 0 else math.inf,
+        "ops_per_sec_best": round(float(1000 / per_op_ms.min()), 3) if per_op_ms.min() > 0 else math.inf,
+        "amortized_ms": round(float(median), 6)
+    }
+
+def relative_median_ci(data, confidence=0.95):
+    # Half-width of the distribution-free order-statistic CI of the median,
+    # relative to the median
+    ordered = np.sort(data)
+    n = ordered.size
+    if n < 2:
+        return math.inf
+    half = NormalDist().inv_cdf((1 + confidence) / 2) * math.sqrt(n) / 2
+    lo = max(0, math.floor(n / 2 - half))
+    hi = min(n - 1, math.ceil(n / 2 + half))
+    median = np.median(ordered)
+    if median == 0:
+        return math.inf
+    return float((ordered[hi] - ordered[lo]) / (2 * median))
+
+def bootstrap_mean_ci(data, n_boot=1000, confidence=0.95, rng=None):
+    rng = np.random.default_rng(rng)
+    n = data.size
+    m = min(n, BOOTSTRAP_SUBSAMPLE)
+    rows = max(1, BOOTSTRAP_CHUNK // m)
+    means = np.empty(n_boot)
+    for start in range(0, n_boot, rows):
+        stop = min(n_boot, start + rows)
+        idx = rng.integers(0, n, size=(stop - start, m))
+        means[start:stop] = data[idx].mean(axis=1)
+    if m < n:
+        # Means of size-m resamples spread sqrt(n / m) times wider than size-n ones
+        mean = data.mean()
+        means = mean + (means - mean) * np.sqrt(m / n)
+    alpha = (1 - confidence) / 2
+    return np.quantile(means, [alpha, 1 - alpha])
+
+def bootstrap_median_ci(ordered, n_boot=1000, confidence=0.95, rng=None):
+    # The median of a resample is its k-th order statistic, and the k-th smallest
+    # of n uniform draws is Beta(k, n - k + 1) distributed, so the bootstrap
+    # distribution can be sampled from the sorted data without resampling it
+    rng = np.random.default_rng(rng)
+    n = ordered.size
+    k = (n + 1) // 2
+    idx = np.floor(rng.beta(k, n - k + 1, size=n_boot) * n).astype(np.intp)
+    medians = ordered[np.minimum(idx, n - 1)]
+    alpha = (1 - confidence) / 2
+    return np.quantile(medians, [alpha, 1 - alpha])
+
+def compute_stats(data, n_boot=1000, confidence=0.95, rng=None):
+    data = np.asarray(data, dtype=np.float64)
+    ordered = np.sort(data)
+    n = ordered.size
+
+    mean = ordered.mean()
+    stddev = ordered.std(ddof=1) if n > 1 else 0.0
+    median, *percentiles = np.quantile(ordered, [0.5, *PERCENTILES.values()])
+    mad = np.median(np.abs(ordered - median))
+
+    rng = np.random.default_rng(rng)
+    mean_ci = bootstrap_mean_ci(ordered, n_boot, confidence, rng)
+    median_ci = bootstrap_median_ci(ordered, n_boot, confidence, rng)
+
+    summary = {
+        "mean": mean,
+        "median": median,
+        "max": ordered[-1],
+        "min": ordered[0],
+        "stddev": stddev,
+        "cv": stddev / mean if mean != 0 else 0.0,
+        **dict(zip(PERCENTILES, percentiles)),
+        "mad": mad,
+        "mean_ci_low": mean_ci[0],
+        "mean_ci_high": mean_ci[1],
+        "median_ci_low": median_ci[0],
+        "median_ci_high": median_ci[1]
+    }
+    return {key: round(float(value), 6) for key, value in summary.items()}
+
+def metric_summary(metrics):
+    # {"<op>.<metric>": values} -> {op: {metric: {mean, median, p99, max}}}
+    summary = {}
+    for key, values in metrics.items():
+        op, name = key.split(".", 1)
+        summary.setdefault(op, {})[name] = {
+            "mean": round(float(values.mean()), 6),
+            "median": round(float(np.median(values)), 6),
+            "p99": round(float(np.quantile(values, 0.99)), 6),
+            "max": round(float(values.max()), 6)
+        }
+    return summary
+
+
+class GCPause:
+    """Keeps the cyclic garbage collector out of timed regions.
+
+    Collection is disabled on entry and restored on exit. settle() runs a full
+    collection between rounds, outside every timed loop, so garbage from long
+    runs never builds up. With enabled=False it does nothing.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._was_enabled = None
+
+    def __enter__(self):
+        if self.enabled:
+            self._was_enabled = gc.isenabled()
+            gc.collect()
+            gc.disable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.enabled and self._was_enabled:
+            gc.enable()
+
+    def settle(self):
+        if self.enabled:
+            gc.collect()
+
+
+class AdaptiveSampler:
+    """Decides when an adaptive benchmark loop has collected enough samples.
+
+    The loop fills its buffers and calls should_stop() whenever they are full.
+    Sampling ends once the relative median CI of every operation is at most
+    target_precision, or when max_iterations or time_budget_s is reached.
+    """
+
+    def __init__(self, target_precision=0.01, max_iterations=1_000_000,
+                 time_budget_s=300.0, confidence=0.95):
+        self.target_precision = target_precision
+        self.max_iterations = max_iterations
+        self.time_budget_ns = int(time_budget_s * 1_000_000_000)
+        self.confidence = confidence
+        self.stop_reason = None
+        self.precision = {}
+        self.started_ns = time.perf_counter_ns()
+
+    def _measure(self, timings, count):
+        self.precision = {
+            op: round(relative_median_ci(data[:count], self.confidence), 6)
+            for op, data in timings.items()
+        }
+
+    def should_stop(self, timings, count):
+        self._measure(timings, count)
+        if all(p <= self.target_precision for p in self.precision.values()):
+            self.stop_reason = "converged"
+        elif count >= self.max_iterations:
+            self.stop_reason = "max_iterations"
+        return self.stop_reason is not None
+
+    def expired(self, timings, count):
+        if time.perf_counter_ns() - self.started_ns < self.time_budget_ns:
+            return False
+        self._measure(timings, count)
+        self.stop_reason = "time_budget"
+        return True
+
+    def next_capacity(self, count):
+        # Grow by a quarter so convergence checks stay cheap and overshoot small
+        return min(self.max_iterations, count + max(count // 4, 1))
+
+    def report(self):
+        return {
+            "stop_reason": self.stop_reason,
+            "target_precision": self.target_precision,
+            "precision": self.precision
+        }
+
+
+class StreamingStats:
+    """Constant-memory summary of a stream of timings.
+
+    Mean and variance are merged chunk by chunk (Chan et al.), and quantiles
+    come from a log-spaced histogram with ~1% relative bucket width, so the
+    summary covers the same fields as compute_stats without keeping samples.
+    """
+
+    MIN_MS = 1e-6
+    GROWTH = 1.01
+    BUCKETS = math.ceil(math.log(1e12) / math.log(GROWTH)) + 1
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.hist = np.zeros(self.BUCKETS, dtype=np.int64)
+
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=np.float64)
+        n = chunk.size
+        if n == 0:
+            return
+        chunk_mean = chunk.mean()
+        chunk_m2 = np.square(chunk - chunk_mean).sum()
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, float(chunk.min()))
+        self.max = max(self.max, float(chunk.max()))
+
+        idx = np.floor(np.log(np.maximum(chunk, self.MIN_MS) / self.MIN_MS) / math.log(self.GROWTH))
+        idx = np.minimum(idx, self.BUCKETS - 1).astype(np.intp)
+        self.hist += np.bincount(idx, minlength=self.BUCKETS)
+
+    def _midpoints(self):
+        return self.MIN_MS * self.GROWTH ** (np.arange(self.BUCKETS) + 0.5)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        bucket = np.searchsorted(np.cumsum(self.hist), rank, side="right")
+        value = self.MIN_MS * self.GROWTH ** (bucket + 0.5)
+        return min(max(value, self.min), self.max)
+
+    def summary(self, confidence=0.95):
+        n = self.count
+        stddev = math.sqrt(self.m2 / (n - 1)) if n > 1 else 0.0
+        median = self.quantile(0.5)
+
+        # MAD from the histogram: weighted median of |bucket midpoint - median|
+        deviation = np.abs(self._midpoints() - median)
+        order = np.argsort(deviation)
+        cumulative = np.cumsum(self.hist[order])
+        mad = deviation[order][np.searchsorted(cumulative, (n - 1) / 2, side="right")] if n else 0.0
+
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        mean_half = z * stddev / math.sqrt(n) if n else 0.0
+        rank_half = z * math.sqrt(n) / 2 / max(n - 1, 1)
+
+        summary = {
+            "mean": self.mean,
+            "median": median,
+            "max": self.max,
+            "min": self.min,
+            "stddev": stddev,
+            "cv": stddev / self.mean if self.mean != 0 else 0.0,
+            **{name: self.quantile(q) for name, q in PERCENTILES.items()},
+            "mad": mad,
+            "mean_ci_low": self.mean - mean_half,
+            "mean_ci_high": self.mean + mean_half,
+            "median_ci_low": self.quantile(max(0.0, 0.5 - rank_half)),
+            "median_ci_high": self.quantile(min(1.0, 0.5 + rank_half))
+        }
+        return {key: round(float(value), 6) for key, value in summary.items()}
+
+
+class SampleStore:
+    """In-memory sample buffers for a benchmark loop.
+
+    The loop writes timings[op][slot] and calls commit() after every
+    iteration, or fills block(n) slots and calls commit(n); room() reports
+    whether another iteration should run, growing the buffers while an
+    AdaptiveSampler still wants more samples. Extra per-iteration metrics
+    (see instrumentation) live in metrics["<op>.<name>"]. An observer (see
+    live_metrics) is told about every commit.
+    """
+
+    timestamp = None
+    observer = None
+
+    def __init__(self, operations, iterations, sampler=None, metrics=()):
+        self.timings = {op: empty(iterations) for op in operations}
+        self.metrics = {f"{op}.{name}": empty(iterations) for op in operations for name in metrics}
+        self.capacity = iterations
+        self.sampler = sampler
+        self.slot = 0
+        self.count = 0
+        self.failures = 0
+        self.stopped = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def room(self):
+        if self.stopped:
+            return False
+        if self.slot < self.capacity:
+            return True
+        if self.sampler is None or self.sampler.should_stop(self.timings, self.count):
+            return False
+        self.capacity = self.sampler.next_capacity(self.count)
+        grow(self.timings, self.capacity)
+        grow(self.metrics, self.capacity)
+        return True
+
+    def block(self, size):
+        # Free slots from slot onwards, for loops that fill several at a time
+        return min(size, self.capacity - self.slot)
+
+    def commit(self, n=1):
+        self.slot += n
+        self.count += n
+        if self.observer is not None:
+            self.observer.committed(self, n)
+        if self.sampler is not None and self.sampler.expired(self.timings, self.count):
+            self.stopped = True
+
+    def fail(self):
+        self.failures += 1
+
+    def raw_timings(self):
+        return {key: data[:self.count] for key, data in {**self.timings, **self.metrics}.items()}
+
+    def summary(self, op):
+        return compute_stats(self.timings[op][:self.count])
+
+    def metric_summary(self):
+        return metric_summary({key: data[:self.count] for key, data in self.metrics.items()})
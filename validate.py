@@ -1,34 +1,51 @@
-def algorithms(oqs, algorithms):
-    enabled_kems = oqs.get_enabled_kem_mechanisms()
-    enabled_sigs = oqs.get_enabled_sig_mechanisms()
-
-    kems_mlkem = []
-    kems_hqc = []
-    sigs_mldsa = []
-    sigs_slhdss = []
-
-    print(f"{'Key Encapsulation Mechanisms (KEMs)':-^80}")
-    for category, kems in algorithms["kems"].items():
-        for kem in kems:
-            status = "enabled" if kem in enabled_kems else "disabled"
-            print(f"{kem:>30}: {status}")
-            if status == "enabled":
-                if category == "ml-kem":
-                    kems_mlkem.append(kem)
-                elif category == "hqc":
-                    kems_hqc.append(kem)
-
-    print()
-    print(f"{'Signature Algorithms':-^80}")
-    for category, sigs in algorithms["signatures"].items():
-        for sig in sigs:
-            status = "enabled" if sig in enabled_sigs else "disabled"
-            print(f"{sig:>30}: {status}")
+import benchmark_plan
+
+
+SECTION_TITLES = {
+    "classic": "Classical Baselines",
+    "kems": "Key Encapsulation Mechanisms (KEMs)",
+    "signatures": "Signature Algorithms"
+}
+
+def algorithms(oqs, plan, verbose=True):
+    """Check every family in the plan against liboqs.
+
+    Returns {family: [enabled algorithms]}. A family whose algorithms is "*"
+    takes every enabled liboqs mechanism of its section that no other family
+    lists. Classical baselines come from cryptography and are always enabled.
+    With verbose=False the per-section tables are not printed.
+    """
+    mechanisms = {
+        "kems": oqs.get_enabled_kem_mechanisms(),
+        "signatures": oqs.get_enabled_sig_mechanisms()
+    }
+    families = list(benchmark_plan.families(plan))
+    listed = {
+        algorithm
+        for _, _, spec in families if spec["algorithms"] != "*"
+        for algorithm in spec["algorithms"]
+    }
+
+    enabled = {}
+    current = None
+    for section, family, spec in families:
+        if section != current and verbose:
+            if current is not None:
+                print()
+            print(f"{SECTION_TITLES.get(section, section):-^80}")
+            current = section
+
+        available = mechanisms.get(section)
+        names = spec["algorithms"]
+        if names == "*":
+            names = [name for name in available or [] if name not in listed]
+
+        enabled[family] = []
+        for name in names:
+            status = "enabled" if available is None or name in available else "disabled"
+            if verbose:
+                print(f"{name:>30}: {status}")
             if status == "enabled":
-                if category == "ml-dsa":
-                    sigs_mldsa.append(sig)
-                elif category == "slh-dsa":
-                    sigs_slhdss.append(sig)
+                enabled[family].append(name)
 
-    return kems_mlkem, kems_hqc, sigs_mldsa, sigs_slhdss
-    
\ No newline at end of file
+    return enabled